@@ -3,6 +3,13 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def positive_float(name: str, default: str) -> float:
+    """Read a setting that must be above 0 (a rate of 0 would mean dividing by zero)"""
+    value = float(os.getenv(name, default))
+    if value <= 0:
+        raise ValueError(f"{name} must be greater than 0, got {value:g}")
+    return value
+
 # Supabase Configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
@@ -11,3 +18,112 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+
+# Password Hashing Configuration
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+# Verified Token Cache Configuration
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Where revoked access tokens are kept: "memory" (per process, a logout only
+# reaches the worker serving it) or "redis" (shared, at RATE_LIMIT_REDIS_URL)
+TOKEN_REVOCATION_BACKEND = os.getenv("TOKEN_REVOCATION_BACKEND", os.getenv("RATE_LIMIT_BACKEND", "memory"))
+
+# Refresh Token Configuration
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# Seconds after a rotation during which reusing the old token is refused without
+# revoking the family (two tabs sharing the stored token refreshing at once)
+REFRESH_REUSE_GRACE_SECONDS = float(os.getenv("REFRESH_REUSE_GRACE_SECONDS", "10"))
+
+# Rate Limiting Configuration
+# Backend: "memory" (per process) or "redis" (shared between workers)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+# Login/register attempts: bucket size and refill per minute (rates must be above 0)
+LOGIN_IDENTITY_BURST = int(os.getenv("LOGIN_IDENTITY_BURST", "5"))
+LOGIN_IDENTITY_PER_MINUTE = positive_float("LOGIN_IDENTITY_PER_MINUTE", "5")
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = positive_float("LOGIN_IP_PER_MINUTE", "30")
+# Catch minigame: per-trainer bucket size and refill per minute, and max in-flight requests per endpoint
+CATCH_START_BURST = int(os.getenv("CATCH_START_BURST", "10"))
+CATCH_START_PER_MINUTE = positive_float("CATCH_START_PER_MINUTE", "30")
+CATCH_START_MAX_CONCURRENCY = int(os.getenv("CATCH_START_MAX_CONCURRENCY", "64"))
+CATCH_COMPLETE_BURST = int(os.getenv("CATCH_COMPLETE_BURST", "10"))
+CATCH_COMPLETE_PER_MINUTE = positive_float("CATCH_COMPLETE_PER_MINUTE", "30")
+CATCH_COMPLETE_MAX_CONCURRENCY = int(os.getenv("CATCH_COMPLETE_MAX_CONCURRENCY", "64"))
+
+# Data Store Configuration
+# Backend: "supabase", "memory" (seeded, lost on exit) or "sqlite" (local file)
+DATA_BACKEND = os.getenv("DATA_BACKEND", "supabase")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "pokemon.db")
+# JSON list of pokemon rows to seed the memory/sqlite backends (synthetic catalog if unset)
+CATALOG_SEED_PATH = os.getenv("CATALOG_SEED_PATH")
+
+# Request Tracing Configuration
+# Add Server-Timing headers (data store time and round trips) to responses
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+# Log a warning when a request makes more data store round trips than this
+ROUND_TRIP_WARNING_THRESHOLD = int(os.getenv("ROUND_TRIP_WARNING_THRESHOLD", "6"))
+
+# Profiling Configuration
+# Shared secret for the admin endpoints (sent in X-Admin-Token): /admin/profiling and /catch/limits are off if unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Captured profiles kept in memory per worker (oldest are dropped first)
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+
+# Facet Cache Configuration
+# Seconds before a facet list (types, regions, habitats, difficulties) is refreshed in the background
+FACET_CACHE_TTL = float(os.getenv("FACET_CACHE_TTL", "300"))
+# Seconds after which a facet list is no longer served without waiting for a refresh
+FACET_CACHE_MAX_STALENESS = float(os.getenv("FACET_CACHE_MAX_STALENESS", "3600"))
+# Random spread of the TTL (0.1 = +/-10%) so entries don't all expire together
+FACET_CACHE_JITTER = float(os.getenv("FACET_CACHE_JITTER", "0.1"))
+# Seconds between background reloads of the in-memory catalog (0 to load it only once)
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "3600"))
+# File holding the catalog shared by the uvicorn workers (unset to keep a copy per process)
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH")
+
+# Data Store Circuit Breaker Configuration
+# Seconds a data store read/write may take before the request gets a 503 (0 for no limit)
+DATASTORE_READ_TIMEOUT = float(os.getenv("DATASTORE_READ_TIMEOUT", "5"))
+DATASTORE_WRITE_TIMEOUT = float(os.getenv("DATASTORE_WRITE_TIMEOUT", "10"))
+# Consecutive failed calls (errors or timeouts) that open a breaker
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+# Seconds an open breaker rejects calls before letting a trial call through
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+# Deadline and Hedging Configuration
+# Seconds a request may spend on data store calls (routes can set a shorter deadline)
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "10"))
+# Deadline of the Pokemon list and detail routes
+READ_DEADLINE_SECONDS = float(os.getenv("READ_DEADLINE_SECONDS", "3"))
+# Send a second copy of a slow point read (get_*) after this percentile of its latency
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "5"))
+# Maximum extra reads sent as hedges, in percent of point reads
+HEDGE_BUDGET_PERCENT = float(os.getenv("HEDGE_BUDGET_PERCENT", "5"))
+
+# Data Client Configuration
+# HTTP connection pool of the Supabase client (shared by all bulkheads)
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "40"))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+# Use HTTP/2 when the h2 package is installed
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() == "true"
+# Seconds per HTTP call: connecting, reading a response, waiting for a pooled connection
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "3"))
+# Reads give up no later than the read cut-offs above, so a call nobody waits for
+# anymore doesn't keep its connection (and its bulkhead slot) for long
+_READ_CUTOFF = min([t for t in (DATASTORE_READ_TIMEOUT, READ_DEADLINE_SECONDS) if t > 0], default=10)
+SUPABASE_READ_TIMEOUT = float(os.getenv("SUPABASE_READ_TIMEOUT", str(_READ_CUTOFF)))
+SUPABASE_POOL_TIMEOUT = float(os.getenv("SUPABASE_POOL_TIMEOUT", "2"))
+
+# Bulkhead Configuration
+# Data store calls in flight at once per kind of traffic, so one can't starve the others
+BULKHEAD_AUTH_SIZE = int(os.getenv("BULKHEAD_AUTH_SIZE", "8"))
+BULKHEAD_CATALOG_SIZE = int(os.getenv("BULKHEAD_CATALOG_SIZE", "16"))
+BULKHEAD_GAMEPLAY_SIZE = int(os.getenv("BULKHEAD_GAMEPLAY_SIZE", "16"))
+# Seconds a call may wait for a free slot before the request gets a 503
+BULKHEAD_MAX_WAIT = float(os.getenv("BULKHEAD_MAX_WAIT", "1"))
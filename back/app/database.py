@@ -1,8 +1,67 @@
-from supabase import create_client, Client
-from app.config import SUPABASE_URL, SUPABASE_KEY
+import importlib.util
+import threading
+from typing import Optional
+import httpx
+from supabase import create_client, Client, ClientOptions
+from app.config import (
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    SUPABASE_MAX_CONNECTIONS,
+    SUPABASE_MAX_KEEPALIVE,
+    SUPABASE_KEEPALIVE_EXPIRY,
+    SUPABASE_HTTP2,
+    SUPABASE_CONNECT_TIMEOUT,
+    SUPABASE_READ_TIMEOUT,
+    SUPABASE_POOL_TIMEOUT
+)
+
+def create_http_client() -> httpx.Client:
+    """
+    Create the HTTP client used for Supabase calls
+    Calls run in the bulkhead threads (see app/utils/bulkhead.py), so the pool
+    should have about as many connections as the bulkheads have threads
+    """
+    # HTTP/2 needs the optional h2 package (pip install httpx[http2])
+    http2 = SUPABASE_HTTP2 and importlib.util.find_spec("h2") is not None
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(
+            SUPABASE_READ_TIMEOUT,
+            connect=SUPABASE_CONNECT_TIMEOUT,
+            pool=SUPABASE_POOL_TIMEOUT
+        ),
+        http2=http2,
+        follow_redirects=True
+    )
 
 def get_supabase_client() -> Client:
     """Get Supabase client instance"""
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    options = ClientOptions(httpx_client=create_http_client())
+    return create_client(SUPABASE_URL, SUPABASE_KEY, options)
+
+# Created on first use, so importing this module doesn't open connections
+_supabase: Optional[Client] = None
+_supabase_lock = threading.Lock()
+
+def get_supabase() -> Client:
+    """Get the process-wide Supabase client, creating it on first use"""
+    global _supabase
+    # Repositories call this from the bulkhead threads, so the first calls can race here
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                _supabase = get_supabase_client()
+    return _supabase
 
-supabase: Client = get_supabase_client()
+def close_supabase():
+    """Close the connections of the process-wide client (on shutdown)"""
+    global _supabase
+    with _supabase_lock:
+        client, _supabase = _supabase, None
+    if client is not None:
+        # The HTTP client is ours (see get_supabase_client), supabase-py leaves it open
+        client.options.httpx_client.close()
@@ -15,6 +15,16 @@ class DifficultyLevel(str, Enum):
     LEGENDARY = "legendary" # 601-720 stats: 7 buttons, 0.6s per button
     MYTHICAL = "mythical"  # 721+ stats: 8 buttons, 0.5s per button
 
+# Total stats range (min, max) of each difficulty level, None means unbounded
+DIFFICULTY_STAT_RANGES = {
+    'weak': (180, 300),
+    'easy': (301, 400),
+    'medium': (401, 500),
+    'hard': (501, 600),
+    'legendary': (601, 720),
+    'mythical': (721, None),
+}
+
 class CatchRequest(BaseModel):
     """Request to start a catch attempt"""
     region: str = Field(..., description="Pokemon region (kanto, johto, hoenn, etc.)")
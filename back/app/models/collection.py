@@ -0,0 +1,28 @@
+"""
+Models for managing a trainer's Pokemon collection
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class CaptureBatchRequest(BaseModel):
+    """Request to capture or release several Pokemon at once"""
+    pokemon_ids: List[int] = Field(..., min_length=1, max_length=100, description="Pokemon IDs (max 100)")
+
+class CaptureOutcome(BaseModel):
+    """Outcome for a single Pokemon in a batch capture/release"""
+    pokemon_id: int
+    status: str = Field(..., description="captured, already_captured, released, not_captured or not_found")
+    pokemon_name: Optional[str] = None
+
+class CaptureBatchResponse(BaseModel):
+    """Response for a batch capture/release"""
+    results: List[CaptureOutcome]
+    changed: int = Field(..., description="Number of Pokemon actually captured or released")
+
+class CollectionDelta(BaseModel):
+    """Changes to a trainer's collection since a given version"""
+    version: int = Field(..., description="Current collection version, to send as 'since' next time")
+    full: bool = Field(..., description="True if 'added' is a full snapshot of the collection")
+    added: List[int] = Field(default_factory=list, description="Pokemon IDs added (or all IDs if full)")
+    removed: List[int] = Field(default_factory=list, description="Pokemon IDs removed")
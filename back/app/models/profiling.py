@@ -0,0 +1,31 @@
+"""
+Models for on-demand request profiling
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class ProfilingArmRequest(BaseModel):
+    """Request to profile the next requests matching a path pattern"""
+    path_pattern: str = Field(..., min_length=1, description="Regular expression matched against the request path")
+    method: Optional[str] = Field(None, description="Only profile this HTTP method (any if omitted)")
+    count: int = Field(1, ge=1, le=100, description="Number of requests to profile")
+
+class ProfileSummary(BaseModel):
+    """A captured request profile"""
+    id: int
+    method: str
+    path: str
+    route: str = Field(..., description="Route template, or 'unmatched'")
+    status_code: int
+    duration_ms: float
+    created_at: str
+
+class ProfilingStatus(BaseModel):
+    """Current profiling state of this worker"""
+    armed: bool
+    path_pattern: Optional[str] = None
+    method: Optional[str] = None
+    remaining: int = Field(0, description="Requests left to profile")
+    buffer_size: int
+    profiles: List[ProfileSummary]
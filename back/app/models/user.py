@@ -34,6 +34,11 @@ class Token(BaseModel):
     """Schema for JWT token"""
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    """Schema for refreshing or revoking a session"""
+    refresh_token: str
 
 class TokenData(BaseModel):
     """Schema for token payload"""
@@ -0,0 +1,204 @@
+"""
+Repository interfaces for the data store
+Services only talk to these interfaces, so the same code runs against
+Supabase, an in-memory store or SQLite (see app/repositories/factory.py)
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+# Columns that can be used to sort Pokemon lists
+SORTABLE_COLUMNS = ['id', 'name', 'height', 'weight', 'stats_total']
+
+# Columns of the in-memory catalog (the large sprites JSON blob is left out)
+CATALOG_COLUMNS = [
+    'id', 'name', 'types', 'sprite_official', 'sprite_default', 'height', 'weight',
+    'base_experience', 'stats_hp', 'stats_attack', 'stats_defense',
+    'stats_special_attack', 'stats_special_defense', 'stats_speed',
+    'stats_total', 'region', 'habitat'
+]
+
+# Columns of a Pokemon detail, without the sprites blob (every game version's
+# sprites as PokeAPI returns them, only read when a client asks for it)
+DETAIL_COLUMNS = CATALOG_COLUMNS + ['abilities', 'description']
+
+class PokemonFilters:
+    """Filters shared by Pokemon list, random pick and facet queries"""
+    
+    def __init__(
+        self,
+        types: Optional[List[str]] = None,
+        region: Optional[str] = None,
+        habitat: Optional[str] = None,
+        min_stats: Optional[int] = None,
+        max_stats: Optional[int] = None
+    ):
+        self.types = types or []
+        self.region = region.lower() if region else None
+        self.habitat = habitat.lower() if habitat else None
+        self.min_stats = min_stats
+        self.max_stats = max_stats
+    
+    def key(self) -> Tuple:
+        """Hashable form of the filters (types are ANDed, so their order doesn't matter)"""
+        return (tuple(sorted(self.types)), self.region, self.habitat, self.min_stats, self.max_stats)
+    
+    def matches(self, row: Dict[str, Any]) -> bool:
+        """Check a Pokemon row against the filters (for stores filtering in Python)"""
+        if any(t not in row['types'] for t in self.types):
+            return False
+        if self.region and row.get('region') != self.region:
+            return False
+        if self.habitat and row.get('habitat') != self.habitat:
+            return False
+        if self.min_stats is not None and row['stats_total'] < self.min_stats:
+            return False
+        if self.max_stats is not None and row['stats_total'] > self.max_stats:
+            return False
+        return True
+
+class PokemonRepository(ABC):
+    """Access to the pokemon table (the catalog)"""
+    
+    @abstractmethod
+    async def list_pokemon(
+        self,
+        filters: PokemonFilters,
+        sort_by: str,
+        descending: bool,
+        offset: int,
+        limit: int,
+        trainer_id: Optional[str] = None,
+        captured_only: bool = False
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Get a page of Pokemon list rows and the total number of matches
+        Rows carry an 'is_captured' flag for trainer_id; captured_only keeps
+        only the trainer's captured Pokemon
+        """
+    
+    @abstractmethod
+    async def get_pokemon(self, pokemon_id: int, full_sprites: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get DETAIL_COLUMNS of a Pokemon (abilities, description...)
+        With full_sprites the row also has 'sprites', the blob as stored (JSON text, not parsed)
+        """
+    
+    @abstractmethod
+    async def list_catalog(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        """Get CATALOG_COLUMNS for a page of Pokemon ordered by ID"""
+    
+    @abstractmethod
+    async def find_pokemon(self, filters: PokemonFilters) -> List[Dict[str, Any]]:
+        """Get every Pokemon matching the filters (CATALOG_COLUMNS only)"""
+    
+    @abstractmethod
+    async def list_types(self) -> List[str]:
+        """Get the distinct Pokemon types"""
+    
+    @abstractmethod
+    async def list_regions(self) -> List[str]:
+        """Get the distinct non-null regions"""
+    
+    @abstractmethod
+    async def list_habitats(self, region: Optional[str] = None) -> List[str]:
+        """Get the distinct non-null habitats, optionally within a region"""
+    
+    @abstractmethod
+    async def list_stats_totals(self, filters: PokemonFilters) -> List[int]:
+        """Get stats_total of every Pokemon matching the filters"""
+    
+    @abstractmethod
+    async def count_pokemon(self) -> int:
+        """Get the number of Pokemon in the catalog"""
+    
+    @abstractmethod
+    async def upsert_pokemon(self, rows: List[Dict[str, Any]]) -> int:
+        """Insert or replace full Pokemon rows; returns the number written"""
+
+class TrainerRepository(ABC):
+    """Access to the trainers and refresh_tokens tables"""
+    
+    @abstractmethod
+    async def get_trainer(self, trainer_id: str) -> Optional[Dict[str, Any]]:
+        """Get a trainer row (including the password hash and collection_version)"""
+    
+    @abstractmethod
+    async def create_trainer(self, trainer: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Insert a trainer; returns the stored row"""
+    
+    @abstractmethod
+    async def update_trainer(self, trainer_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update some columns of a trainer; returns the updated row"""
+    
+    @abstractmethod
+    async def create_refresh_token(self, token: Dict[str, Any]):
+        """Store a refresh token row (token_hash, trainer_id, family_id, expires_at)"""
+    
+    @abstractmethod
+    async def get_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        """Get a refresh token row by hash"""
+    
+    @abstractmethod
+    async def revoke_refresh_token(self, token_hash: str, revoked_at: str) -> Optional[Dict[str, Any]]:
+        """
+        Revoke a refresh token only if it is not revoked yet
+        Returns the row if this call revoked it, None otherwise
+        """
+    
+    @abstractmethod
+    async def revoke_refresh_token_family(self, family_id: str, revoked_at: str):
+        """Revoke every live refresh token of a family"""
+
+class CaptureRepository(ABC):
+    """
+    Access to the captured_pokemon table and collection change log
+    Every capture or release bumps the trainer's collection_version and
+    records a collection event (a database trigger does this in Supabase)
+    """
+    
+    @abstractmethod
+    async def add_captures(
+        self,
+        trainer_id: str,
+        pokemon_ids: List[int],
+        nickname: Optional[str] = None
+    ) -> List[int]:
+        """Capture Pokemon, ignoring ones already captured; returns the newly captured IDs"""
+    
+    @abstractmethod
+    async def remove_captures(self, trainer_id: str, pokemon_ids: List[int]) -> List[int]:
+        """Release Pokemon; returns the IDs that were actually captured and are now removed"""
+    
+    @abstractmethod
+    async def get_capture(self, trainer_id: str, pokemon_id: int) -> Optional[Dict[str, Any]]:
+        """Get a captured_pokemon row"""
+    
+    @abstractmethod
+    async def count_captures(self, trainer_id: str) -> int:
+        """Get the number of Pokemon a trainer has captured"""
+    
+    @abstractmethod
+    async def list_captured_ids(self, trainer_id: str) -> List[int]:
+        """Get every Pokemon ID a trainer has captured, in ID order"""
+    
+    @abstractmethod
+    async def list_captures_after(self, trainer_id: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Get captured rows (id, pokemon_id, nickname) with id > after_id, in id order"""
+    
+    @abstractmethod
+    async def list_collection_events(
+        self,
+        trainer_id: str,
+        since_version: int,
+        until_version: int
+    ) -> List[Dict[str, Any]]:
+        """Get collection events (version, pokemon_id, action) in (since, until], in version order"""
+
+class Repositories:
+    """The repositories a request works with"""
+    
+    def __init__(self, pokemon: PokemonRepository, trainers: TrainerRepository, captures: CaptureRepository):
+        self.pokemon = pokemon
+        self.trainers = trainers
+        self.captures = captures
@@ -0,0 +1,86 @@
+"""
+Creates the repositories for the configured data backend
+and provides them to routes as a FastAPI dependency
+"""
+
+import threading
+from typing import Callable, Optional
+from app.config import DATA_BACKEND, SQLITE_PATH, CATALOG_SEED_PATH
+from app.repositories.base import Repositories
+from app.repositories.guarded import guard_repositories
+from app.repositories.instrumented import instrument_repositories
+from app.repositories.seed import load_catalog
+
+_repositories: Optional[Repositories] = None
+_repositories_lock = threading.Lock()
+
+def create_repositories(backend: str = DATA_BACKEND) -> Repositories:
+    """
+    Create repositories for a backend: supabase, memory or sqlite
+    Calls are timed for /metrics (see app/repositories/instrumented.py) and go
+    through circuit breakers (see app/repositories/guarded.py)
+    """
+    return guard_repositories(
+        instrument_repositories(create_backend_repositories(backend), backend),
+        backend,
+        is_failure=failure_classifier(backend)
+    )
+
+def failure_classifier(backend: str) -> Optional[Callable[[Exception], bool]]:
+    """Get the function telling data store failures of a backend from request errors"""
+    if backend == "supabase":
+        from app.repositories.supabase_repository import is_datastore_failure
+        return is_datastore_failure
+    if backend == "sqlite":
+        from app.repositories.sqlite_repository import is_datastore_failure
+        return is_datastore_failure
+    # The in-memory store can't fail, its errors are all the request's
+    return None
+
+def create_backend_repositories(backend: str) -> Repositories:
+    """
+    Create the uninstrumented repositories of a backend
+    Local backends are seeded with the catalog when they have no Pokemon
+    """
+    # Backends are imported lazily so only the selected one needs its dependencies
+    if backend == "supabase":
+        from app.repositories.supabase_repository import create_supabase_repositories
+        return create_supabase_repositories()
+    
+    if backend == "memory":
+        from app.repositories.memory_repository import create_memory_repositories
+        return create_memory_repositories(load_catalog(CATALOG_SEED_PATH))
+    
+    if backend == "sqlite":
+        from app.repositories.sqlite_repository import create_sqlite_repositories
+        return create_sqlite_repositories(SQLITE_PATH, lambda: load_catalog(CATALOG_SEED_PATH))
+    
+    raise ValueError(f"Unknown data backend: {backend}")
+
+def set_repositories(repositories: Optional[Repositories]):
+    """Replace the process-wide repositories (for benchmarks and scripts)"""
+    global _repositories
+    _repositories = repositories
+
+def close_repositories():
+    """Release the connections held for the configured backend (on shutdown)"""
+    if DATA_BACKEND == "supabase" and _repositories is not None:
+        from app.database import close_supabase
+        close_supabase()
+
+def init_repositories() -> Repositories:
+    """
+    Create the process-wide repositories (on startup, see main.py)
+    This blocks (seeding, building the Supabase client), so it runs in the threadpool
+    """
+    global _repositories
+    with _repositories_lock:
+        if _repositories is None:
+            _repositories = create_repositories()
+    return _repositories
+
+async def get_repositories() -> Repositories:
+    """FastAPI dependency returning the repositories created on startup"""
+    if _repositories is None:
+        raise RuntimeError("Repositories are not created yet, call init_repositories on startup")
+    return _repositories
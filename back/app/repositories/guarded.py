@@ -0,0 +1,88 @@
+"""
+Repositories wrapper sending every data store call through a circuit breaker
+Reads and writes have separate breakers and timeouts, so a failing write path
+doesn't stop reads (which services can serve from the in-memory catalog).
+Point reads (get_*) are hedged when slow (see app/utils/hedging.py).
+"""
+
+import functools
+from typing import Any, Callable, Dict, Optional
+from app.config import (
+    HEDGE_ENABLED,
+    DATASTORE_READ_TIMEOUT,
+    DATASTORE_WRITE_TIMEOUT,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_SECONDS
+)
+from app.repositories.base import Repositories
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.hedging import HedgedReader, hedged_reader
+
+# Repository methods starting with these only read
+READ_PREFIXES = ('get_', 'list_', 'count_', 'find_')
+
+# Reads of a single row, cheap and idempotent enough to be sent twice
+HEDGED_PREFIXES = ('get_',)
+
+class GuardedRepository:
+    """Proxy calling the async methods of a repository through breakers"""
+    
+    def __init__(
+        self,
+        repository: Any,
+        read_breaker: CircuitBreaker,
+        write_breaker: CircuitBreaker,
+        reader: Optional[HedgedReader] = None
+    ):
+        self.repository = repository
+        self.read_breaker = read_breaker
+        self.write_breaker = write_breaker
+        self.reader = reader
+        self._methods: Dict[str, Any] = {}
+    
+    def __getattr__(self, name: str):
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+        
+        attribute = getattr(self.repository, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        
+        breaker = self.read_breaker if name.startswith(READ_PREFIXES) else self.write_breaker
+        
+        reader = self.reader
+        if reader is not None and name.startswith(HEDGED_PREFIXES):
+            @functools.wraps(attribute)
+            async def guarded(*args, **kwargs):
+                return await breaker.call(reader.read, name, attribute, *args, **kwargs)
+        else:
+            @functools.wraps(attribute)
+            async def guarded(*args, **kwargs):
+                return await breaker.call(attribute, *args, **kwargs)
+        
+        self._methods[name] = guarded
+        return guarded
+
+def guard_repositories(
+    repositories: Repositories,
+    backend: str,
+    reader: Optional[HedgedReader] = hedged_reader if HEDGE_ENABLED else None,
+    is_failure: Optional[Callable[[Exception], bool]] = None
+) -> Repositories:
+    """
+    Wrap repositories with one read and one write breaker for the backend
+    Point reads are hedged by reader (None to disable hedging); is_failure tells
+    which errors of the backend are data store failures (None: only timeouts)
+    """
+    read_breaker = CircuitBreaker(
+        f"{backend}_read", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS, DATASTORE_READ_TIMEOUT, is_failure
+    )
+    write_breaker = CircuitBreaker(
+        f"{backend}_write", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS, DATASTORE_WRITE_TIMEOUT, is_failure
+    )
+    return Repositories(
+        pokemon=GuardedRepository(repositories.pokemon, read_breaker, write_breaker, reader),
+        trainers=GuardedRepository(repositories.trainers, read_breaker, write_breaker, reader),
+        captures=GuardedRepository(repositories.captures, read_breaker, write_breaker, reader)
+    )
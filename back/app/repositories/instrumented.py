@@ -0,0 +1,78 @@
+"""
+Repositories wrapper recording the latency of every data store call
+Each call is published on /metrics with its backend, table and operation
+(the repository method name). The requests the backend sends for it (one
+per query, so one per page of a paged scan) are counted as round trips of the
+current request (see app/utils/tracing.py)
+"""
+
+import functools
+import time
+from typing import Any, Dict
+from app.repositories.base import Repositories
+from app.utils.metrics import datastore_queries, datastore_query_duration
+from app.utils.tracing import CallRequests, record_round_trip
+
+# Table touched by each repository method, when not the repository's main table
+METHOD_TABLES = {
+    'create_refresh_token': 'refresh_tokens',
+    'get_refresh_token': 'refresh_tokens',
+    'revoke_refresh_token': 'refresh_tokens',
+    'revoke_refresh_token_family': 'refresh_tokens',
+    'list_collection_events': 'collection_events',
+}
+
+# Backends answering in-process, without queries to count: each call is one round trip
+IN_PROCESS_BACKENDS = {'memory'}
+
+class InstrumentedRepository:
+    """Proxy timing every async method of a repository"""
+    
+    def __init__(self, repository: Any, backend: str, table: str):
+        self.repository = repository
+        self.backend = backend
+        self.table = table
+        self._methods: Dict[str, Any] = {}
+    
+    def __getattr__(self, name: str):
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+        
+        attribute = getattr(self.repository, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        
+        labels = {
+            'backend': self.backend,
+            'table': METHOD_TABLES.get(name, self.table),
+            'operation': name
+        }
+        
+        in_process = self.backend in IN_PROCESS_BACKENDS
+        
+        @functools.wraps(attribute)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = 'error'
+            with CallRequests() as requests:
+                try:
+                    result = await attribute(*args, **kwargs)
+                    outcome = 'ok'
+                    return result
+                finally:
+                    elapsed = time.perf_counter() - start
+                    datastore_query_duration.observe(elapsed, **labels)
+                    datastore_queries.inc(outcome=outcome, **labels)
+                    record_round_trip(labels['table'], name, elapsed, 1 if in_process else requests.count)
+        
+        self._methods[name] = timed
+        return timed
+
+def instrument_repositories(repositories: Repositories, backend: str) -> Repositories:
+    """Wrap repositories so their calls are recorded in the metrics"""
+    return Repositories(
+        pokemon=InstrumentedRepository(repositories.pokemon, backend, 'pokemon'),
+        trainers=InstrumentedRepository(repositories.trainers, backend, 'trainers'),
+        captures=InstrumentedRepository(repositories.captures, backend, 'captured_pokemon')
+    )
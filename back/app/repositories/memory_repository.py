@@ -0,0 +1,253 @@
+"""
+In-memory implementation of the repositories
+Keeps every table in Python dicts. Used for local development, benchmarks
+and load tests without a database. Data is lost when the process exits.
+"""
+
+import copy
+import itertools
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.repositories.base import (
+    CATALOG_COLUMNS,
+    DETAIL_COLUMNS,
+    CaptureRepository,
+    PokemonFilters,
+    PokemonRepository,
+    Repositories,
+    TrainerRepository
+)
+
+LIST_COLUMNS = ['id', 'name', 'types', 'sprite_official', 'sprite_default', 'height', 'weight', 'stats_total']
+
+def now_iso() -> str:
+    """Current UTC time as an ISO 8601 string, like Postgres timestamps"""
+    return datetime.now(timezone.utc).isoformat()
+
+def pick(row: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+    """Copy some columns of a row"""
+    return {column: copy.copy(row.get(column)) for column in columns}
+
+class MemoryStore:
+    """The tables shared by the in-memory repositories"""
+    
+    def __init__(self):
+        self.pokemon: Dict[int, Dict[str, Any]] = {}
+        self.trainers: Dict[str, Dict[str, Any]] = {}
+        # trainer_id -> pokemon_id -> captured_pokemon row
+        self.captures: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self.collection_events: Dict[str, List[Dict[str, Any]]] = {}
+        self.refresh_tokens: Dict[str, Dict[str, Any]] = {}
+        self.capture_ids = itertools.count(1)
+    
+    def record_event(self, trainer_id: str, pokemon_id: int, action: str):
+        """Bump a trainer's collection version and log the change"""
+        trainer = self.trainers.get(trainer_id)
+        if trainer is None:
+            return
+        trainer['collection_version'] += 1
+        self.collection_events.setdefault(trainer_id, []).append({
+            'version': trainer['collection_version'],
+            'pokemon_id': pokemon_id,
+            'action': action
+        })
+
+class MemoryPokemonRepository(PokemonRepository):
+    """pokemon table in memory"""
+    
+    def __init__(self, store: MemoryStore):
+        self.store = store
+    
+    async def list_pokemon(
+        self,
+        filters: PokemonFilters,
+        sort_by: str,
+        descending: bool,
+        offset: int,
+        limit: int,
+        trainer_id: Optional[str] = None,
+        captured_only: bool = False
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        captured = self.store.captures.get(trainer_id, {}) if trainer_id else {}
+        matches = []
+        for row in self.store.pokemon.values():
+            if not filters.matches(row):
+                continue
+            is_captured = row['id'] in captured
+            if captured_only and not is_captured:
+                continue
+            matches.append((row, is_captured))
+        
+        matches.sort(key=lambda match: (match[0][sort_by], match[0]['id']), reverse=descending)
+        
+        rows = []
+        for row, is_captured in matches[offset:offset + limit]:
+            list_row = pick(row, LIST_COLUMNS)
+            list_row['is_captured'] = is_captured
+            rows.append(list_row)
+        return rows, len(matches)
+    
+    async def get_pokemon(self, pokemon_id: int, full_sprites: bool = False) -> Optional[Dict[str, Any]]:
+        row = self.store.pokemon.get(pokemon_id)
+        if row is None:
+            return None
+        return pick(row, DETAIL_COLUMNS + ['sprites'] if full_sprites else DETAIL_COLUMNS)
+    
+    async def list_catalog(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        ids = sorted(self.store.pokemon)[offset:offset + limit]
+        return [pick(self.store.pokemon[pokemon_id], CATALOG_COLUMNS) for pokemon_id in ids]
+    
+    async def find_pokemon(self, filters: PokemonFilters) -> List[Dict[str, Any]]:
+        return [
+            pick(row, CATALOG_COLUMNS)
+            for _, row in sorted(self.store.pokemon.items())
+            if filters.matches(row)
+        ]
+    
+    async def list_types(self) -> List[str]:
+        types_set = set()
+        for row in self.store.pokemon.values():
+            types_set.update(row['types'])
+        return sorted(types_set)
+    
+    async def list_regions(self) -> List[str]:
+        return sorted({row['region'] for row in self.store.pokemon.values() if row.get('region')})
+    
+    async def list_habitats(self, region: Optional[str] = None) -> List[str]:
+        return sorted({
+            row['habitat'] for row in self.store.pokemon.values()
+            if row.get('habitat') and (not region or row.get('region') == region.lower())
+        })
+    
+    async def list_stats_totals(self, filters: PokemonFilters) -> List[int]:
+        return [row['stats_total'] for row in self.store.pokemon.values() if filters.matches(row)]
+    
+    async def count_pokemon(self) -> int:
+        return len(self.store.pokemon)
+    
+    async def upsert_pokemon(self, rows: List[Dict[str, Any]]) -> int:
+        for row in rows:
+            self.store.pokemon[row['id']] = copy.deepcopy(row)
+        return len(rows)
+
+class MemoryTrainerRepository(TrainerRepository):
+    """trainers and refresh_tokens tables in memory"""
+    
+    def __init__(self, store: MemoryStore):
+        self.store = store
+    
+    async def get_trainer(self, trainer_id: str) -> Optional[Dict[str, Any]]:
+        trainer = self.store.trainers.get(trainer_id)
+        return dict(trainer) if trainer else None
+    
+    async def create_trainer(self, trainer: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if trainer['trainer_id'] in self.store.trainers:
+            raise ValueError(f"Trainer {trainer['trainer_id']} already exists")
+        row = {'level': 1, 'experience': 0, 'collection_version': 0, 'created_at': now_iso()}
+        row.update(trainer)
+        self.store.trainers[row['trainer_id']] = row
+        return dict(row)
+    
+    async def update_trainer(self, trainer_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        trainer = self.store.trainers.get(trainer_id)
+        if trainer is None:
+            return None
+        trainer.update(fields)
+        return dict(trainer)
+    
+    async def create_refresh_token(self, token: Dict[str, Any]):
+        row = {'revoked_at': None, 'created_at': now_iso()}
+        row.update(token)
+        self.store.refresh_tokens[row['token_hash']] = row
+    
+    async def get_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        token = self.store.refresh_tokens.get(token_hash)
+        return dict(token) if token else None
+    
+    async def revoke_refresh_token(self, token_hash: str, revoked_at: str) -> Optional[Dict[str, Any]]:
+        token = self.store.refresh_tokens.get(token_hash)
+        if token is None or token['revoked_at'] is not None:
+            return None
+        token['revoked_at'] = revoked_at
+        return dict(token)
+    
+    async def revoke_refresh_token_family(self, family_id: str, revoked_at: str):
+        for token in self.store.refresh_tokens.values():
+            if token['family_id'] == family_id and token['revoked_at'] is None:
+                token['revoked_at'] = revoked_at
+
+class MemoryCaptureRepository(CaptureRepository):
+    """captured_pokemon table and collection change log in memory"""
+    
+    def __init__(self, store: MemoryStore):
+        self.store = store
+    
+    async def add_captures(
+        self,
+        trainer_id: str,
+        pokemon_ids: List[int],
+        nickname: Optional[str] = None
+    ) -> List[int]:
+        captured = self.store.captures.setdefault(trainer_id, {})
+        inserted = []
+        for pokemon_id in pokemon_ids:
+            if pokemon_id in captured:
+                continue
+            captured[pokemon_id] = {
+                'id': next(self.store.capture_ids),
+                'trainer_id': trainer_id,
+                'pokemon_id': pokemon_id,
+                'nickname': nickname
+            }
+            self.store.record_event(trainer_id, pokemon_id, 'add')
+            inserted.append(pokemon_id)
+        return inserted
+    
+    async def remove_captures(self, trainer_id: str, pokemon_ids: List[int]) -> List[int]:
+        captured = self.store.captures.get(trainer_id, {})
+        removed = []
+        for pokemon_id in pokemon_ids:
+            if captured.pop(pokemon_id, None) is None:
+                continue
+            self.store.record_event(trainer_id, pokemon_id, 'remove')
+            removed.append(pokemon_id)
+        return removed
+    
+    async def get_capture(self, trainer_id: str, pokemon_id: int) -> Optional[Dict[str, Any]]:
+        capture = self.store.captures.get(trainer_id, {}).get(pokemon_id)
+        return dict(capture) if capture else None
+    
+    async def count_captures(self, trainer_id: str) -> int:
+        return len(self.store.captures.get(trainer_id, {}))
+    
+    async def list_captured_ids(self, trainer_id: str) -> List[int]:
+        return sorted(self.store.captures.get(trainer_id, {}))
+    
+    async def list_captures_after(self, trainer_id: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        rows = sorted(
+            (row for row in self.store.captures.get(trainer_id, {}).values() if row['id'] > after_id),
+            key=lambda row: row['id']
+        )
+        return [pick(row, ['id', 'pokemon_id', 'nickname']) for row in rows[:limit]]
+    
+    async def list_collection_events(
+        self,
+        trainer_id: str,
+        since_version: int,
+        until_version: int
+    ) -> List[Dict[str, Any]]:
+        return [
+            dict(event) for event in self.store.collection_events.get(trainer_id, [])
+            if since_version < event['version'] <= until_version
+        ]
+
+def create_memory_repositories(catalog: Optional[List[Dict[str, Any]]] = None) -> Repositories:
+    """Create in-memory repositories, optionally seeded with Pokemon rows"""
+    store = MemoryStore()
+    for row in catalog or []:
+        store.pokemon[row['id']] = copy.deepcopy(row)
+    return Repositories(
+        pokemon=MemoryPokemonRepository(store),
+        trainers=MemoryTrainerRepository(store),
+        captures=MemoryCaptureRepository(store)
+    )
@@ -0,0 +1,129 @@
+"""
+Catalog data for local repositories
+Either loads Pokemon rows exported from Supabase (a JSON list of pokemon
+table rows) or generates a deterministic synthetic catalog with the same
+shape, size and value ranges as the real one
+"""
+
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+TOTAL_POKEMON = 1025
+
+TYPES = [
+    'normal', 'fire', 'water', 'electric', 'grass', 'ice',
+    'fighting', 'poison', 'ground', 'flying', 'psychic',
+    'bug', 'rock', 'ghost', 'dragon', 'dark', 'steel', 'fairy'
+]
+
+HABITATS = [
+    'grassland', 'forest', 'waters-edge', 'sea', 'cave',
+    'mountain', 'rough-terrain', 'urban', 'rare'
+]
+
+# Last national dex number of each region
+REGION_BOUNDARIES = [
+    (151, 'kanto'), (251, 'johto'), (386, 'hoenn'), (493, 'sinnoh'), (649, 'unova'),
+    (721, 'kalos'), (809, 'alola'), (905, 'galar'), (1025, 'paldea')
+]
+
+# Game versions whose sprites are kept in the PokeAPI 'sprites' object
+SPRITE_VERSIONS = {
+    'generation-i': ['red-blue', 'yellow'],
+    'generation-ii': ['crystal', 'gold', 'silver'],
+    'generation-iii': ['emerald', 'firered-leafgreen', 'ruby-sapphire'],
+    'generation-iv': ['diamond-pearl', 'heartgold-soulsilver', 'platinum'],
+    'generation-v': ['black-white'],
+    'generation-vi': ['omegaruby-alphasapphire', 'x-y'],
+    'generation-vii': ['icons', 'ultra-sun-ultra-moon'],
+    'generation-viii': ['icons'],
+}
+
+SPRITE_BASE_URL = 'https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon'
+
+def region_for(pokemon_id: int) -> Optional[str]:
+    """Get the region a national dex number belongs to"""
+    for last_id, region in REGION_BOUNDARIES:
+        if pokemon_id <= last_id:
+            return region
+    return None
+
+def build_sprites(pokemon_id: int) -> Dict[str, Any]:
+    """Build a sprites object shaped like PokeAPI's"""
+    def sprite_set(path: str) -> Dict[str, Optional[str]]:
+        return {
+            'front_default': f'{SPRITE_BASE_URL}/{path}{pokemon_id}.png',
+            'front_shiny': f'{SPRITE_BASE_URL}/{path}shiny/{pokemon_id}.png',
+            'back_default': f'{SPRITE_BASE_URL}/{path}back/{pokemon_id}.png',
+            'back_shiny': f'{SPRITE_BASE_URL}/{path}back/shiny/{pokemon_id}.png',
+            'front_female': None,
+            'front_shiny_female': None,
+            'back_female': None,
+            'back_shiny_female': None,
+        }
+    
+    sprites = sprite_set('')
+    sprites['other'] = {
+        'dream_world': {'front_default': f'{SPRITE_BASE_URL}/other/dream-world/{pokemon_id}.svg', 'front_female': None},
+        'home': sprite_set('other/home/'),
+        'official-artwork': {
+            'front_default': f'{SPRITE_BASE_URL}/other/official-artwork/{pokemon_id}.png',
+            'front_shiny': f'{SPRITE_BASE_URL}/other/official-artwork/shiny/{pokemon_id}.png',
+        },
+        'showdown': sprite_set('other/showdown/'),
+    }
+    sprites['versions'] = {
+        generation: {
+            version: sprite_set(f'versions/{generation}/{version}/')
+            for version in versions
+        }
+        for generation, versions in SPRITE_VERSIONS.items()
+    }
+    return sprites
+
+def generate_catalog(count: int = TOTAL_POKEMON, seed: int = TOTAL_POKEMON) -> List[Dict[str, Any]]:
+    """Generate a deterministic synthetic catalog (same seed, same rows)"""
+    rng = random.Random(seed)
+    catalog = []
+    for pokemon_id in range(1, count + 1):
+        # Stat totals spread over every difficulty band (180 to ~780)
+        stats = [rng.randint(30, 130) for _ in range(6)]
+        if pokemon_id % 50 == 0:
+            stats = [stat + 25 for stat in stats]
+        types = rng.sample(TYPES, rng.choice([1, 2]))
+        sprites = build_sprites(pokemon_id)
+        
+        catalog.append({
+            'id': pokemon_id,
+            'name': f'pokemon-{pokemon_id:04d}',
+            'height': rng.randint(2, 200),
+            'weight': rng.randint(1, 9999),
+            'base_experience': rng.randint(36, 340),
+            'sprite_default': sprites['front_default'],
+            'sprite_official': sprites['other']['official-artwork']['front_default'],
+            'stats_hp': stats[0],
+            'stats_attack': stats[1],
+            'stats_defense': stats[2],
+            'stats_special_attack': stats[3],
+            'stats_special_defense': stats[4],
+            'stats_speed': stats[5],
+            'stats_total': sum(stats),
+            'types': types,
+            'abilities': json.dumps([
+                {'name': f'ability-{rng.randint(1, 300)}', 'is_hidden': False},
+                {'name': f'ability-{rng.randint(1, 300)}', 'is_hidden': True},
+            ]),
+            'sprites': json.dumps(sprites),
+            'description': f'Synthetic Pokemon number {pokemon_id} used for local testing.',
+            'region': region_for(pokemon_id),
+            'habitat': rng.choice(HABITATS) if pokemon_id <= 386 else None,
+        })
+    return catalog
+
+def load_catalog(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load catalog rows from a JSON file, or generate them if no path is given"""
+    if not path:
+        return generate_catalog()
+    with open(path) as f:
+        return json.load(f)
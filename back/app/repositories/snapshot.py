@@ -0,0 +1,234 @@
+"""
+Catalog snapshot: the catalog columns of the pokemon table in a compact file
+that every worker process memory-maps read-only, so the pages are shared
+through the OS page cache instead of each worker holding its own copy.
+
+Layout (little-endian):
+    header     magic, version, row count, row size, offsets and the column
+               list as JSON (a file written with other columns is rejected)
+    rows       one fixed-width record per Pokemon, ordered by ID: the integer
+               columns as int32 (INT_NULL for None), then the string and JSON
+               columns as (heap offset, length) pairs (offset REF_NULL for None)
+    heap       UTF-8 strings and JSON documents, each distinct value once
+
+Rows are decoded on demand and IDs are found by binary search, so a lookup
+touches a few pages and nothing is copied when the snapshot is opened.
+Snapshots are replaced atomically (written to a temporary file, then renamed
+over the old one); processes still mapping the old file keep reading it until
+they open the new one.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b'PKCATLG1'
+VERSION = 1
+
+# Column kinds: 'int' (int32), 'str' (heap string), 'json' (heap JSON)
+SNAPSHOT_COLUMNS = [
+    ('id', 'int'), ('name', 'str'), ('types', 'json'),
+    ('sprite_official', 'str'), ('sprite_default', 'str'),
+    ('height', 'int'), ('weight', 'int'), ('base_experience', 'int'),
+    ('stats_hp', 'int'), ('stats_attack', 'int'), ('stats_defense', 'int'),
+    ('stats_special_attack', 'int'), ('stats_special_defense', 'int'), ('stats_speed', 'int'),
+    ('stats_total', 'int'), ('region', 'str'), ('habitat', 'str'),
+]
+
+INT_NULL = -2 ** 31
+REF_NULL = 2 ** 32 - 1
+
+# magic, version, row count, row size, rows offset, heap offset, heap size, columns JSON size
+HEADER = struct.Struct('<8sIIIQQQI')
+
+def split_columns(columns) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Get the integer column names and the (name, kind) of the heap columns, in record order"""
+    int_names = [name for name, kind in columns if kind == 'int']
+    if not int_names or int_names[0] != 'id':
+        raise ValueError("'id' must be the first integer column")
+    return int_names, [(name, kind) for name, kind in columns if kind != 'int']
+
+def row_struct(columns) -> struct.Struct:
+    """Fixed-width record of a row: integers first (so 'id' is at offset 0), then heap references"""
+    int_names, heap_columns = split_columns(columns)
+    return struct.Struct('<' + 'i' * len(int_names) + 'II' * len(heap_columns))
+
+def write_snapshot(path: str, rows: Iterable[Dict[str, Any]], columns=SNAPSHOT_COLUMNS) -> int:
+    """
+    Write rows as a snapshot, atomically replacing any file at path
+    Returns the size of the file in bytes
+    """
+    record = row_struct(columns)
+    int_names, heap_columns = split_columns(columns)
+    heap = bytearray()
+    heap_refs: Dict[bytes, int] = {}
+    
+    def heap_ref(data: bytes):
+        offset = heap_refs.get(data)
+        if offset is None:
+            offset = heap_refs[data] = len(heap)
+            heap.extend(data)
+        return offset, len(data)
+    
+    records = bytearray()
+    count = 0
+    for row in sorted(rows, key=lambda row: row['id']):
+        values = [INT_NULL if row.get(name) is None else int(row[name]) for name in int_names]
+        for name, kind in heap_columns:
+            value = row.get(name)
+            if value is None:
+                values.extend((REF_NULL, 0))
+            elif kind == 'json':
+                values.extend(heap_ref(json.dumps(value, separators=(',', ':')).encode()))
+            else:
+                values.extend(heap_ref(str(value).encode()))
+        records.extend(record.pack(*values))
+        count += 1
+    
+    column_json = json.dumps(columns).encode()
+    rows_offset = HEADER.size + len(column_json)
+    rows_offset += -rows_offset % 8
+    heap_offset = rows_offset + len(records)
+    header = HEADER.pack(
+        MAGIC, VERSION, count, record.size, rows_offset, heap_offset, len(heap), len(column_json)
+    )
+    
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.catalog-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(column_json)
+            f.write(b'\0' * (rows_offset - HEADER.size - len(column_json)))
+            f.write(records)
+            f.write(heap)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file private to its owner
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return heap_offset + len(heap)
+
+class _Ids:
+    """Sequence view of the ID column, for bisect"""
+    
+    def __init__(self, snapshot: 'CatalogSnapshot'):
+        self.snapshot = snapshot
+    
+    def __len__(self):
+        return self.snapshot.count
+    
+    def __getitem__(self, index: int) -> int:
+        snapshot = self.snapshot
+        return struct.unpack_from('<i', snapshot._map, snapshot._rows_offset + index * snapshot._row_size)[0]
+
+class CatalogSnapshot(Mapping):
+    """Read-only mapping of Pokemon ID to catalog row over a memory-mapped snapshot"""
+    
+    def __init__(self, path: str, columns=SNAPSHOT_COLUMNS):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < HEADER.size:
+                raise ValueError(f"{path} is not a catalog snapshot")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        (magic, version, count, row_size, rows_offset,
+         heap_offset, heap_size, columns_size) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} catalog snapshot")
+        stored_columns = json.loads(self._map[HEADER.size:HEADER.size + columns_size])
+        if [tuple(column) for column in stored_columns] != [tuple(column) for column in columns]:
+            raise ValueError(f"{path} was written with other columns")
+        if heap_offset + heap_size > stat.st_size:
+            raise ValueError(f"{path} is truncated")
+        
+        self.path = path
+        self.count = count
+        # Identity of the file, to notice when it is replaced
+        self.inode = (stat.st_dev, stat.st_ino)
+        self.mtime = stat.st_mtime
+        self._int_names, self._heap_columns = split_columns(columns)
+        self._record = row_struct(columns)
+        self._row_size = row_size
+        self._rows_offset = rows_offset
+        self._heap_offset = heap_offset
+        self._ids = _Ids(self)
+        self._first_id = self._ids[0] if count else 0
+        # Decoded JSON values by heap offset (few distinct values, e.g. type combinations)
+        self._json_values: Dict[int, Any] = {}
+    
+    @staticmethod
+    def open(path: str) -> Optional['CatalogSnapshot']:
+        """Map a snapshot, or get None if there is no file at path"""
+        try:
+            return CatalogSnapshot(path)
+        except FileNotFoundError:
+            return None
+    
+    def _row(self, index: int) -> Dict[str, Any]:
+        values = self._record.unpack_from(self._map, self._rows_offset + index * self._row_size)
+        int_count = len(self._int_names)
+        row = dict(zip(self._int_names, values))
+        if INT_NULL in values[:int_count]:
+            for name in self._int_names:
+                if row[name] == INT_NULL:
+                    row[name] = None
+        
+        position = int_count
+        for name, kind in self._heap_columns:
+            offset, length = values[position], values[position + 1]
+            position += 2
+            if offset == REF_NULL:
+                row[name] = None
+                continue
+            start = self._heap_offset + offset
+            if kind == 'json':
+                value = self._json_values.get(offset)
+                if value is None:
+                    value = self._json_values[offset] = json.loads(self._map[start:start + length])
+                # Copied so callers can't change the cached value
+                row[name] = value.copy() if isinstance(value, (list, dict)) else value
+            else:
+                row[name] = self._map[start:start + length].decode()
+        return row
+    
+    def _index(self, pokemon_id: int) -> Optional[int]:
+        # IDs are usually contiguous, so try the row at the ID's position first
+        index = pokemon_id - self._first_id
+        if 0 <= index < self.count and self._ids[index] == pokemon_id:
+            return index
+        index = bisect.bisect_left(self._ids, pokemon_id)
+        if index < self.count and self._ids[index] == pokemon_id:
+            return index
+        return None
+    
+    def __getitem__(self, pokemon_id: int) -> Dict[str, Any]:
+        index = self._index(pokemon_id) if isinstance(pokemon_id, int) else None
+        if index is None:
+            raise KeyError(pokemon_id)
+        return self._row(index)
+    
+    def __contains__(self, pokemon_id) -> bool:
+        return isinstance(pokemon_id, int) and self._index(pokemon_id) is not None
+    
+    def __iter__(self) -> Iterator[int]:
+        return (self._ids[index] for index in range(self.count))
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def items(self):
+        """(ID, row) pairs in ID order, decoding each row once"""
+        return [(row['id'], row) for row in self.rows()]
+    
+    def rows(self) -> List[Dict[str, Any]]:
+        """Decode every row, in ID order"""
+        return [self._row(index) for index in range(self.count)]
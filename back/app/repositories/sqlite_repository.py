@@ -0,0 +1,443 @@
+"""
+SQLite implementation of the repositories
+Mirrors the Supabase schema in a local file, so the API can run (and be
+benchmarked) without network access. JSON columns are stored as text.
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.repositories.base import (
+    CATALOG_COLUMNS,
+    DETAIL_COLUMNS,
+    SORTABLE_COLUMNS,
+    CaptureRepository,
+    PokemonFilters,
+    PokemonRepository,
+    Repositories,
+    TrainerRepository
+)
+from app.utils.bulkhead import current_bulkhead
+from app.utils.tracing import count_request
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pokemon (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    height INTEGER,
+    weight INTEGER,
+    base_experience INTEGER,
+    sprite_default TEXT,
+    sprite_official TEXT,
+    stats_hp INTEGER,
+    stats_attack INTEGER,
+    stats_defense INTEGER,
+    stats_special_attack INTEGER,
+    stats_special_defense INTEGER,
+    stats_speed INTEGER,
+    stats_total INTEGER,
+    types TEXT NOT NULL DEFAULT '[]',
+    abilities TEXT,
+    sprites TEXT,
+    description TEXT,
+    region TEXT,
+    habitat TEXT
+);
+CREATE TABLE IF NOT EXISTS trainers (
+    trainer_id TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    level INTEGER NOT NULL DEFAULT 1,
+    experience INTEGER NOT NULL DEFAULT 0,
+    collection_version INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE TABLE IF NOT EXISTS captured_pokemon (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    trainer_id TEXT NOT NULL REFERENCES trainers(trainer_id) ON DELETE CASCADE,
+    pokemon_id INTEGER NOT NULL REFERENCES pokemon(id),
+    nickname TEXT,
+    captured_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    UNIQUE (trainer_id, pokemon_id)
+);
+CREATE TABLE IF NOT EXISTS collection_events (
+    trainer_id TEXT NOT NULL REFERENCES trainers(trainer_id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    pokemon_id INTEGER NOT NULL,
+    action TEXT NOT NULL CHECK (action IN ('add', 'remove')),
+    PRIMARY KEY (trainer_id, version)
+);
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    token_hash TEXT PRIMARY KEY,
+    trainer_id TEXT NOT NULL REFERENCES trainers(trainer_id) ON DELETE CASCADE,
+    family_id TEXT NOT NULL,
+    expires_at TEXT NOT NULL,
+    revoked_at TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE INDEX IF NOT EXISTS refresh_tokens_family_id_idx ON refresh_tokens (family_id);
+
+-- Same behaviour as the trigger in sql/002_collection_versions.sql
+CREATE TRIGGER IF NOT EXISTS captured_pokemon_added AFTER INSERT ON captured_pokemon
+BEGIN
+    UPDATE trainers SET collection_version = collection_version + 1 WHERE trainer_id = NEW.trainer_id;
+    INSERT INTO collection_events (trainer_id, version, pokemon_id, action)
+        SELECT trainer_id, collection_version, NEW.pokemon_id, 'add'
+        FROM trainers WHERE trainer_id = NEW.trainer_id;
+END;
+CREATE TRIGGER IF NOT EXISTS captured_pokemon_removed AFTER DELETE ON captured_pokemon
+BEGIN
+    UPDATE trainers SET collection_version = collection_version + 1 WHERE trainer_id = OLD.trainer_id;
+    INSERT INTO collection_events (trainer_id, version, pokemon_id, action)
+        SELECT trainer_id, collection_version, OLD.pokemon_id, 'remove'
+        FROM trainers WHERE trainer_id = OLD.trainer_id;
+END;
+"""
+
+# Columns holding JSON text
+JSON_COLUMNS = ['types', 'abilities', 'sprites']
+
+# JSON columns decoded when read (the sprites blob is returned as stored)
+DECODED_COLUMNS = ['types', 'abilities']
+
+LIST_COLUMNS = ['id', 'name', 'types', 'sprite_official', 'sprite_default', 'height', 'weight', 'stats_total']
+
+def is_datastore_failure(error: Exception) -> bool:
+    """Tell SQLite failures (locked database, disk errors) from errors of the request (constraints)"""
+    return isinstance(error, sqlite3.OperationalError)
+
+class SQLiteDatabase:
+    """A SQLite connection shared by the repositories, used by one thread at a time"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.execute('PRAGMA foreign_keys = ON')
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+    
+    def _run(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._lock:
+            return func(self._connection)
+    
+    async def run(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run func(connection) in the current bulkhead's threads"""
+        count_request()
+        return await current_bulkhead().run_sync(self._run, func)
+    
+    async def transaction(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run func(connection) in a bulkhead thread inside a transaction"""
+        def run_transaction(connection: sqlite3.Connection):
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(connection)
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+            return result
+        return await self.run(run_transaction)
+    
+    async def fetch_all(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        """Run a query and return its rows as dicts with JSON columns decoded"""
+        rows = await self.run(lambda connection: connection.execute(sql, params).fetchall())
+        return [decode_row(row) for row in rows]
+    
+    async def fetch_one(self, sql: str, params: Tuple = ()) -> Optional[Dict[str, Any]]:
+        """Run a query and return its first row (or None)"""
+        rows = await self.fetch_all(sql, params)
+        return rows[0] if rows else None
+
+def decode_row(row: sqlite3.Row) -> Dict[str, Any]:
+    """Convert a sqlite3.Row to a dict, decoding JSON columns"""
+    data = dict(row)
+    for column in DECODED_COLUMNS:
+        if isinstance(data.get(column), str):
+            data[column] = json.loads(data[column])
+    return data
+
+def write_pokemon(connection: sqlite3.Connection, rows: List[Dict[str, Any]]) -> int:
+    """Insert or replace Pokemon rows, encoding JSON columns"""
+    for row in rows:
+        data = dict(row)
+        for column in JSON_COLUMNS:
+            if data.get(column) is not None and not isinstance(data[column], str):
+                data[column] = json.dumps(data[column])
+        columns = ', '.join(data)
+        placeholders = ', '.join('?' for _ in data)
+        connection.execute(
+            f'INSERT OR REPLACE INTO pokemon ({columns}) VALUES ({placeholders})',
+            list(data.values())
+        )
+    return len(rows)
+
+def filters_sql(filters: PokemonFilters, table: str = 'pokemon') -> Tuple[str, List[Any]]:
+    """Build a WHERE clause (without the keyword) for PokemonFilters"""
+    clauses = ['1 = 1']
+    params: List[Any] = []
+    for pokemon_type in filters.types:
+        clauses.append(f'EXISTS (SELECT 1 FROM json_each({table}.types) WHERE value = ?)')
+        params.append(pokemon_type)
+    if filters.region:
+        clauses.append(f'{table}.region = ?')
+        params.append(filters.region)
+    if filters.habitat:
+        clauses.append(f'{table}.habitat = ?')
+        params.append(filters.habitat)
+    if filters.min_stats is not None:
+        clauses.append(f'{table}.stats_total >= ?')
+        params.append(filters.min_stats)
+    if filters.max_stats is not None:
+        clauses.append(f'{table}.stats_total <= ?')
+        params.append(filters.max_stats)
+    return ' AND '.join(clauses), params
+
+class SQLitePokemonRepository(PokemonRepository):
+    """pokemon table in SQLite"""
+    
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+    
+    async def list_pokemon(
+        self,
+        filters: PokemonFilters,
+        sort_by: str,
+        descending: bool,
+        offset: int,
+        limit: int,
+        trainer_id: Optional[str] = None,
+        captured_only: bool = False
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        if sort_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Invalid sort column: {sort_by}")
+        
+        where, params = filters_sql(filters, 'p')
+        join = 'JOIN' if captured_only else 'LEFT JOIN'
+        from_sql = (
+            f'FROM pokemon p {join} captured_pokemon c '
+            f'ON c.pokemon_id = p.id AND c.trainer_id = ? WHERE {where}'
+        )
+        params = [trainer_id] + params
+        direction = 'DESC' if descending else 'ASC'
+        columns = ', '.join(f'p.{column}' for column in LIST_COLUMNS)
+        
+        def query(connection: sqlite3.Connection):
+            total = connection.execute(f'SELECT COUNT(*) {from_sql}', params).fetchone()[0]
+            rows = connection.execute(
+                f'SELECT {columns}, c.id IS NOT NULL AS is_captured {from_sql} '
+                f'ORDER BY p.{sort_by} {direction}, p.id {direction} LIMIT ? OFFSET ?',
+                params + [limit, offset]
+            ).fetchall()
+            return rows, total
+        
+        rows, total = await self.db.run(query)
+        result = []
+        for row in rows:
+            data = decode_row(row)
+            data['is_captured'] = bool(data['is_captured'])
+            result.append(data)
+        return result, total
+    
+    async def get_pokemon(self, pokemon_id: int, full_sprites: bool = False) -> Optional[Dict[str, Any]]:
+        columns = DETAIL_COLUMNS + ['sprites'] if full_sprites else DETAIL_COLUMNS
+        return await self.db.fetch_one(f'SELECT {", ".join(columns)} FROM pokemon WHERE id = ?', (pokemon_id,))
+    
+    async def list_catalog(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        return await self.db.fetch_all(
+            f'SELECT {", ".join(CATALOG_COLUMNS)} FROM pokemon ORDER BY id LIMIT ? OFFSET ?',
+            (limit, offset)
+        )
+    
+    async def find_pokemon(self, filters: PokemonFilters) -> List[Dict[str, Any]]:
+        where, params = filters_sql(filters)
+        return await self.db.fetch_all(
+            f'SELECT {", ".join(CATALOG_COLUMNS)} FROM pokemon WHERE {where} ORDER BY id',
+            tuple(params)
+        )
+    
+    async def list_types(self) -> List[str]:
+        rows = await self.db.fetch_all(
+            'SELECT DISTINCT value AS type FROM pokemon, json_each(pokemon.types) ORDER BY value'
+        )
+        return [row['type'] for row in rows]
+    
+    async def list_regions(self) -> List[str]:
+        rows = await self.db.fetch_all(
+            'SELECT DISTINCT region FROM pokemon WHERE region IS NOT NULL ORDER BY region'
+        )
+        return [row['region'] for row in rows]
+    
+    async def list_habitats(self, region: Optional[str] = None) -> List[str]:
+        sql = 'SELECT DISTINCT habitat FROM pokemon WHERE habitat IS NOT NULL'
+        params: Tuple = ()
+        if region:
+            sql += ' AND region = ?'
+            params = (region.lower(),)
+        rows = await self.db.fetch_all(sql + ' ORDER BY habitat', params)
+        return [row['habitat'] for row in rows]
+    
+    async def list_stats_totals(self, filters: PokemonFilters) -> List[int]:
+        where, params = filters_sql(filters)
+        rows = await self.db.fetch_all(f'SELECT stats_total FROM pokemon WHERE {where}', tuple(params))
+        return [row['stats_total'] for row in rows]
+    
+    async def count_pokemon(self) -> int:
+        row = await self.db.fetch_one('SELECT COUNT(*) AS total FROM pokemon')
+        return row['total']
+    
+    async def upsert_pokemon(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        return await self.db.transaction(lambda connection: write_pokemon(connection, rows))
+
+class SQLiteTrainerRepository(TrainerRepository):
+    """trainers and refresh_tokens tables in SQLite"""
+    
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+    
+    async def get_trainer(self, trainer_id: str) -> Optional[Dict[str, Any]]:
+        return await self.db.fetch_one('SELECT * FROM trainers WHERE trainer_id = ?', (trainer_id,))
+    
+    async def create_trainer(self, trainer: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        columns = ', '.join(trainer)
+        placeholders = ', '.join('?' for _ in trainer)
+        return await self.db.fetch_one(
+            f'INSERT INTO trainers ({columns}) VALUES ({placeholders}) RETURNING *',
+            tuple(trainer.values())
+        )
+    
+    async def update_trainer(self, trainer_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        assignments = ', '.join(f'{column} = ?' for column in fields)
+        return await self.db.fetch_one(
+            f'UPDATE trainers SET {assignments} WHERE trainer_id = ? RETURNING *',
+            tuple(fields.values()) + (trainer_id,)
+        )
+    
+    async def create_refresh_token(self, token: Dict[str, Any]):
+        columns = ', '.join(token)
+        placeholders = ', '.join('?' for _ in token)
+        await self.db.run(
+            lambda connection: connection.execute(
+                f'INSERT INTO refresh_tokens ({columns}) VALUES ({placeholders})',
+                tuple(token.values())
+            )
+        )
+    
+    async def get_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        return await self.db.fetch_one('SELECT * FROM refresh_tokens WHERE token_hash = ?', (token_hash,))
+    
+    async def revoke_refresh_token(self, token_hash: str, revoked_at: str) -> Optional[Dict[str, Any]]:
+        return await self.db.fetch_one(
+            'UPDATE refresh_tokens SET revoked_at = ? '
+            'WHERE token_hash = ? AND revoked_at IS NULL RETURNING *',
+            (revoked_at, token_hash)
+        )
+    
+    async def revoke_refresh_token_family(self, family_id: str, revoked_at: str):
+        await self.db.run(
+            lambda connection: connection.execute(
+                'UPDATE refresh_tokens SET revoked_at = ? WHERE family_id = ? AND revoked_at IS NULL',
+                (revoked_at, family_id)
+            )
+        )
+
+class SQLiteCaptureRepository(CaptureRepository):
+    """captured_pokemon and collection_events tables in SQLite"""
+    
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+    
+    async def add_captures(
+        self,
+        trainer_id: str,
+        pokemon_ids: List[int],
+        nickname: Optional[str] = None
+    ) -> List[int]:
+        if not pokemon_ids:
+            return []
+        
+        def insert(connection: sqlite3.Connection):
+            inserted = []
+            for pokemon_id in pokemon_ids:
+                cursor = connection.execute(
+                    'INSERT OR IGNORE INTO captured_pokemon (trainer_id, pokemon_id, nickname) VALUES (?, ?, ?)',
+                    (trainer_id, pokemon_id, nickname)
+                )
+                if cursor.rowcount:
+                    inserted.append(pokemon_id)
+            return inserted
+        
+        return await self.db.transaction(insert)
+    
+    async def remove_captures(self, trainer_id: str, pokemon_ids: List[int]) -> List[int]:
+        if not pokemon_ids:
+            return []
+        placeholders = ', '.join('?' for _ in pokemon_ids)
+        rows = await self.db.fetch_all(
+            f'DELETE FROM captured_pokemon WHERE trainer_id = ? AND pokemon_id IN ({placeholders}) '
+            'RETURNING pokemon_id',
+            (trainer_id, *pokemon_ids)
+        )
+        return [row['pokemon_id'] for row in rows]
+    
+    async def get_capture(self, trainer_id: str, pokemon_id: int) -> Optional[Dict[str, Any]]:
+        return await self.db.fetch_one(
+            'SELECT * FROM captured_pokemon WHERE trainer_id = ? AND pokemon_id = ?',
+            (trainer_id, pokemon_id)
+        )
+    
+    async def count_captures(self, trainer_id: str) -> int:
+        row = await self.db.fetch_one(
+            'SELECT COUNT(*) AS total FROM captured_pokemon WHERE trainer_id = ?', (trainer_id,)
+        )
+        return row['total']
+    
+    async def list_captured_ids(self, trainer_id: str) -> List[int]:
+        rows = await self.db.fetch_all(
+            'SELECT pokemon_id FROM captured_pokemon WHERE trainer_id = ? ORDER BY pokemon_id', (trainer_id,)
+        )
+        return [row['pokemon_id'] for row in rows]
+    
+    async def list_captures_after(self, trainer_id: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        return await self.db.fetch_all(
+            'SELECT id, pokemon_id, nickname FROM captured_pokemon '
+            'WHERE trainer_id = ? AND id > ? ORDER BY id LIMIT ?',
+            (trainer_id, after_id, limit)
+        )
+    
+    async def list_collection_events(
+        self,
+        trainer_id: str,
+        since_version: int,
+        until_version: int
+    ) -> List[Dict[str, Any]]:
+        return await self.db.fetch_all(
+            'SELECT version, pokemon_id, action FROM collection_events '
+            'WHERE trainer_id = ? AND version > ? AND version <= ? ORDER BY version',
+            (trainer_id, since_version, until_version)
+        )
+
+def create_sqlite_repositories(
+    path: str,
+    load_catalog: Optional[Callable[[], List[Dict[str, Any]]]] = None
+) -> Repositories:
+    """
+    Create repositories backed by a SQLite file (created if missing)
+    If the pokemon table is empty it is filled with load_catalog()
+    """
+    db = SQLiteDatabase(path)
+    if load_catalog is not None:
+        def seed(connection: sqlite3.Connection):
+            if connection.execute('SELECT COUNT(*) FROM pokemon').fetchone()[0] == 0:
+                connection.execute('BEGIN IMMEDIATE')
+                write_pokemon(connection, load_catalog())
+                connection.execute('COMMIT')
+        db._run(seed)
+    return Repositories(
+        pokemon=SQLitePokemonRepository(db),
+        trainers=SQLiteTrainerRepository(db),
+        captures=SQLiteCaptureRepository(db)
+    )
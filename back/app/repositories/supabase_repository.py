@@ -0,0 +1,310 @@
+"""
+Supabase (PostgREST) implementation of the repositories
+The supabase client is synchronous, so queries run in the threads of the
+request's bulkhead instead of blocking the event loop
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from postgrest import SyncPostgrestClient
+from postgrest.exceptions import APIError
+from app.database import get_supabase
+from app.repositories.base import (
+    CATALOG_COLUMNS,
+    DETAIL_COLUMNS,
+    CaptureRepository,
+    PokemonFilters,
+    PokemonRepository,
+    Repositories,
+    TrainerRepository
+)
+from app.utils.bulkhead import current_bulkhead
+from app.utils.tracing import count_request
+
+# PostgREST returns at most 1000 rows per request
+PAGE_SIZE = 1000
+
+# Error codes of the database or PostgREST failing, not the request: PostgreSQL
+# connection (08), resources (53), shutdown or statement timeout (57), system (58)
+# and internal (XX) errors, and PostgREST's connection and pool errors
+SERVER_ERROR_CODES = ('08', '53', '57', '58', 'XX', 'PGRST000', 'PGRST001', 'PGRST002', 'PGRST003')
+
+# PostgREST client of the process, built by create_supabase_repositories
+_rest: Optional[SyncPostgrestClient] = None
+
+def table(name: str):
+    """Start a query on a table (runs on the event loop, so it must not build the client)"""
+    if _rest is None:
+        raise RuntimeError("The Supabase client is not built yet, create the repositories first")
+    return _rest.from_(name)
+
+async def execute(query):
+    """Run a query builder in the current bulkhead's threads"""
+    count_request()
+    return await current_bulkhead().run_sync(query.execute)
+
+async def fetch_all(build_query) -> List[Dict[str, Any]]:
+    """Fetch every row of a query, page by page (build_query must order the rows)"""
+    rows = []
+    offset = 0
+    while True:
+        response = await execute(build_query().range(offset, offset + PAGE_SIZE - 1))
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+def is_datastore_failure(error: Exception) -> bool:
+    """Tell Supabase failures (network, timeouts, server errors) from errors of the request"""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, APIError):
+        code = str(error.code or '')
+        # Responses without a JSON error (e.g. a 502 from the gateway) carry the HTTP status
+        if len(code) == 3 and code.isdigit():
+            return int(code) >= 500
+        return code.startswith(SERVER_ERROR_CODES)
+    return False
+
+def apply_filters(query, filters: PokemonFilters):
+    """Apply PokemonFilters to a pokemon table query"""
+    # Type filters use AND logic - Pokemon must have ALL specified types
+    for pokemon_type in filters.types:
+        query = query.contains('types', [pokemon_type])
+    if filters.region:
+        query = query.eq('region', filters.region)
+    if filters.habitat:
+        query = query.eq('habitat', filters.habitat)
+    if filters.min_stats is not None:
+        query = query.gte('stats_total', filters.min_stats)
+    if filters.max_stats is not None:
+        query = query.lte('stats_total', filters.max_stats)
+    return query
+
+class SupabasePokemonRepository(PokemonRepository):
+    """pokemon table in Supabase"""
+    
+    async def list_pokemon(
+        self,
+        filters: PokemonFilters,
+        sort_by: str,
+        descending: bool,
+        offset: int,
+        limit: int,
+        trainer_id: Optional[str] = None,
+        captured_only: bool = False
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        # The captured_pokemon embed is filtered to the current trainer so each
+        # row carries its own captured flag, and becomes an inner join
+        # (semi-join) when only captured Pokemon are wanted. Either way the
+        # filter runs in the database in a single round trip, regardless of
+        # how many Pokemon the trainer owns.
+        columns = 'id, name, types, sprite_official, sprite_default, height, weight, stats_total'
+        if trainer_id:
+            embed = 'captured_pokemon!inner' if captured_only else 'captured_pokemon'
+            columns = f'{columns}, {embed}(pokemon_id)'
+        
+        query = table('pokemon').select(columns, count='exact')
+        if trainer_id:
+            query = query.eq('captured_pokemon.trainer_id', trainer_id)
+        
+        query = apply_filters(query, filters)
+        query = query.order(sort_by, desc=descending).range(offset, offset + limit - 1)
+        
+        response = await execute(query)
+        
+        rows = response.data or []
+        for row in rows:
+            row['is_captured'] = bool(row.pop('captured_pokemon', None))
+        
+        total = response.count if response.count is not None else 0
+        return rows, total
+    
+    async def get_pokemon(self, pokemon_id: int, full_sprites: bool = False) -> Optional[Dict[str, Any]]:
+        columns = DETAIL_COLUMNS + ['sprites'] if full_sprites else DETAIL_COLUMNS
+        response = await execute(table('pokemon').select(', '.join(columns)).eq('id', pokemon_id))
+        return response.data[0] if response.data else None
+    
+    async def list_catalog(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        response = await execute(
+            table('pokemon').select(', '.join(CATALOG_COLUMNS)).order('id').range(offset, offset + limit - 1)
+        )
+        return response.data or []
+    
+    async def find_pokemon(self, filters: PokemonFilters) -> List[Dict[str, Any]]:
+        return await fetch_all(
+            lambda: apply_filters(table('pokemon').select(', '.join(CATALOG_COLUMNS)), filters).order('id')
+        )
+    
+    async def list_types(self) -> List[str]:
+        rows = await fetch_all(lambda: table('pokemon').select('types').order('id'))
+        types_set = set()
+        for row in rows:
+            types_set.update(row['types'])
+        return sorted(types_set)
+    
+    async def list_regions(self) -> List[str]:
+        rows = await fetch_all(
+            lambda: table('pokemon').select('region').not_.is_('region', 'null').order('id')
+        )
+        return sorted({row['region'] for row in rows if row['region']})
+    
+    async def list_habitats(self, region: Optional[str] = None) -> List[str]:
+        def build_query():
+            query = table('pokemon').select('habitat').not_.is_('habitat', 'null')
+            if region:
+                query = query.eq('region', region.lower())
+            return query.order('id')
+        
+        rows = await fetch_all(build_query)
+        return sorted({row['habitat'] for row in rows if row['habitat']})
+    
+    async def list_stats_totals(self, filters: PokemonFilters) -> List[int]:
+        rows = await fetch_all(
+            lambda: apply_filters(table('pokemon').select('stats_total'), filters).order('id')
+        )
+        return [row['stats_total'] for row in rows]
+    
+    async def count_pokemon(self) -> int:
+        response = await execute(table('pokemon').select('id', count='exact').limit(1))
+        return response.count or 0
+    
+    async def upsert_pokemon(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        await execute(table('pokemon').upsert(rows))
+        return len(rows)
+
+class SupabaseTrainerRepository(TrainerRepository):
+    """trainers and refresh_tokens tables in Supabase"""
+    
+    async def get_trainer(self, trainer_id: str) -> Optional[Dict[str, Any]]:
+        response = await execute(table('trainers').select('*').eq('trainer_id', trainer_id))
+        return response.data[0] if response.data else None
+    
+    async def create_trainer(self, trainer: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        response = await execute(table('trainers').insert(trainer))
+        return response.data[0] if response.data else None
+    
+    async def update_trainer(self, trainer_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        response = await execute(table('trainers').update(fields).eq('trainer_id', trainer_id))
+        return response.data[0] if response.data else None
+    
+    async def create_refresh_token(self, token: Dict[str, Any]):
+        await execute(table('refresh_tokens').insert(token))
+    
+    async def get_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        response = await execute(table('refresh_tokens').select('*').eq('token_hash', token_hash))
+        return response.data[0] if response.data else None
+    
+    async def revoke_refresh_token(self, token_hash: str, revoked_at: str) -> Optional[Dict[str, Any]]:
+        response = await execute(
+            table('refresh_tokens').update({'revoked_at': revoked_at}).eq(
+                'token_hash', token_hash
+            ).is_('revoked_at', 'null')
+        )
+        return response.data[0] if response.data else None
+    
+    async def revoke_refresh_token_family(self, family_id: str, revoked_at: str):
+        await execute(
+            table('refresh_tokens').update({'revoked_at': revoked_at}).eq(
+                'family_id', family_id
+            ).is_('revoked_at', 'null')
+        )
+
+class SupabaseCaptureRepository(CaptureRepository):
+    """
+    captured_pokemon and collection_events tables in Supabase
+    Versions and events are written by the trigger in sql/002_collection_versions.sql
+    """
+    
+    async def add_captures(
+        self,
+        trainer_id: str,
+        pokemon_ids: List[int],
+        nickname: Optional[str] = None
+    ) -> List[int]:
+        if not pokemon_ids:
+            return []
+        rows = [
+            {'trainer_id': trainer_id, 'pokemon_id': pokemon_id, 'nickname': nickname}
+            for pokemon_id in pokemon_ids
+        ]
+        # ON CONFLICT DO NOTHING only returns the rows actually inserted
+        response = await execute(
+            table('captured_pokemon').upsert(
+                rows,
+                on_conflict='trainer_id,pokemon_id',
+                ignore_duplicates=True
+            )
+        )
+        return [row['pokemon_id'] for row in (response.data or [])]
+    
+    async def remove_captures(self, trainer_id: str, pokemon_ids: List[int]) -> List[int]:
+        if not pokemon_ids:
+            return []
+        response = await execute(
+            table('captured_pokemon').delete().eq(
+                'trainer_id', trainer_id
+            ).in_('pokemon_id', pokemon_ids)
+        )
+        return [row['pokemon_id'] for row in (response.data or [])]
+    
+    async def get_capture(self, trainer_id: str, pokemon_id: int) -> Optional[Dict[str, Any]]:
+        response = await execute(
+            table('captured_pokemon').select('*').eq(
+                'trainer_id', trainer_id
+            ).eq('pokemon_id', pokemon_id)
+        )
+        return response.data[0] if response.data else None
+    
+    async def count_captures(self, trainer_id: str) -> int:
+        response = await execute(
+            table('captured_pokemon').select(
+                'pokemon_id', count='exact'
+            ).eq('trainer_id', trainer_id).limit(1)
+        )
+        return response.count or 0
+    
+    async def list_captured_ids(self, trainer_id: str) -> List[int]:
+        rows = await fetch_all(
+            lambda: table('captured_pokemon').select('pokemon_id').eq(
+                'trainer_id', trainer_id
+            ).order('pokemon_id')
+        )
+        return [row['pokemon_id'] for row in rows]
+    
+    async def list_captures_after(self, trainer_id: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        response = await execute(
+            table('captured_pokemon').select('id, pokemon_id, nickname').eq(
+                'trainer_id', trainer_id
+            ).gt('id', after_id).order('id').limit(limit)
+        )
+        return response.data or []
+    
+    async def list_collection_events(
+        self,
+        trainer_id: str,
+        since_version: int,
+        until_version: int
+    ) -> List[Dict[str, Any]]:
+        return await fetch_all(
+            lambda: table('collection_events').select('version, pokemon_id, action').eq(
+                'trainer_id', trainer_id
+            ).gt('version', since_version).lte('version', until_version).order('version')
+        )
+
+def create_supabase_repositories() -> Repositories:
+    """
+    Create repositories backed by Supabase
+    Builds the client and its PostgREST client (both created lazily by supabase-py),
+    so call it off the event loop
+    """
+    global _rest
+    _rest = get_supabase().postgrest
+    return Repositories(
+        pokemon=SupabasePokemonRepository(),
+        trainers=SupabaseTrainerRepository(),
+        captures=SupabaseCaptureRepository()
+    )
@@ -1,33 +1,39 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from datetime import timedelta
-from app.models.user import UserCreate, UserLogin, Token, User, UserStats
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from app.models.user import UserCreate, UserLogin, Token, User, UserStats, RefreshRequest
 from app.utils.auth import (
     get_password_hash, 
-    verify_password, 
-    create_access_token,
-    get_current_user
+    verify_and_update_password, 
+    get_current_user,
+    oauth2_scheme,
+    revoke_access_token
 )
-from app.database import supabase
-from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.utils.rate_limit import enforce_login_rate_limit, get_client_ip
+from app.utils.bulkhead import use_bulkhead
+from app.repositories.base import Repositories
+from app.repositories.factory import get_repositories
 from app.services.experience_service import ExperienceService
+from app.services.session_service import SessionService
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], dependencies=[Depends(use_bulkhead("auth"))])
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate):
+async def register(
+    user: UserCreate,
+    request: Request,
+    repos: Repositories = Depends(get_repositories)
+):
     """Register a new user/trainer"""
+    await enforce_login_rate_limit(get_client_ip(request), user.trainer_id)
     try:
         # Check if trainer_id already exists
-        response = supabase.table("trainers").select("trainer_id").eq("trainer_id", user.trainer_id).execute()
-        
-        if response.data:
+        if await repos.trainers.get_trainer(user.trainer_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Trainer ID already registered"
             )
         
         # Hash the password
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash(user.password)
         
         # Insert new user into database
         new_user = {
@@ -37,9 +43,9 @@ async def register(user: UserCreate):
             "experience": 0
         }
         
-        response = supabase.table("trainers").insert(new_user).execute()
+        created = await repos.trainers.create_trainer(new_user)
         
-        if not response.data:
+        if not created:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create user"
@@ -47,11 +53,11 @@ async def register(user: UserCreate):
         
         return User(
             trainer_id=user.trainer_id, 
-            created_at=response.data[0].get("created_at"),
+            created_at=created.get("created_at"),
             level=1,
             experience=0
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -61,38 +67,43 @@ async def register(user: UserCreate):
         )
 
 @router.post("/login", response_model=Token)
-async def login(user: UserLogin):
+async def login(
+    user: UserLogin,
+    request: Request,
+    repos: Repositories = Depends(get_repositories)
+):
     """Login and get access token"""
+    await enforce_login_rate_limit(get_client_ip(request), user.trainer_id)
     try:
         # Get user from database
-        response = supabase.table("trainers").select("*").eq("trainer_id", user.trainer_id).execute()
+        db_user = await repos.trainers.get_trainer(user.trainer_id)
         
-        if not response.data:
+        if db_user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect trainer ID or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        db_user = response.data[0]
-        
         # Verify password
-        if not verify_password(user.password, db_user["password"]):
+        is_valid, new_hash = await verify_and_update_password(user.password, db_user["password"])
+        if not is_valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect trainer ID or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Create access token
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user.trainer_id},
-            expires_delta=access_token_expires
-        )
-        
-        return Token(access_token=access_token, token_type="bearer")
+        # Store a rehashed password if the bcrypt cost was changed
+        if new_hash:
+            try:
+                await repos.trainers.update_trainer(user.trainer_id, {"password": new_hash})
+            except Exception as e:
+                print(f"Error rehashing password for {user.trainer_id}: {e}")
         
+        # Create access token and refresh token
+        return await SessionService.create_session_tokens(repos, user.trainer_id)
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -101,28 +112,48 @@ async def login(user: UserLogin):
             detail=f"Login failed: {str(e)}"
         )
 
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, repos: Repositories = Depends(get_repositories)):
+    """
+    Get a new access token using a refresh token
+    
+    The refresh token is single use: the response contains its replacement
+    """
+    return await SessionService.refresh_session(repos, request.refresh_token)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: RefreshRequest,
+    token: str = Depends(oauth2_scheme),
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
+):
+    """Revoke the current access token and its refresh token"""
+    await SessionService.revoke_session(repos, request.refresh_token, current_user)
+    await revoke_access_token(token)
+
 @router.get("/me", response_model=User)
-async def get_me(current_user: str = Depends(get_current_user)):
+async def get_me(
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
+):
     """Get current authenticated user information"""
     try:
-        response = supabase.table("trainers").select(
-            "trainer_id, created_at, level, experience"
-        ).eq("trainer_id", current_user).execute()
+        user_data = await repos.trainers.get_trainer(current_user)
         
-        if not response.data:
+        if user_data is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        user_data = response.data[0]
         return User(
             trainer_id=user_data["trainer_id"],
             created_at=user_data.get("created_at"),
             level=user_data.get("level", 1),
             experience=user_data.get("experience", 0)
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -132,7 +163,10 @@ async def get_me(current_user: str = Depends(get_current_user)):
         )
 
 @router.get("/stats", response_model=UserStats)
-async def get_stats(current_user: str = Depends(get_current_user)):
+async def get_stats(
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
+):
     """
     Get comprehensive user statistics
     
@@ -143,9 +177,9 @@ async def get_stats(current_user: str = Depends(get_current_user)):
     - XP needed for next level
     """
     try:
-        stats = await ExperienceService.get_trainer_stats(current_user)
+        stats = await ExperienceService.get_trainer_stats(repos, current_user)
         return UserStats(**stats)
-        
+    
     except HTTPException:
         raise
     except Exception as e:
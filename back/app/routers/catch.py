@@ -3,17 +3,21 @@ Catching router - API endpoints for Pokemon catching minigame
 """
 
 from fastapi import APIRouter, Depends
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.models.catch import (
     CatchRequest,
     CatchChallenge,
     CatchAttemptResult,
     CatchResult
 )
+from app.repositories.base import Repositories
+from app.repositories.factory import get_repositories
 from app.services.catch_service import CatchService
-from app.utils.auth import get_current_user
+from app.utils.auth import get_current_user, require_admin
+from app.utils.rate_limit import limit_catch_start, limit_catch_complete, get_limiter_stats
+from app.utils.bulkhead import use_bulkhead
 
-router = APIRouter(prefix="/catch", tags=["Catching"])
+router = APIRouter(prefix="/catch", tags=["Catching"], dependencies=[Depends(use_bulkhead("gameplay"))])
 
 @router.get("/regions", response_model=List[str])
 async def get_regions():
@@ -21,28 +25,43 @@ async def get_regions():
     return CatchService.get_available_regions()
 
 @router.get("/habitats", response_model=List[str])
-async def get_habitats(region: Optional[str] = None):
+async def get_habitats(
+    region: Optional[str] = None,
+    repos: Repositories = Depends(get_repositories)
+):
     """
     Get list of available Pokemon habitats
     If region is provided, only returns habitats available in that region
     """
-    return await CatchService.get_available_habitats(region)
+    return await CatchService.get_available_habitats(repos, region)
 
 @router.get("/difficulties", response_model=List[str])
 async def get_difficulties(
     region: Optional[str] = None,
-    habitat: Optional[str] = None
+    habitat: Optional[str] = None,
+    repos: Repositories = Depends(get_repositories)
 ):
     """
     Get list of available difficulty levels
     Filtered by region and/or habitat if provided
     """
-    return await CatchService.get_available_difficulties(region, habitat)
+    return await CatchService.get_available_difficulties(repos, region, habitat)
+
+@router.get(
+    "/limits",
+    response_model=Dict[str, Dict[str, int]],
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False
+)
+async def get_limits():
+    """Get request counters of the rate and concurrency limiters (admin token required)"""
+    return get_limiter_stats()
 
 @router.post("/start", response_model=CatchChallenge)
 async def start_catch_attempt(
     request: CatchRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
 ):
     """
     Start a new catch attempt
@@ -50,16 +69,19 @@ async def start_catch_attempt(
     Returns a random Pokemon from the selected region/habitat
     along with a QTE challenge based on difficulty
     """
-    return await CatchService.get_random_pokemon(
-        region=request.region,
-        habitat=request.habitat,
-        difficulty=request.difficulty
-    )
+    async with limit_catch_start(current_user):
+        return await CatchService.get_random_pokemon(
+            repos,
+            region=request.region,
+            habitat=request.habitat,
+            difficulty=request.difficulty
+        )
 
 @router.post("/complete", response_model=CatchResult)
 async def complete_catch_attempt(
     attempt: CatchAttemptResult,
-    current_user: str = Depends(get_current_user)
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
 ):
     """
     Submit catch attempt result
@@ -67,7 +89,9 @@ async def complete_catch_attempt(
     Records the attempt and captures the Pokemon if successful
     Awards XP for both successful and failed attempts
     """
-    return await CatchService.record_catch_attempt(
-        trainer_id=current_user,
-        attempt=attempt
-    )
\ No newline at end of file
+    async with limit_catch_complete(current_user):
+        return await CatchService.record_catch_attempt(
+            repos,
+            trainer_id=current_user,
+            attempt=attempt
+        )
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""
+Health router - Liveness and readiness probes
+/health answers as soon as the process serves requests, /ready only once
+the caches are warm (see app/services/warmup_service.py)
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services.warmup_service import WarmupService
+
+router = APIRouter(tags=["Monitoring"], include_in_schema=False)
+
+@router.get("/health")
+async def health():
+    """Liveness probe: the process is up"""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the catalog and facets are loaded, 503 before"""
+    status = WarmupService.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
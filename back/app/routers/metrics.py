@@ -0,0 +1,49 @@
+"""
+Metrics router - Prometheus scrape endpoint
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.catalog_service import CatalogService
+from app.utils.bulkhead import Bulkhead
+from app.utils.metrics import (
+    registry,
+    record_cache_stats,
+    rate_limit_requests,
+    concurrency_in_flight
+)
+from app.utils.rate_limit import TokenBucketLimiter, ConcurrencyLimiter
+from app.utils.swr_cache import facet_cache
+from app.utils.token_cache import token_cache
+
+router = APIRouter(tags=["Monitoring"])
+
+def collect_cache_stats():
+    """Copy the access token, catalog and facet cache counters into the metrics"""
+    stats = token_cache.stats()
+    record_cache_stats("access_token", stats["hits"], stats["misses"], stats["size"])
+    
+    stats = CatalogService.stats()
+    record_cache_stats("catalog", stats["hits"], stats["misses"], stats["size"])
+    
+    stats = facet_cache.stats()
+    record_cache_stats("facets", stats["hits"], stats["misses"], stats["size"])
+
+def collect_limiter_stats():
+    """Copy the rate limiter, concurrency limiter and bulkhead counters into the metrics"""
+    for limiter in TokenBucketLimiter.registry:
+        rate_limit_requests.set(limiter.allowed, limiter=limiter.name, result="allowed")
+        rate_limit_requests.set(limiter.rejected, limiter=limiter.name, result="rejected")
+    for limiter in ConcurrencyLimiter.registry:
+        concurrency_in_flight.set(limiter.in_flight, limiter=limiter.name)
+        rate_limit_requests.set(limiter.rejected, limiter=limiter.name, result="rejected")
+    for bulkhead in Bulkhead.registry:
+        concurrency_in_flight.set(bulkhead.in_flight, limiter=f"bulkhead-{bulkhead.name}")
+
+registry.add_collector(collect_cache_stats)
+registry.add_collector(collect_limiter_stats)
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """Metrics of this process in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
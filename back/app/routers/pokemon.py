@@ -1,27 +1,40 @@
 from fastapi import APIRouter, Query, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from urllib.parse import quote
 from app.models.pokemon import PokemonListResponse, PokemonDetail
+from app.models.collection import CaptureBatchRequest, CaptureBatchResponse, CollectionDelta
+from app.repositories.base import Repositories
+from app.repositories.factory import get_repositories
 from app.services.pokemon_service import PokemonService
+from app.services.collection_service import CollectionService
+from app.services.catalog_service import CatalogService
+from app.config import READ_DEADLINE_SECONDS
 from app.utils.auth import get_current_user
+from app.utils.deadline import request_deadline
+from app.utils.bulkhead import use_bulkhead
 
-router = APIRouter(prefix="/pokemon", tags=["Pokemon"])
+router = APIRouter(prefix="/pokemon", tags=["Pokemon"], dependencies=[Depends(use_bulkhead("catalog"))])
+
+# Collection routes are gameplay traffic, not catalog browsing
+gameplay = [Depends(use_bulkhead("gameplay"))]
 
 @router.get("/types", response_model=List[str])
-async def get_pokemon_types():
+async def get_pokemon_types(repos: Repositories = Depends(get_repositories)):
     """Get list of all available Pokemon types"""
-    return PokemonService.get_available_types()
+    return await PokemonService.get_available_types(repos)
 
 @router.get("/regions", response_model=List[str])
-async def get_pokemon_regions():
+async def get_pokemon_regions(repos: Repositories = Depends(get_repositories)):
     """Get list of all available Pokemon regions"""
-    return PokemonService.get_available_regions()
+    return await PokemonService.get_available_regions(repos)
 
 @router.get("/habitats", response_model=List[str])
-async def get_pokemon_habitats():
+async def get_pokemon_habitats(repos: Repositories = Depends(get_repositories)):
     """Get list of all available Pokemon habitats"""
-    return PokemonService.get_available_habitats()
+    return await PokemonService.get_available_habitats(repos)
 
-@router.get("/", response_model=PokemonListResponse)
+@router.get("/", response_model=PokemonListResponse, dependencies=[Depends(request_deadline(READ_DEADLINE_SECONDS))])
 async def get_pokemon_list(
     page: int = Query(1, ge=1, description="Page number (1-indexed)"),
     page_size: int = Query(20, ge=1, le=50, description="Pokemon per page (max 50)"),
@@ -32,7 +45,8 @@ async def get_pokemon_list(
     sort_by: Optional[str] = Query(None, description="Sort field: id, name, height, weight, stats_total"),
     sort_order: str = Query("asc", regex="^(asc|desc)$", description="Sort order: asc or desc"),
     captured_only: bool = Query(False, description="Show only captured Pokemon"),
-    current_user: str = Depends(get_current_user)
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
 ):
     """
     Get paginated list of Pokemon with optional filtering and sorting
@@ -67,6 +81,7 @@ async def get_pokemon_list(
     
     try:
         result = await PokemonService.get_pokemon_list(
+            repos,
             page=page,
             page_size=page_size,
             types=type_list,
@@ -79,20 +94,133 @@ async def get_pokemon_list(
             captured_only=captured_only
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch Pokemon: {str(e)}"
         )
 
-@router.get("/{pokemon_id}", response_model=PokemonDetail)
+@router.post("/collection/capture", response_model=CaptureBatchResponse, dependencies=gameplay)
+async def capture_pokemon_batch(
+    request: CaptureBatchRequest,
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
+):
+    """
+    Capture several Pokemon at once
+    
+    Returns an outcome per Pokemon ID: captured, already_captured or not_found
+    """
+    try:
+        results = await PokemonService.capture_pokemon_batch(repos, current_user, request.pokemon_ids)
+        changed = sum(1 for r in results if r['status'] == 'captured')
+        return CaptureBatchResponse(results=results, changed=changed)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to capture Pokemon: {str(e)}"
+        )
+
+@router.post("/collection/release", response_model=CaptureBatchResponse, dependencies=gameplay)
+async def release_pokemon_batch(
+    request: CaptureBatchRequest,
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
+):
+    """
+    Release several captured Pokemon at once
+    
+    Returns an outcome per Pokemon ID: released, not_captured or not_found
+    """
+    try:
+        results = await PokemonService.release_pokemon_batch(repos, current_user, request.pokemon_ids)
+        changed = sum(1 for r in results if r['status'] == 'released')
+        return CaptureBatchResponse(results=results, changed=changed)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to release Pokemon: {str(e)}"
+        )
+
+@router.get("/collection/sync", response_model=CollectionDelta, dependencies=gameplay)
+async def sync_collection(
+    since: int = Query(0, ge=0, description="Collection version the client already has (0 for none)"),
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
+):
+    """
+    Get changes to the current user's collection since a known version
+    
+    - **since**: Version returned by the previous sync (0 to get everything)
+    
+    Returns the added/removed Pokemon IDs, or a full snapshot (full=true) when
+    the client is too far behind. Store the returned version for the next call.
+    """
+    return await CollectionService.get_collection_delta(repos, current_user, since)
+
+@router.get("/collection/export", dependencies=gameplay)
+async def export_collection(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format: ndjson or csv"),
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
+):
+    """
+    Download the current user's collection joined with Pokemon data
+    
+    - **format**: ndjson (one JSON object per line) or csv
+    
+    The file is streamed in chunks, so memory use doesn't grow with the collection.
+    """
+    try:
+        # Load the catalog up front so a failure returns an error, not a cut-off file
+        await CatalogService.load(repos.pokemon)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export collection: {str(e)}"
+        )
+    
+    if format == "csv":
+        content = CollectionService.export_csv(repos, current_user)
+        media_type = "text/csv"
+    else:
+        content = CollectionService.export_ndjson(repos, current_user)
+        media_type = "application/x-ndjson"
+    
+    # Trainer IDs can hold any character: ASCII fallback plus the percent-encoded UTF-8 name (RFC 6266)
+    filename = quote(f"{current_user}-collection.{format}", safe="")
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="collection.{format}"; filename*=UTF-8\'\'{filename}'
+        }
+    )
+
+@router.get("/{pokemon_id}", response_model=PokemonDetail, dependencies=[Depends(request_deadline(READ_DEADLINE_SECONDS))])
 async def get_pokemon_detail(
     pokemon_id: int,
-    current_user: str = Depends(get_current_user)
+    sprites: str = Query("compact", pattern="^(compact|full)$", description="Sprites: compact or full"),
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
 ):
-    """Get detailed information about a specific Pokemon"""
+    """
+    Get detailed information about a specific Pokemon
+    
+    - **sprites**: compact (default artwork and sprite URLs) or full (the whole PokeAPI sprites object)
+    """
     try:
-        pokemon = await PokemonService.fetch_pokemon_detail(pokemon_id, current_user)
+        pokemon = await PokemonService.fetch_pokemon_detail(
+            repos, pokemon_id, current_user, full_sprites=sprites == "full"
+        )
         if not pokemon:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -107,14 +235,15 @@ async def get_pokemon_detail(
             detail=f"Failed to fetch Pokemon detail: {str(e)}"
         )
 
-@router.post("/{pokemon_id}/capture")
+@router.post("/{pokemon_id}/capture", dependencies=gameplay)
 async def capture_pokemon(
     pokemon_id: int,
-    current_user: str = Depends(get_current_user)
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
 ):
     """Capture a Pokemon"""
     try:
-        result = await PokemonService.capture_pokemon(current_user, pokemon_id)
+        result = await PokemonService.capture_pokemon(repos, current_user, pokemon_id)
         return result
     except HTTPException:
         raise
@@ -124,14 +253,15 @@ async def capture_pokemon(
             detail=f"Failed to capture Pokemon: {str(e)}"
         )
 
-@router.delete("/{pokemon_id}/capture")
+@router.delete("/{pokemon_id}/capture", dependencies=gameplay)
 async def release_pokemon(
     pokemon_id: int,
-    current_user: str = Depends(get_current_user)
+    current_user: str = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
 ):
     """Release a captured Pokemon"""
     try:
-        result = await PokemonService.release_pokemon(current_user, pokemon_id)
+        result = await PokemonService.release_pokemon(repos, current_user, pokemon_id)
         return result
     except HTTPException:
         raise
@@ -0,0 +1,62 @@
+"""
+Profiling router - arm the request profiler and download captured profiles
+Profiles are per worker: with several uvicorn workers, arm and download from
+the same one (or arm every worker by repeating the request).
+"""
+
+import re
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, Response
+from typing import Optional
+from app.models.profiling import ProfilingArmRequest, ProfilingStatus
+from app.utils.auth import require_admin
+from app.utils.profiling import request_profiler
+
+router = APIRouter(
+    prefix="/admin/profiling",
+    tags=["Monitoring"],
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False
+)
+
+@router.get("", response_model=ProfilingStatus)
+async def get_profiling_status():
+    """Get the arming state and the captured profiles of this worker"""
+    return request_profiler.status()
+
+@router.post("/arm", response_model=ProfilingStatus)
+async def arm_profiler(request: ProfilingArmRequest):
+    """Profile the next requests whose path matches path_pattern"""
+    try:
+        request_profiler.arm(request.path_pattern, request.method, request.count)
+    except re.error as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid path pattern: {e}")
+    return request_profiler.status()
+
+@router.delete("/arm", response_model=ProfilingStatus)
+async def disarm_profiler():
+    """Stop profiling requests (captured profiles are kept)"""
+    request_profiler.disarm()
+    return request_profiler.status()
+
+@router.get("/{profile_id}")
+async def download_profile(
+    profile_id: int,
+    format: str = Query("pstats", pattern="^(pstats|text)$", description="pstats file or text summary"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$", description="Sort key of the text summary")
+):
+    """
+    Download a captured profile
+    The pstats file opens with python -m pstats or snakeviz
+    """
+    captured = request_profiler.get(profile_id)
+    if not captured:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found (it may have been dropped from the buffer)")
+    
+    if format == "text":
+        return PlainTextResponse(captured.to_text(sort))
+    return Response(
+        captured.to_pstats(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{captured.id}.pstats"'}
+    )
@@ -0,0 +1,223 @@
+"""
+Catalog service - In-memory copy of the Pokemon catalog
+The pokemon table only changes when populate_pokemon.py runs, so it is
+loaded once per process and used for lookups that don't need a query.
+Every CATALOG_REFRESH_SECONDS it is reloaded in the background, lookups
+keep using the previous copy meanwhile.
+
+With CATALOG_SNAPSHOT_PATH set, the catalog is kept in a snapshot file
+memory-mapped by every worker (see app/repositories/snapshot.py) instead of
+a copy per process. A worker starting while the snapshot is fresh maps it
+without querying the database, and a reload writes a new snapshot that the
+other workers pick up when their own refresh is due.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from app.config import CATALOG_REFRESH_SECONDS, CATALOG_SNAPSHOT_PATH
+from app.repositories.base import PokemonFilters, PokemonRepository
+from app.repositories.snapshot import CatalogSnapshot, write_snapshot
+from app.utils.deadline import clear_deadline
+
+class CatalogService:
+    """Service holding the static Pokemon catalog in memory"""
+    
+    # Rows fetched per query while loading (PostgREST returns at most 1000)
+    PAGE_SIZE = 1000
+    
+    # Minimum seconds between reloads triggered by unknown IDs
+    MISS_RELOAD_INTERVAL = 300
+    
+    # Seconds before retrying a background reload that failed
+    REFRESH_RETRY_INTERVAL = 60
+    
+    # Random spread of the refresh interval (0.1 = up to +10%) so workers sharing a
+    # snapshot aren't due together: the first one reloads, the others map its file
+    REFRESH_JITTER = 0.1
+    
+    _pokemon: Mapping[int, dict] = {}
+    _loaded_at: Optional[float] = None
+    _next_refresh_at: Optional[float] = None
+    _refresh_task: Optional[asyncio.Task] = None
+    _source: Optional[PokemonRepository] = None
+    _lock: Optional[asyncio.Lock] = None
+    
+    # Lookups answered from memory / that needed a reload or found nothing
+    hits = 0
+    misses = 0
+    
+    @staticmethod
+    async def load(repo: PokemonRepository, force: bool = False) -> Mapping[int, dict]:
+        """Load the catalog from a repository or a fresh snapshot (only once unless forced)"""
+        if CatalogService._lock is None:
+            CatalogService._lock = asyncio.Lock()
+        
+        async with CatalogService._lock:
+            if CatalogService._source is repo and CatalogService._loaded_at is not None and not force:
+                CatalogService._schedule_refresh(repo)
+                return CatalogService._pokemon
+            
+            if not force:
+                snapshot = CatalogService._open_snapshot()
+                if snapshot is not None and CatalogService._is_fresh(snapshot):
+                    return CatalogService._store(repo, snapshot, time.time() - snapshot.mtime)
+            
+            pokemon = await CatalogService._publish(await CatalogService._fetch(repo))
+            return CatalogService._store(repo, pokemon)
+    
+    @staticmethod
+    async def _fetch(repo: PokemonRepository) -> Dict[int, dict]:
+        """Read the whole catalog, a page at a time"""
+        pokemon = {}
+        offset = 0
+        while True:
+            rows = await repo.list_catalog(offset, CatalogService.PAGE_SIZE)
+            for row in rows:
+                pokemon[row['id']] = row
+            
+            if len(rows) < CatalogService.PAGE_SIZE:
+                break
+            offset += CatalogService.PAGE_SIZE
+        return pokemon
+    
+    @staticmethod
+    def _open_snapshot() -> Optional[CatalogSnapshot]:
+        """Map the snapshot file, if snapshots are enabled and it exists and is valid"""
+        if not CATALOG_SNAPSHOT_PATH:
+            return None
+        try:
+            return CatalogSnapshot.open(CATALOG_SNAPSHOT_PATH)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring the catalog snapshot: {e}")
+            return None
+    
+    @staticmethod
+    def _is_fresh(snapshot: CatalogSnapshot) -> bool:
+        return CATALOG_REFRESH_SECONDS <= 0 or time.time() - snapshot.mtime < CATALOG_REFRESH_SECONDS
+    
+    @staticmethod
+    async def _publish(pokemon: Dict[int, dict]) -> Mapping[int, dict]:
+        """Write rows fetched from the database as the new snapshot and map it"""
+        if not CATALOG_SNAPSHOT_PATH:
+            return pokemon
+        try:
+            await asyncio.to_thread(write_snapshot, CATALOG_SNAPSHOT_PATH, pokemon.values())
+            return CatalogSnapshot(CATALOG_SNAPSHOT_PATH)
+        except (OSError, ValueError) as e:
+            # Serve this process's copy, the other workers keep their snapshot
+            print(f"Error writing the catalog snapshot: {e}")
+            return pokemon
+    
+    @staticmethod
+    def _store(repo: PokemonRepository, pokemon: Mapping[int, dict], age: float = 0) -> Mapping[int, dict]:
+        CatalogService._pokemon = pokemon
+        CatalogService._source = repo
+        CatalogService._loaded_at = time.monotonic()
+        if CATALOG_REFRESH_SECONDS > 0:
+            interval = CATALOG_REFRESH_SECONDS
+            if isinstance(pokemon, CatalogSnapshot):
+                interval *= 1 + random.uniform(0, CatalogService.REFRESH_JITTER)
+            CatalogService._next_refresh_at = CatalogService._loaded_at + max(0.0, interval - age)
+        return pokemon
+    
+    @staticmethod
+    def _schedule_refresh(repo: PokemonRepository):
+        """Start a background reload if the catalog is due for one"""
+        next_refresh_at = CatalogService._next_refresh_at
+        if next_refresh_at is None or CatalogService._refresh_task is not None:
+            return
+        if time.monotonic() >= next_refresh_at:
+            CatalogService._refresh_task = asyncio.ensure_future(CatalogService._refresh(repo))
+    
+    @staticmethod
+    async def _refresh(repo: PokemonRepository):
+        clear_deadline()
+        try:
+            # Another worker may have written a newer snapshot already
+            current = CatalogService._pokemon
+            snapshot = CatalogService._open_snapshot()
+            if snapshot is not None and CatalogService._is_fresh(snapshot) and not (
+                isinstance(current, CatalogSnapshot) and current.inode == snapshot.inode
+            ):
+                if CatalogService._source is repo:
+                    CatalogService._store(repo, snapshot, time.time() - snapshot.mtime)
+                return
+            
+            # Fetched without the lock, lookups keep using the current copy until it's swapped
+            pokemon = await CatalogService._publish(await CatalogService._fetch(repo))
+            if CatalogService._source is repo:
+                CatalogService._store(repo, pokemon)
+        except Exception as e:
+            print(f"Error refreshing the Pokemon catalog: {e}")
+            CatalogService._next_refresh_at = time.monotonic() + CatalogService.REFRESH_RETRY_INTERVAL
+        finally:
+            CatalogService._refresh_task = None
+    
+    @staticmethod
+    async def get_pokemon(repo: PokemonRepository, pokemon_id: int) -> Optional[dict]:
+        """
+        Get a catalog row by Pokemon ID
+        Unknown IDs trigger a reload (rate limited) in case the catalog was repopulated
+        """
+        pokemon = (await CatalogService.load(repo)).get(pokemon_id)
+        if pokemon is not None:
+            CatalogService.hits += 1
+        else:
+            CatalogService.misses += 1
+            age = time.monotonic() - CatalogService._loaded_at
+            if age > CatalogService.MISS_RELOAD_INTERVAL:
+                pokemon = (await CatalogService.load(repo, force=True)).get(pokemon_id)
+        return pokemon
+    
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        """Get catalog size and hit/miss counters"""
+        return {
+            'size': len(CatalogService._pokemon),
+            'hits': CatalogService.hits,
+            'misses': CatalogService.misses
+        }
+    
+    @staticmethod
+    def is_loaded() -> bool:
+        return CatalogService._loaded_at is not None
+    
+    # Fallbacks used while the database is unavailable (the last loaded copy is served)
+    
+    @staticmethod
+    def find(filters: PokemonFilters) -> List[dict]:
+        """Get the catalog rows matching filters, in ID order"""
+        return [row for _, row in sorted(CatalogService._pokemon.items()) if filters.matches(row)]
+    
+    @staticmethod
+    def query(
+        filters: PokemonFilters,
+        sort_by: str,
+        descending: bool,
+        offset: int,
+        limit: int
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Get a page of list rows like PokemonRepository.list_pokemon, without captured flags"""
+        matches = CatalogService.find(filters)
+        matches.sort(key=lambda row: (row[sort_by], row['id']), reverse=descending)
+        return [{**row, 'is_captured': False} for row in matches[offset:offset + limit]], len(matches)
+    
+    @staticmethod
+    def detail_row(pokemon_id: int) -> Optional[Dict[str, Any]]:
+        """Get a catalog row shaped like a detail row (no abilities or description)"""
+        row = CatalogService._pokemon.get(pokemon_id)
+        if row is None:
+            return None
+        return {**row, 'abilities': []}
+    
+    @staticmethod
+    async def get_many(repo: PokemonRepository, pokemon_ids: List[int]) -> Dict[int, dict]:
+        """Get catalog rows for several Pokemon IDs, skipping unknown ones"""
+        found = {}
+        for pokemon_id in pokemon_ids:
+            pokemon = await CatalogService.get_pokemon(repo, pokemon_id)
+            if pokemon is not None:
+                found[pokemon_id] = pokemon
+        return found
@@ -2,11 +2,13 @@
 Catching service - Handles Pokemon catching minigame logic
 """
 
+import functools
 import random
 from typing import Optional
 from fastapi import HTTPException, status
-from app.database import supabase
+from app.repositories.base import PokemonFilters, Repositories
 from app.models.catch import (
+    DIFFICULTY_STAT_RANGES,
     CatchRequest,
     CatchChallenge,
     ButtonSequence,
@@ -15,6 +17,10 @@ from app.models.catch import (
     DifficultyLevel
 )
 from app.services.experience_service import ExperienceService
+from app.services.catalog_service import CatalogService
+from app.services.pokemon_service import PokemonService
+from app.utils.circuit_breaker import DataStoreUnavailable
+from app.utils.swr_cache import facet_cache
 
 class CatchService:
     """Service for Pokemon catching minigame"""
@@ -67,6 +73,7 @@ class CatchService:
       
     @staticmethod
     async def get_random_pokemon(
+        repos: Repositories,
         region: str,
         habitat: str,
         difficulty: DifficultyLevel
@@ -76,40 +83,33 @@ class CatchService:
         Generate QTE challenge based on Pokemon stats
         """
         try:
-            # Build query based on filters
-            query = supabase.table('pokemon').select('*')
-            
-            # Apply filters
-            if region and region.lower() not in ['any', '']:
-                query = query.eq('region', region.lower())
-        
-            if habitat and habitat.lower() not in ['any', '']:
-                query = query.eq('habitat', habitat.lower())
-            
             # Apply stat-based difficulty filter
-            if difficulty == DifficultyLevel.WEAK:
-                query = query.gte('stats_total', 180).lte('stats_total', 300)
-            elif difficulty == DifficultyLevel.EASY:
-                query = query.gte('stats_total', 301).lte('stats_total', 400)
-            elif difficulty == DifficultyLevel.MEDIUM:
-                query = query.gte('stats_total', 401).lte('stats_total', 500)
-            elif difficulty == DifficultyLevel.HARD:
-                query = query.gte('stats_total', 501).lte('stats_total', 600)
-            elif difficulty == DifficultyLevel.LEGENDARY:
-                query = query.gte('stats_total', 601).lte('stats_total', 720)
-            elif difficulty == DifficultyLevel.MYTHICAL:
-                query = query.gte('stats_total', 721)
+            min_stats, max_stats = DIFFICULTY_STAT_RANGES[DifficultyLevel(difficulty).value]
+            
+            # Build filters ('any' means no region/habitat filter)
+            filters = PokemonFilters(
+                region=region if region and region.lower() not in ['any', ''] else None,
+                habitat=habitat if habitat and habitat.lower() not in ['any', ''] else None,
+                min_stats=min_stats,
+                max_stats=max_stats
+            )
             
-            response = query.execute()
+            try:
+                candidates = await repos.pokemon.find_pokemon(filters)
+            except DataStoreUnavailable:
+                # Pick from the in-memory catalog
+                if not CatalogService.is_loaded():
+                    raise
+                candidates = CatalogService.find(filters)
             
-            if not response.data:
+            if not candidates:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"No Pokemon found in {region} {habitat} with {difficulty} difficulty"
                 )
             
             # Select random Pokemon from results
-            pokemon = random.choice(response.data)
+            pokemon = random.choice(candidates)
             
             # Generate QTE sequence based on stats
             sequence = CatchService.calculate_qte_difficulty(pokemon['stats_total'], difficulty)
@@ -125,7 +125,7 @@ class CatchService:
                 sequence=sequence,
                 difficulty=difficulty
             )
-            
+        
         except HTTPException:
             raise
         except Exception as e:
@@ -137,6 +137,7 @@ class CatchService:
     
     @staticmethod
     async def record_catch_attempt(
+        repos: Repositories,
         trainer_id: str,
         attempt: CatchAttemptResult
     ) -> CatchResult:
@@ -149,40 +150,35 @@ class CatchService:
             accuracy = (attempt.buttons_correct / attempt.total_buttons) * 100
             
             # Get Pokemon name
-            pokemon_response = supabase.table('pokemon').select('name').eq('id', attempt.pokemon_id).execute()
-            if not pokemon_response.data:
+            pokemon = await CatalogService.get_pokemon(repos.pokemon, attempt.pokemon_id)
+            if pokemon is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Pokemon with ID {attempt.pokemon_id} not found"
                 )
             
-            pokemon_name = pokemon_response.data[0]['name'].capitalize()
+            pokemon_name = pokemon['name'].capitalize()
             
             # Handle success
             if attempt.success:
-                # Check if already captured
-                existing = supabase.table('captured_pokemon').select('id').eq(
-                    'trainer_id', trainer_id
-                ).eq('pokemon_id', attempt.pokemon_id).execute()
+                # Capture the Pokemon (no-op if it is already in the collection)
+                outcome = (await PokemonService.capture_pokemon_batch(
+                    repos,
+                    trainer_id,
+                    [attempt.pokemon_id]
+                ))[0]
                 
                 # Award XP for successful catch
                 xp_result = await ExperienceService.award_experience(
+                    repos,
                     trainer_id, 
                     ExperienceService.XP_CATCH_SUCCESS
                 )
                 
-                if existing.data:
+                if outcome['status'] == 'already_captured':
                     message = f"You already caught {pokemon_name}! But nice catch anyway!"
                     reward_message = f"+{ExperienceService.XP_CATCH_SUCCESS} XP"
                 else:
-                    # Capture the Pokemon
-                    capture_data = {
-                        'trainer_id': trainer_id,
-                        'pokemon_id': attempt.pokemon_id,
-                        'nickname': None
-                    }
-                    supabase.table('captured_pokemon').insert(capture_data).execute()
-                    
                     message = f"Congratulations! You caught {pokemon_name}!"
                     reward_message = f"+{ExperienceService.XP_CATCH_SUCCESS} XP"
                     
@@ -209,6 +205,7 @@ class CatchService:
             else:
                 # Failed catch - still award consolation XP
                 xp_result = await ExperienceService.award_experience(
+                    repos,
                     trainer_id, 
                     ExperienceService.XP_CATCH_FAIL
                 )
@@ -232,7 +229,7 @@ class CatchService:
                     new_level=xp_result["new_level"],
                     leveled_up=xp_result["leveled_up"]
                 )
-                
+        
         except HTTPException:
             raise
         except Exception as e:
@@ -251,81 +248,46 @@ class CatchService:
         ]
     
     @staticmethod
-    async def get_available_habitats(region: Optional[str] = None) -> list:
+    async def get_available_habitats(repos: Repositories, region: Optional[str] = None) -> list:
         """
         Get list of available habitats from database
         If region is provided, only return habitats that exist in that region
         """
-        try:
-            query = supabase.table('pokemon').select('habitat').not_.is_('habitat', 'null')
-            
-            if region:
-                query = query.eq('region', region.lower())
-            
-            response = query.execute()
-            
-            habitats = set()
-            for row in response.data:
-                if row['habitat']:
-                    habitats.add(row['habitat'])
-            
-            return sorted(list(habitats))
-        except Exception as e:
-            print(f"Error fetching habitats: {e}")
-            # Return common habitats as fallback
-            return [
-                'grassland', 'forest', 'waters-edge', 'sea', 'cave',
-                'mountain', 'rough-terrain', 'urban', 'rare'
-            ]
+        return await PokemonService.get_available_habitats(repos, region)
     
     @staticmethod
     async def get_available_difficulties(
+        repos: Repositories,
         region: Optional[str] = None,
         habitat: Optional[str] = None
     ) -> list:
         """
         Get list of available difficulty levels based on what Pokemon exist
-        Filters by region and/or habitat if provided
+        Filters by region and/or habitat if provided (cached like the other facets)
         """
+        filters = PokemonFilters(region=region, habitat=habitat)
+        key = ('difficulties', filters.key())
         try:
-            query = supabase.table('pokemon').select('stats_total')
-            
-            if region:
-                query = query.eq('region', region.lower())
-            
-            if habitat:
-                query = query.eq('habitat', habitat.lower())
-            
-            response = query.execute()
-            
-            if not response.data:
-                return []
-            
-            # Get all stat totals
-            stat_totals = [row['stats_total'] for row in response.data]
-            
-            # Determine which difficulties are available
-            available = []
-            
-            # Check each difficulty range
-            if any(180 <= s <= 300 for s in stat_totals):
-                available.append('weak')
-            if any(301 <= s <= 400 for s in stat_totals):
-                available.append('easy')
-            if any(401 <= s <= 500 for s in stat_totals):
-                available.append('medium')
-            if any(501 <= s <= 600 for s in stat_totals):
-                available.append('hard')
-            if any(601 <= s <= 720 for s in stat_totals):
-                available.append('legendary')
-            if any(s >= 721 for s in stat_totals):
-                available.append('mythical')
-            
-            return available
-            
+            return await facet_cache.get(
+                key, functools.partial(CatchService._load_difficulties, repos, filters)
+            )
         except Exception as e:
             print(f"Error fetching difficulties: {e}")
-            # Return all difficulties as fallback
-            return ['weak', 'easy', 'medium', 'hard', 'legendary', 'mythical']
-
+            return PokemonService.facet_fallback(key)
+    
+    @staticmethod
+    async def _load_difficulties(repos: Repositories, filters: PokemonFilters) -> list:
+        """Find the difficulty levels having at least one Pokemon matching the filters"""
+        # Get all stat totals
+        stat_totals = await repos.pokemon.list_stats_totals(filters)
+        
+        # Determine which difficulties are available
+        available = []
+        
+        # Check each difficulty range
+        for level, (low, high) in DIFFICULTY_STAT_RANGES.items():
+            if any(low <= s and (high is None or s <= high) for s in stat_totals):
+                available.append(level)
+        
+        return available
 
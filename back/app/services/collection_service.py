@@ -0,0 +1,174 @@
+"""
+Collection service - Syncing and exporting a trainer's captured Pokemon
+Sync relies on the collection_version column and collection_events table
+maintained by the trigger in sql/002_collection_versions.sql
+"""
+
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List
+from fastapi import HTTPException, status
+from app.repositories.base import Repositories
+from app.services.catalog_service import CatalogService
+from app.utils.deadline import clear_deadline
+
+class CollectionService:
+    """Service for incremental sync of a trainer's collection"""
+    
+    # Above this many changes a full snapshot is smaller than the delta
+    MAX_DELTA_EVENTS = 200
+    
+    # Captured rows fetched per query while exporting
+    EXPORT_CHUNK_SIZE = 500
+    
+    # Columns of an exported row, in CSV column order
+    EXPORT_FIELDS = [
+        'pokemon_id', 'name', 'nickname', 'types', 'region', 'habitat',
+        'height', 'weight', 'base_experience', 'hp', 'attack', 'defense',
+        'special_attack', 'special_defense', 'speed', 'stats_total'
+    ]
+    
+    @staticmethod
+    async def get_collection_version(repos: Repositories, trainer_id: str) -> int:
+        """Get the current version of a trainer's collection"""
+        trainer = await repos.trainers.get_trainer(trainer_id)
+        
+        if trainer is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Trainer not found"
+            )
+        
+        return trainer.get('collection_version') or 0
+    
+    @staticmethod
+    async def get_captured_ids(repos: Repositories, trainer_id: str) -> List[int]:
+        """Get the IDs of every Pokemon a trainer has captured"""
+        return await repos.captures.list_captured_ids(trainer_id)
+    
+    @staticmethod
+    async def get_collection_delta(repos: Repositories, trainer_id: str, since: int) -> Dict[str, Any]:
+        """
+        Get the changes to a trainer's collection since a client-known version
+        
+        Returns only the added/removed IDs when the client is close enough to the
+        current version, or a full snapshot when it is new (since=0), too far
+        behind, ahead of the server, or older than the retained history.
+        
+        The version is read before the snapshot, so a snapshot can include a
+        change newer than the version it reports. Replaying that change on the
+        next sync is harmless since adds and removes are idempotent.
+        """
+        try:
+            version = await CollectionService.get_collection_version(repos, trainer_id)
+            
+            if since == version:
+                return {'version': version, 'full': False, 'added': [], 'removed': []}
+            
+            if 0 < since < version and version - since <= CollectionService.MAX_DELTA_EVENTS:
+                events = await repos.captures.list_collection_events(trainer_id, since, version)
+                
+                # Versions are dense, so a missing first event means history was pruned
+                if events and events[0]['version'] == since + 1:
+                    # Only the last change to each Pokemon matters
+                    latest = {}
+                    for event in events:
+                        latest[event['pokemon_id']] = event['action']
+                    
+                    return {
+                        'version': events[-1]['version'],
+                        'full': False,
+                        'added': sorted(pid for pid, action in latest.items() if action == 'add'),
+                        'removed': sorted(pid for pid, action in latest.items() if action == 'remove')
+                    }
+            
+            return {
+                'version': version,
+                'full': True,
+                'added': await CollectionService.get_captured_ids(repos, trainer_id),
+                'removed': []
+            }
+        
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to sync collection: {str(e)}"
+            )
+    
+    @staticmethod
+    async def iter_captured_rows(repos: Repositories, trainer_id: str) -> AsyncIterator[dict]:
+        """
+        Iterate over a trainer's captured_pokemon rows in capture order
+        Uses keyset pagination on id, so each chunk costs the same however deep it is
+        """
+        last_id = 0
+        while True:
+            rows = await repos.captures.list_captures_after(
+                trainer_id,
+                last_id,
+                CollectionService.EXPORT_CHUNK_SIZE
+            )
+            
+            for row in rows:
+                yield row
+            
+            if len(rows) < CollectionService.EXPORT_CHUNK_SIZE:
+                break
+            last_id = rows[-1]['id']
+    
+    @staticmethod
+    async def build_export_row(repos: Repositories, captured: dict) -> Dict[str, Any]:
+        """Join a captured_pokemon row with its catalog data"""
+        pokemon = await CatalogService.get_pokemon(repos.pokemon, captured['pokemon_id']) or {}
+        return {
+            'pokemon_id': captured['pokemon_id'],
+            'name': pokemon.get('name'),
+            'nickname': captured.get('nickname'),
+            'types': pokemon.get('types', []),
+            'region': pokemon.get('region'),
+            'habitat': pokemon.get('habitat'),
+            'height': pokemon.get('height'),
+            'weight': pokemon.get('weight'),
+            'base_experience': pokemon.get('base_experience'),
+            'hp': pokemon.get('stats_hp'),
+            'attack': pokemon.get('stats_attack'),
+            'defense': pokemon.get('stats_defense'),
+            'special_attack': pokemon.get('stats_special_attack'),
+            'special_defense': pokemon.get('stats_special_defense'),
+            'speed': pokemon.get('stats_speed'),
+            'stats_total': pokemon.get('stats_total')
+        }
+    
+    @staticmethod
+    async def export_ndjson(repos: Repositories, trainer_id: str) -> AsyncIterator[str]:
+        """Stream a trainer's collection as newline-delimited JSON"""
+        # Runs after the response has started, where a deadline could only cut the file off
+        # (each data store call is still bounded by its breaker timeout)
+        clear_deadline()
+        async for captured in CollectionService.iter_captured_rows(repos, trainer_id):
+            yield json.dumps(await CollectionService.build_export_row(repos, captured)) + '\n'
+    
+    @staticmethod
+    async def export_csv(repos: Repositories, trainer_id: str) -> AsyncIterator[str]:
+        """Stream a trainer's collection as CSV (types are joined with '/')"""
+        # No request deadline while streaming, see export_ndjson
+        clear_deadline()
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CollectionService.EXPORT_FIELDS)
+        
+        writer.writeheader()
+        async for captured in CollectionService.iter_captured_rows(repos, trainer_id):
+            row = await CollectionService.build_export_row(repos, captured)
+            row['types'] = '/'.join(row['types'])
+            writer.writerow(row)
+            
+            # Hand over what was written and reuse the buffer
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        
+        if buffer.tell():
+            yield buffer.getvalue()
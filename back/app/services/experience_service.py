@@ -3,7 +3,7 @@ Experience and leveling service
 """
 
 from typing import Dict, Any
-from app.database import supabase
+from app.repositories.base import Repositories
 from fastapi import HTTPException, status
 
 
@@ -46,24 +46,21 @@ class ExperienceService:
         return level, remaining_xp
     
     @staticmethod
-    async def award_experience(trainer_id: str, xp_amount: int) -> Dict[str, Any]:
+    async def award_experience(repos: Repositories, trainer_id: str, xp_amount: int) -> Dict[str, Any]:
         """
         Award experience to a trainer and handle level-ups
         Returns info about level-ups and new stats
         """
         try:
             # Get current trainer data
-            response = supabase.table("trainers").select(
-                "trainer_id, level, experience"
-            ).eq("trainer_id", trainer_id).execute()
+            trainer = await repos.trainers.get_trainer(trainer_id)
             
-            if not response.data:
+            if trainer is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Trainer not found"
                 )
             
-            trainer = response.data[0]
             old_level = trainer.get("level", 1)
             old_xp = trainer.get("experience", 0)
             
@@ -72,10 +69,10 @@ class ExperienceService:
             new_level, xp_in_level = ExperienceService.calculate_level_from_xp(new_total_xp)
             
             # Update trainer in database
-            update_response = supabase.table("trainers").update({
+            await repos.trainers.update_trainer(trainer_id, {
                 "level": new_level,
                 "experience": new_total_xp
-            }).eq("trainer_id", trainer_id).execute()
+            })
             
             # Calculate XP needed for next level
             xp_to_next = ExperienceService.calculate_xp_for_level(new_level)
@@ -98,7 +95,7 @@ class ExperienceService:
                     for level in range(old_level + 1, new_level + 1)
                 ] if leveled_up else []
             }
-            
+        
         except HTTPException:
             raise
         except Exception as e:
@@ -108,21 +105,18 @@ class ExperienceService:
             )
     
     @staticmethod
-    async def get_trainer_stats(trainer_id: str) -> Dict[str, Any]:
+    async def get_trainer_stats(repos: Repositories, trainer_id: str) -> Dict[str, Any]:
         """Get comprehensive trainer statistics"""
         try:
             # Get trainer data
-            trainer_response = supabase.table("trainers").select(
-                "trainer_id, level, experience"
-            ).eq("trainer_id", trainer_id).execute()
+            trainer = await repos.trainers.get_trainer(trainer_id)
             
-            if not trainer_response.data:
+            if trainer is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Trainer not found"
                 )
             
-            trainer = trainer_response.data[0]
             level = trainer.get("level", 1)
             total_xp = trainer.get("experience", 0)
             
@@ -131,18 +125,10 @@ class ExperienceService:
             xp_to_next = ExperienceService.calculate_xp_for_level(level)
             
             # Get captured Pokemon count
-            captured_response = supabase.table("captured_pokemon").select(
-                "pokemon_id", count="exact"
-            ).eq("trainer_id", trainer_id).execute()
-            
-            pokemon_captured = captured_response.count or 0
+            pokemon_captured = await repos.captures.count_captures(trainer_id)
             
             # Get total Pokemon count
-            total_response = supabase.table("pokemon").select(
-                "id", count="exact"
-            ).execute()
-            
-            total_pokemon = total_response.count or 1025
+            total_pokemon = await repos.pokemon.count_pokemon() or 1025
             
             # Calculate Pokedex completion percentage
             pokedex_completion = (pokemon_captured / total_pokemon * 100) if total_pokemon > 0 else 0
@@ -157,7 +143,7 @@ class ExperienceService:
                 "pokedex_completion": round(pokedex_completion, 2),
                 "total_pokemon": total_pokemon
             }
-            
+        
         except HTTPException:
             raise
         except Exception as e:
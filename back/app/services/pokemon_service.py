@@ -1,12 +1,18 @@
 """
-Pokemon service - Queries Pokemon data from Supabase database
+Pokemon service - Queries Pokemon data through the repositories
 Data is pre-populated from PokeAPI using populate_pokemon.py
 """
 
+import functools
 import json
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import HTTPException, status
-from app.database import supabase
+from app.repositories.base import PokemonFilters, Repositories
+from app.services.catalog_service import CatalogService
+from app.utils.circuit_breaker import DataStoreUnavailable
+from app.utils.singleflight import catalog_reads
+from app.utils.swr_cache import facet_cache
+from app.models.catch import DIFFICULTY_STAT_RANGES
 from app.models.pokemon import (
     PokemonBasic,
     PokemonDetail,
@@ -15,64 +21,56 @@ from app.models.pokemon import (
 )
 
 class PokemonService:
-    """Service for querying Pokemon data from Supabase"""
+    """Service for querying Pokemon data"""
     
     @staticmethod
-    def get_available_types() -> List[str]:
-        """Get list of all unique Pokemon types from database"""
+    def facet_fallback(key: tuple) -> List[str]:
+        """
+        Get the last known value of a facet when the database errors
+        Raises 503 if it was never loaded
+        """
+        value = facet_cache.last_known(key)
+        if value is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Pokemon data is temporarily unavailable",
+                headers={"Retry-After": "5"},
+            )
+        return value
+    
+    @staticmethod
+    async def get_available_types(repos: Repositories) -> List[str]:
+        """Get list of all unique Pokemon types (cached, see app/utils/swr_cache.py)"""
+        key = ('types',)
         try:
-            # Query all pokemon and extract unique types
-            response = supabase.table('pokemon').select('types').execute()
-            
-            types_set = set()
-            for row in response.data:
-                types_set.update(row['types'])
-            
-            return sorted(list(types_set))
-            
+            return await facet_cache.get(key, repos.pokemon.list_types)
         except Exception as e:
             print(f"Error fetching types: {e}")
-            # Return common types as fallback
-            return [
-                'normal', 'fire', 'water', 'electric', 'grass', 'ice',
-                'fighting', 'poison', 'ground', 'flying', 'psychic',
-                'bug', 'rock', 'ghost', 'dragon', 'dark', 'steel', 'fairy'
-            ]
+            return PokemonService.facet_fallback(key)
     
     @staticmethod
-    def get_available_regions() -> List[str]:
-        """Get list of available regions from database"""
+    async def get_available_regions(repos: Repositories) -> List[str]:
+        """Get list of available regions (cached)"""
+        key = ('regions',)
         try:
-            response = supabase.table('pokemon').select('region').not_.is_('region', 'null').execute()
-            
-            regions = set()
-            for row in response.data:
-                if row['region']:
-                    regions.add(row['region'])
-            
-            return sorted(list(regions))
+            return await facet_cache.get(key, repos.pokemon.list_regions)
         except Exception as e:
             print(f"Error fetching regions: {e}")
-            return []
+            return PokemonService.facet_fallback(key)
     
     @staticmethod
-    def get_available_habitats() -> List[str]:
-        """Get list of available habitats from database"""
+    async def get_available_habitats(repos: Repositories, region: Optional[str] = None) -> List[str]:
+        """Get list of available habitats, optionally within a region (cached)"""
+        key = ('habitats', region.lower() if region else None)
         try:
-            response = supabase.table('pokemon').select('habitat').not_.is_('habitat', 'null').execute()
-            
-            habitats = set()
-            for row in response.data:
-                if row['habitat']:
-                    habitats.add(row['habitat'])
-            
-            return sorted(list(habitats))
+            return await facet_cache.get(key, functools.partial(repos.pokemon.list_habitats, region))
         except Exception as e:
             print(f"Error fetching habitats: {e}")
-            return []
+            return PokemonService.facet_fallback(key)
     
     @staticmethod
     async def get_pokemon_list(
+        repos: Repositories,
         page: int = 1,
         page_size: int = 20,
         types: Optional[List[str]] = None,
@@ -88,6 +86,7 @@ class PokemonService:
         Get paginated list of Pokemon from database with filtering and sorting
         
         Args:
+            repos: Repositories to query
             page: Page number (1-indexed)
             page_size: Number of Pokemon per page (max 50)
             types: List of types to filter by (AND logic)
@@ -104,92 +103,41 @@ class PokemonService:
             page_size = min(page_size, 50)
             offset = (page - 1) * page_size
             
-            # Build base query
-            query = supabase.table('pokemon').select(
-                'id, name, types, sprite_official, sprite_default, height, weight, stats_total',
-                count='exact'
-            )
-            
-            # Apply type filters (AND logic - Pokemon must have ALL specified types)
-            if types:
-                for pokemon_type in types:
-                    query = query.contains('types', [pokemon_type])
-            
-            # Apply region filter
-            if region:
-                query = query.eq('region', region.lower())
-            
-            # Apply habitat filter
-            if habitat:
-                query = query.eq('habitat', habitat.lower())
-            
             # Apply difficulty filter (stat-based)
-            if difficulty:
-                if difficulty == 'weak':
-                    query = query.gte('stats_total', 180).lte('stats_total', 300)
-                elif difficulty == 'easy':
-                    query = query.gte('stats_total', 301).lte('stats_total', 400)
-                elif difficulty == 'medium':
-                    query = query.gte('stats_total', 401).lte('stats_total', 500)
-                elif difficulty == 'hard':
-                    query = query.gte('stats_total', 501).lte('stats_total', 600)
-                elif difficulty == 'legendary':
-                    query = query.gte('stats_total', 601).lte('stats_total', 720)
-                elif difficulty == 'mythical':
-                    query = query.gte('stats_total', 721)
-            
-            # If captured_only is True, filter by captured Pokemon
-            if captured_only and trainer_id:
-                # Get list of captured Pokemon IDs for this trainer
-                captured_response = supabase.table('captured_pokemon').select('pokemon_id').eq('trainer_id', trainer_id).execute()
-                captured_ids = [row['pokemon_id'] for row in (captured_response.data or [])]
-                
-                if not captured_ids:
-                    # No captured Pokemon, return empty list
-                    return PokemonListResponse(
-                        pokemon=[],
-                        total=0,
-                        page=page,
-                        page_size=page_size,
-                        has_more=False,
-                        total_pages=0
-                    )
-                
-                # Filter to only show captured Pokemon
-                query = query.in_('id', captured_ids)
-            
-            # Apply sorting
-            ascending = sort_order == 'asc'
-            query = query.order(sort_by, desc=not ascending)
-            
-            # Apply pagination
-            query = query.range(offset, offset + page_size - 1)
-            
-            # Execute query
-            response = query.execute()
-            
-            total = response.count if response.count is not None else 0
-            pokemon_data = response.data or []
+            min_stats, max_stats = DIFFICULTY_STAT_RANGES.get(difficulty, (None, None))
+            
+            filters = PokemonFilters(
+                types=types,
+                region=region,
+                habitat=habitat,
+                min_stats=min_stats,
+                max_stats=max_stats
+            )
             
-            # Get captured status for current trainer
-            captured_ids = set()
-            if trainer_id:
-                captured_response = supabase.table('captured_pokemon').select('pokemon_id').eq('trainer_id', trainer_id).execute()
-                captured_ids = {row['pokemon_id'] for row in captured_response.data}
+            # Identical concurrent queries share a single execution
+            sort_by = sort_by or 'id'
+            descending = sort_order != 'asc'
+            query_key = ('list', filters.key(), sort_by, descending, offset, page_size, trainer_id, captured_only)
+            try:
+                pokemon_data, total = await catalog_reads.do(
+                    query_key,
+                    repos.pokemon.list_pokemon,
+                    filters,
+                    sort_by,
+                    descending=descending,
+                    offset=offset,
+                    limit=page_size,
+                    trainer_id=trainer_id,
+                    captured_only=captured_only
+                )
+            except DataStoreUnavailable:
+                # Serve the in-memory catalog, without captured flags
+                if captured_only or not CatalogService.is_loaded():
+                    raise
+                pokemon_data, total = CatalogService.query(filters, sort_by, descending, offset, page_size)
             
             # Transform to PokemonBasic objects
-            pokemon_list = []
-            for p in pokemon_data:
-                pokemon_list.append(PokemonBasic(
-                    id=p['id'],
-                    name=p['name'],
-                    types=p['types'],
-                    sprite=p['sprite_official'] or p['sprite_default'],
-                    height=p['height'],
-                    weight=p['weight'],
-                    stats_total=p['stats_total'],
-                    is_captured=p['id'] in captured_ids
-                ))
+            pokemon_list = [PokemonService.to_basic(p) for p in pokemon_data]
             
             # Calculate pagination info
             total_pages = (total + page_size - 1) // page_size if total > 0 else 0
@@ -203,106 +151,234 @@ class PokemonService:
                 has_more=has_more,
                 total_pages=total_pages
             )
-            
+        
         except Exception as e:
             print(f"Error fetching Pokemon list: {e}")
             raise
     
     @staticmethod
-    async def fetch_pokemon_detail(pokemon_id: int, trainer_id: Optional[str] = None) -> Optional[PokemonDetail]:
-        """Get detailed Pokemon information by ID from database"""
+    async def fetch_pokemon_detail(
+        repos: Repositories,
+        pokemon_id: int,
+        trainer_id: Optional[str] = None,
+        full_sprites: bool = False
+    ) -> Optional[PokemonDetail]:
+        """
+        Get detailed Pokemon information by ID from database
+        Sprites are the URLs the UI shows, unless full_sprites asks for the whole PokeAPI object
+        """
         try:
-            response = supabase.table('pokemon').select('*').eq('id', pokemon_id).execute()
+            try:
+                p = await catalog_reads.do(
+                    ('detail', pokemon_id, full_sprites),
+                    functools.partial(repos.pokemon.get_pokemon, pokemon_id, full_sprites=full_sprites)
+                )
+            except DataStoreUnavailable:
+                # Serve the in-memory catalog row (no abilities, description or sprites blob)
+                if not CatalogService.is_loaded():
+                    raise
+                p = CatalogService.detail_row(pokemon_id)
             
-            if not response.data:
+            if p is None:
                 return None
             
-            p = response.data[0]
-            
             # Check if captured by trainer
             is_captured = False
             nickname = None
             if trainer_id:
-                captured_response = supabase.table('captured_pokemon').select('nickname').eq('trainer_id', trainer_id).eq('pokemon_id', pokemon_id).execute()
-                if captured_response.data:
+                try:
+                    captured = await repos.captures.get_capture(trainer_id, pokemon_id)
+                except DataStoreUnavailable:
+                    captured = None
+                if captured:
                     is_captured = True
-                    nickname = captured_response.data[0].get('nickname')
-            
-            # Transform stats to PokemonStat objects
-            stats = [
-                PokemonStat(name='hp', base_stat=p['stats_hp']),
-                PokemonStat(name='attack', base_stat=p['stats_attack']),
-                PokemonStat(name='defense', base_stat=p['stats_defense']),
-                PokemonStat(name='special-attack', base_stat=p['stats_special_attack']),
-                PokemonStat(name='special-defense', base_stat=p['stats_special_defense']),
-                PokemonStat(name='speed', base_stat=p['stats_speed']),
-            ]
-            
-            # Parse JSON strings from database
-            sprites = p.get('sprites', {})
-            if isinstance(sprites, str):
-                sprites = json.loads(sprites)
-            
-            abilities = p.get('abilities', [])
-            if isinstance(abilities, str):
-                abilities = json.loads(abilities)
+                    nickname = captured.get('nickname')
             
-            return PokemonDetail(
-                id=p['id'],
-                name=p['name'],
-                types=p['types'],
-                sprites=sprites,
-                height=p['height'],
-                weight=p['weight'],
-                stats=stats,
-                stats_total=p['stats_total'],
-                abilities=abilities,
-                base_experience=p.get('base_experience'),
-                is_captured=is_captured,
-                nickname=nickname,
-                description=p.get('description')
-            )
+            return PokemonService.to_detail(p, is_captured, nickname)
             
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Error fetching Pokemon {pokemon_id}: {e}")
             return None
     
     @staticmethod
-    async def capture_pokemon(trainer_id: str, pokemon_id: int, nickname: Optional[str] = None):
+    def to_basic(p: Dict[str, Any]) -> PokemonBasic:
+        """Build a list item from a Pokemon list row"""
+        return PokemonBasic(
+            id=p['id'],
+            name=p['name'],
+            types=p['types'],
+            sprite=p['sprite_official'] or p['sprite_default'],
+            height=p['height'],
+            weight=p['weight'],
+            stats_total=p['stats_total'],
+            is_captured=p['is_captured']
+        )
+    
+    @staticmethod
+    def compact_sprites(p: Dict[str, Any]) -> Dict[str, Any]:
+        """Sprites object with only the URLs the UI uses, in the PokeAPI shape"""
+        return {
+            'front_default': p['sprite_default'],
+            'other': {'official-artwork': {'front_default': p['sprite_official']}}
+        }
+    
+    @staticmethod
+    def to_detail(p: Dict[str, Any], is_captured: bool = False, nickname: Optional[str] = None) -> PokemonDetail:
+        """Build a Pokemon detail from a full pokemon row"""
+        # Transform stats to PokemonStat objects
+        stats = [
+            PokemonStat(name='hp', base_stat=p['stats_hp']),
+            PokemonStat(name='attack', base_stat=p['stats_attack']),
+            PokemonStat(name='defense', base_stat=p['stats_defense']),
+            PokemonStat(name='special-attack', base_stat=p['stats_special_attack']),
+            PokemonStat(name='special-defense', base_stat=p['stats_special_defense']),
+            PokemonStat(name='speed', base_stat=p['stats_speed']),
+        ]
+        
+        # The sprites blob is only in the row when a client asked for it
+        sprites = p.get('sprites')
+        if sprites is None:
+            sprites = PokemonService.compact_sprites(p)
+        elif isinstance(sprites, str):
+            sprites = json.loads(sprites)
+        
+        # Parse JSON strings from database
+        abilities = p.get('abilities', [])
+        if isinstance(abilities, str):
+            abilities = json.loads(abilities)
+        
+        return PokemonDetail(
+            id=p['id'],
+            name=p['name'],
+            types=p['types'],
+            sprites=sprites,
+            height=p['height'],
+            weight=p['weight'],
+            stats=stats,
+            stats_total=p['stats_total'],
+            abilities=abilities,
+            base_experience=p.get('base_experience'),
+            is_captured=is_captured,
+            nickname=nickname,
+            description=p.get('description')
+        )
+    
+    @staticmethod
+    def _unique_ids(pokemon_ids: List[int]) -> List[int]:
+        """Drop repeated IDs while keeping request order"""
+        return list(dict.fromkeys(pokemon_ids))
+    
+    @staticmethod
+    async def capture_pokemon_batch(
+        repos: Repositories,
+        trainer_id: str,
+        pokemon_ids: List[int],
+        nickname: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Capture several Pokemon for a trainer in a single write
+        
+        Unknown IDs are resolved against the in-memory catalog, then all rows are
+        inserted with ON CONFLICT DO NOTHING on (trainer_id, pokemon_id). Only
+        newly inserted rows come back, so every other ID was already captured.
+        
+        Returns one outcome per unique ID: captured, already_captured or not_found
+        """
+        pokemon_ids = PokemonService._unique_ids(pokemon_ids)
+        catalog = await CatalogService.get_many(repos.pokemon, pokemon_ids)
+        
+        inserted_ids = set()
+        if catalog:
+            inserted_ids = set(await repos.captures.add_captures(trainer_id, list(catalog), nickname))
+        
+        outcomes = []
+        for pokemon_id in pokemon_ids:
+            pokemon = catalog.get(pokemon_id)
+            if pokemon is None:
+                outcome_status = 'not_found'
+            elif pokemon_id in inserted_ids:
+                outcome_status = 'captured'
+            else:
+                outcome_status = 'already_captured'
+            outcomes.append({
+                'pokemon_id': pokemon_id,
+                'status': outcome_status,
+                'pokemon_name': pokemon['name'] if pokemon else None
+            })
+        
+        return outcomes
+    
+    @staticmethod
+    async def release_pokemon_batch(
+        repos: Repositories,
+        trainer_id: str,
+        pokemon_ids: List[int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Release several captured Pokemon in a single write
+        
+        The delete returns the removed rows, so any other ID was not in the
+        trainer's collection (or does not exist in the catalog).
+        
+        Returns one outcome per unique ID: released, not_captured or not_found
+        """
+        pokemon_ids = PokemonService._unique_ids(pokemon_ids)
+        catalog = await CatalogService.get_many(repos.pokemon, pokemon_ids)
+        
+        deleted_ids = set()
+        if catalog:
+            deleted_ids = set(await repos.captures.remove_captures(trainer_id, list(catalog)))
+        
+        outcomes = []
+        for pokemon_id in pokemon_ids:
+            pokemon = catalog.get(pokemon_id)
+            if pokemon is None:
+                outcome_status = 'not_found'
+            elif pokemon_id in deleted_ids:
+                outcome_status = 'released'
+            else:
+                outcome_status = 'not_captured'
+            outcomes.append({
+                'pokemon_id': pokemon_id,
+                'status': outcome_status,
+                'pokemon_name': pokemon['name'] if pokemon else None
+            })
+        
+        return outcomes
+    
+    @staticmethod
+    async def capture_pokemon(
+        repos: Repositories,
+        trainer_id: str,
+        pokemon_id: int,
+        nickname: Optional[str] = None
+    ):
         """Capture a Pokemon for a trainer"""
         try:
-            # Check if Pokemon exists
-            pokemon_response = supabase.table('pokemon').select('id, name').eq('id', pokemon_id).execute()
-            if not pokemon_response.data:
+            outcome = (await PokemonService.capture_pokemon_batch(repos, trainer_id, [pokemon_id], nickname))[0]
+            
+            if outcome['status'] == 'not_found':
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Pokemon with ID {pokemon_id} not found"
                 )
             
-            pokemon_name = pokemon_response.data[0]['name']
+            pokemon_name = outcome['pokemon_name']
             
-            # Check if already captured
-            existing = supabase.table('captured_pokemon').select('id').eq('trainer_id', trainer_id).eq('pokemon_id', pokemon_id).execute()
-            if existing.data:
+            if outcome['status'] == 'already_captured':
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"You have already captured {pokemon_name.capitalize()}!"
                 )
             
-            # Insert capture record
-            capture_data = {
-                'trainer_id': trainer_id,
-                'pokemon_id': pokemon_id,
-                'nickname': nickname
-            }
-            response = supabase.table('captured_pokemon').insert(capture_data).execute()
-            
             return {
                 'message': f'Successfully captured {pokemon_name.capitalize()}!',
                 'pokemon_id': pokemon_id,
                 'pokemon_name': pokemon_name
             }
-            
+        
         except HTTPException:
             raise
         except Exception as e:
@@ -312,34 +388,29 @@ class PokemonService:
             )
     
     @staticmethod
-    async def release_pokemon(trainer_id: str, pokemon_id: int):
+    async def release_pokemon(repos: Repositories, trainer_id: str, pokemon_id: int):
         """Release a captured Pokemon"""
         try:
-            # Check if Pokemon is captured
-            existing = supabase.table('captured_pokemon').select('id').eq('trainer_id', trainer_id).eq('pokemon_id', pokemon_id).execute()
-            if not existing.data:
+            outcome = (await PokemonService.release_pokemon_batch(repos, trainer_id, [pokemon_id]))[0]
+            
+            if outcome['status'] != 'released':
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Pokemon not found in your collection"
                 )
             
-            # Get Pokemon name
-            pokemon_response = supabase.table('pokemon').select('name').eq('id', pokemon_id).execute()
-            pokemon_name = pokemon_response.data[0]['name'] if pokemon_response.data else "Pokemon"
-            
-            # Delete capture record
-            supabase.table('captured_pokemon').delete().eq('trainer_id', trainer_id).eq('pokemon_id', pokemon_id).execute()
+            pokemon_name = outcome['pokemon_name']
             
             return {
                 'message': f'Released {pokemon_name.capitalize()}!',
                 'pokemon_id': pokemon_id,
                 'pokemon_name': pokemon_name
             }
-            
+        
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to release Pokemon: {str(e)}"
-            )
\ No newline at end of file
+            )
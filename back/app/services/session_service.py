@@ -0,0 +1,125 @@
+"""
+Session service - Issues access tokens and rotating refresh tokens
+Refresh tokens are stored hashed in the refresh_tokens table
+(see sql/003_refresh_tokens.sql)
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import HTTPException, status
+from app.config import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS, REFRESH_REUSE_GRACE_SECONDS
+from app.models.user import Token
+from app.repositories.base import Repositories
+from app.utils.auth import create_access_token, create_refresh_token, hash_refresh_token
+
+class SessionService:
+    """Service for access/refresh token sessions"""
+    
+    @staticmethod
+    async def create_session_tokens(
+        repos: Repositories,
+        trainer_id: str,
+        family_id: Optional[str] = None
+    ) -> Token:
+        """
+        Issue an access token and a new refresh token
+        A new token family is started unless family_id (from a rotation) is given
+        """
+        refresh_token = create_refresh_token()
+        expires_at = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        
+        await repos.trainers.create_refresh_token({
+            'token_hash': hash_refresh_token(refresh_token),
+            'trainer_id': trainer_id,
+            'family_id': family_id or str(uuid.uuid4()),
+            'expires_at': expires_at.isoformat()
+        })
+        
+        access_token = create_access_token(
+            data={"sub": trainer_id},
+            expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        
+        return Token(access_token=access_token, token_type="bearer", refresh_token=refresh_token)
+    
+    @staticmethod
+    async def revoke_family(repos: Repositories, family_id: str):
+        """Revoke every live refresh token in a family"""
+        await repos.trainers.revoke_refresh_token_family(
+            family_id,
+            datetime.now(timezone.utc).isoformat()
+        )
+    
+    @staticmethod
+    def recently_revoked(session: dict, now: datetime) -> bool:
+        """Check if a refresh token was revoked within the reuse grace window"""
+        revoked_at = session.get('revoked_at')
+        if not revoked_at:
+            return False
+        elapsed = now - datetime.fromisoformat(revoked_at)
+        return elapsed.total_seconds() < REFRESH_REUSE_GRACE_SECONDS
+    
+    @staticmethod
+    async def refresh_session(repos: Repositories, refresh_token: str) -> Token:
+        """
+        Exchange a refresh token for a new access token and refresh token
+        
+        The presented token is revoked with a conditional update, so only one
+        concurrent refresh can win. Reusing an already revoked token is treated
+        as theft and revokes the whole token family, unless it was rotated less
+        than REFRESH_REUSE_GRACE_SECONDS ago: that is a concurrent refresh from
+        another tab, which only gets a 401.
+        """
+        invalid_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        try:
+            token_hash = hash_refresh_token(refresh_token)
+            now = datetime.now(timezone.utc)
+            
+            # Revoke the presented token if it is still live
+            session = await repos.trainers.revoke_refresh_token(token_hash, now.isoformat())
+            
+            if session is None:
+                # Unknown token, or one that was already used
+                existing = await repos.trainers.get_refresh_token(token_hash)
+                if existing and not SessionService.recently_revoked(existing, now):
+                    await SessionService.revoke_family(repos, existing['family_id'])
+                raise invalid_exception
+            
+            if datetime.fromisoformat(session['expires_at']) <= now:
+                raise invalid_exception
+            
+            return await SessionService.create_session_tokens(
+                repos,
+                session['trainer_id'],
+                session['family_id']
+            )
+        
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to refresh session: {str(e)}"
+            )
+    
+    @staticmethod
+    async def revoke_session(repos: Repositories, refresh_token: str, trainer_id: str):
+        """Revoke the refresh token family a refresh token belongs to"""
+        try:
+            session = await repos.trainers.get_refresh_token(hash_refresh_token(refresh_token))
+            
+            if session and session['trainer_id'] == trainer_id:
+                await SessionService.revoke_family(repos, session['family_id'])
+        
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to revoke session: {str(e)}"
+            )
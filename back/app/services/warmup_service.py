@@ -0,0 +1,80 @@
+"""
+Warmup service - Fills the catalog and facet caches when the process starts
+Until it has succeeded once, /ready answers 503 so a load balancer or a
+rolling deploy doesn't send traffic to a process whose first requests would
+all miss the caches.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from app.repositories.base import Repositories
+from app.services.catalog_service import CatalogService
+from app.services.pokemon_service import PokemonService
+
+class WarmupService:
+    """Service warming the caches the read endpoints rely on"""
+    
+    # Seconds between attempts while the data store can't be reached
+    RETRY_INTERVAL = 5
+    
+    _ready_at: Optional[float] = None
+    _started_at: float = time.monotonic()
+    _attempts = 0
+    _last_error: Optional[str] = None
+    
+    # Duration in milliseconds of each step of the last successful attempt
+    _steps: Dict[str, float] = {}
+    
+    @staticmethod
+    async def warm(repos: Repositories):
+        """Load the catalog and the filter facets (raises if the data store fails)"""
+        steps = [
+            ('catalog', lambda: CatalogService.load(repos.pokemon)),
+            ('types', lambda: PokemonService.get_available_types(repos)),
+            ('regions', lambda: PokemonService.get_available_regions(repos)),
+            ('habitats', lambda: PokemonService.get_available_habitats(repos)),
+        ]
+        timings = {}
+        for name, step in steps:
+            start = time.perf_counter()
+            await step()
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        WarmupService._steps = timings
+    
+    @staticmethod
+    async def warm_until_ready(repos: Repositories):
+        """Retry the warmup until it succeeds (run as a background task of the lifespan)"""
+        WarmupService._started_at = time.monotonic()
+        while True:
+            WarmupService._attempts += 1
+            try:
+                await WarmupService.warm(repos)
+            except Exception as e:
+                WarmupService._last_error = str(e) or type(e).__name__
+                print(f"Warmup attempt {WarmupService._attempts} failed: {WarmupService._last_error}")
+                await asyncio.sleep(WarmupService.RETRY_INTERVAL)
+                continue
+            
+            WarmupService._ready_at = time.monotonic()
+            WarmupService._last_error = None
+            elapsed = WarmupService._ready_at - WarmupService._started_at
+            print(f"Warmup done in {elapsed * 1000:.0f}ms: {WarmupService._steps}")
+            return
+    
+    @staticmethod
+    def is_ready() -> bool:
+        return WarmupService._ready_at is not None
+    
+    @staticmethod
+    def status() -> Dict[str, Any]:
+        """Get the readiness of the process and how long the warmup took"""
+        ready_at = WarmupService._ready_at
+        return {
+            'ready': ready_at is not None,
+            'attempts': WarmupService._attempts,
+            'warmup_ms': round((ready_at - WarmupService._started_at) * 1000, 1) if ready_at else None,
+            'steps': WarmupService._steps,
+            'catalog_size': CatalogService.stats()['size'],
+            'last_error': WarmupService._last_error
+        }
@@ -1,25 +1,84 @@
+import asyncio
+import hashlib
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config import (
+    ADMIN_TOKEN,
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_PENDING
+)
 from app.models.user import TokenData
+from app.utils.token_cache import token_cache
+
+# Tokens without an expiry are rejected: the token cache and revocations are keyed on 'exp'
+JWT_DECODE_OPTIONS = {"require_exp": True}
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with a different cost than BCRYPT_ROUNDS are flagged for rehashing
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+# bcrypt is CPU bound, so it runs on a small dedicated pool instead of the event loop.
+# At most PASSWORD_HASH_MAX_PENDING hashes may be running or queued at once.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def _run_password_hash(func, *args):
+    """
+    Run a password hashing function on the hashing pool
+    Raises 503 when the pool is saturated instead of queueing without limit
+    """
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = _hash_executor.submit(func, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    # Release the slot when the work finishes, even if the request was cancelled
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return await _run_password_hash(pwd_context.verify, plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and rehash it if its bcrypt cost differs from BCRYPT_ROUNDS
+    Returns: (is_valid, new_hash or None)
+    """
+    return await _run_password_hash(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return await _run_password_hash(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
@@ -32,19 +91,58 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token() -> str:
+    """Create a random opaque refresh token"""
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token(refresh_token: str) -> str:
+    """
+    Hash a refresh token for storage
+    Refresh tokens are long random strings, so a fast hash is enough (no bcrypt)
+    """
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
-    """Get current authenticated user from JWT token"""
+    """
+    Get current authenticated user from JWT token
+    Tokens are fully verified once, then served from the verified-token cache
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        trainer_id: str = payload.get("sub")
-        if trainer_id is None:
+    token_digest = token_cache.digest(token)
+    trainer_id = token_cache.get(token_digest)
+    
+    if trainer_id is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options=JWT_DECODE_OPTIONS)
+            subject = payload.get("sub")
+            if subject is None:
+                raise credentials_exception
+            token_data = TokenData(trainer_id=subject)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(trainer_id=trainer_id)
-    except JWTError:
+        
+        trainer_id = token_data.trainer_id
+        token_cache.put(token_digest, trainer_id, payload["exp"])
+    
+    if await token_cache.is_revoked(token_digest, trainer_id):
         raise credentials_exception
-    return token_data.trainer_id
\ No newline at end of file
+    return trainer_id
+
+async def revoke_access_token(token: str):
+    """Reject an access token for the rest of its lifetime (on every worker with a shared revocation store)"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options=JWT_DECODE_OPTIONS)
+    except JWTError:
+        return  # Invalid tokens are rejected anyway
+    await token_cache.revoke(token_cache.digest(token), payload["exp"])
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Check the admin token (X-Admin-Token); admin endpoints don't exist when ADMIN_TOKEN is unset"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
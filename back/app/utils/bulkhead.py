@@ -0,0 +1,115 @@
+"""
+Bulkheads: separate pools for the blocking data client calls of each kind of traffic
+The Supabase and SQLite clients are synchronous and run in threads. Instead of
+sharing the threadpool, auth, catalog and gameplay calls each get their own
+threads, so a burst of slow catalog scans can't hold up logins. A call waits
+at most BULKHEAD_MAX_WAIT for a free slot, then the request gets a 503.
+
+A slot is held until the thread returns, even when the request stopped waiting
+for it (breaker timeout, deadline, client gone): the thread still holds its
+data store connection, so the bulkhead keeps counting it.
+
+Routers pick the bulkhead of their requests with Depends(use_bulkhead(name));
+calls made outside a request (background reloads) use the catalog bulkhead.
+"""
+
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Set
+import anyio
+from fastapi import HTTPException, status
+from app.config import (
+    BULKHEAD_AUTH_SIZE,
+    BULKHEAD_CATALOG_SIZE,
+    BULKHEAD_GAMEPLAY_SIZE,
+    BULKHEAD_MAX_WAIT
+)
+from app.utils.metrics import registry, Counter
+
+bulkhead_rejected = registry.register(Counter(
+    "bulkhead_rejected_total", "Data store calls rejected after waiting for a bulkhead slot", ["bulkhead"]
+))
+
+class Bulkhead:
+    """A bounded pool of threads for one kind of traffic"""
+    
+    registry: List["Bulkhead"] = []
+    
+    def __init__(self, name: str, size: int, max_wait: float):
+        self.name = name
+        self.size = size
+        self.max_wait = max_wait
+        # Slots are taken with a timeout before running, so the threads never have a queue
+        self._slots = anyio.CapacityLimiter(size)
+        self._threads = anyio.CapacityLimiter(size)
+        # Calls still running in a thread, referenced so they aren't garbage collected
+        self._calls: Set[asyncio.Task] = set()
+        self.waiting = 0
+        self.rejected = 0
+        Bulkhead.registry.append(self)
+    
+    @property
+    def in_flight(self) -> int:
+        return self._slots.borrowed_tokens
+    
+    async def run_sync(self, func: Callable[..., Any], *args) -> Any:
+        """Run a blocking call in this bulkhead's threads"""
+        slot = object()
+        self.waiting += 1
+        try:
+            with anyio.move_on_after(self.max_wait) as scope:
+                await self._slots.acquire_on_behalf_of(slot)
+        finally:
+            self.waiting -= 1
+        if scope.cancelled_caught:
+            self.rejected += 1
+            bulkhead_rejected.inc(bulkhead=self.name)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        
+        # The call owns the slot: if the caller is cancelled, the shield lets the
+        # thread run to the end and the slot is only released then
+        call = asyncio.ensure_future(self._run(slot, func, args))
+        self._calls.add(call)
+        call.add_done_callback(self._call_done)
+        return await asyncio.shield(call)
+    
+    async def _run(self, slot: object, func: Callable[..., Any], args) -> Any:
+        try:
+            return await anyio.to_thread.run_sync(func, *args, limiter=self._threads)
+        finally:
+            self._slots.release_on_behalf_of(slot)
+    
+    def _call_done(self, call: asyncio.Task):
+        self._calls.discard(call)
+        # Nobody awaits the result of an abandoned call, so retrieve its error here
+        if not call.cancelled():
+            call.exception()
+    
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": self.in_flight, "size": self.size, "waiting": self.waiting, "rejected": self.rejected}
+
+BULKHEADS = {
+    "auth": Bulkhead("auth", BULKHEAD_AUTH_SIZE, BULKHEAD_MAX_WAIT),
+    "catalog": Bulkhead("catalog", BULKHEAD_CATALOG_SIZE, BULKHEAD_MAX_WAIT),
+    "gameplay": Bulkhead("gameplay", BULKHEAD_GAMEPLAY_SIZE, BULKHEAD_MAX_WAIT),
+}
+
+_current_bulkhead: ContextVar[str] = ContextVar("bulkhead", default="catalog")
+
+def current_bulkhead() -> Bulkhead:
+    """Get the bulkhead of the request being handled"""
+    return BULKHEADS[_current_bulkhead.get()]
+
+def use_bulkhead(name: str):
+    """Router or route dependency sending the request's data store calls to a bulkhead"""
+    if name not in BULKHEADS:
+        raise ValueError(f"Unknown bulkhead: {name}")
+    
+    async def dependency():
+        # Async so it runs in the request's context, not in the threadpool
+        _current_bulkhead.set(name)
+    return dependency
@@ -0,0 +1,184 @@
+"""
+Circuit breakers around the data store
+After BREAKER_FAILURE_THRESHOLD consecutive failures a breaker opens and
+rejects calls at once with a 503, instead of letting every request wait for
+a struggling database. After BREAKER_RESET_SECONDS one trial call goes
+through (half open): its success closes the breaker, its failure reopens it.
+
+Only failures of the data store itself count: timeouts, plus the errors the
+backend's is_failure tells apart (connection errors, server errors). Errors
+caused by the request (constraint conflicts, bad input) pass through, so
+clients can't open a breaker for everyone by sending bad requests.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+from fastapi import HTTPException, status
+from app.utils.deadline import get_remaining
+from app.utils.metrics import registry, Counter, Gauge
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Values of the state gauge
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+breaker_state = registry.register(Gauge(
+    "circuit_breaker_state", "State of a circuit breaker (0 closed, 1 half open, 2 open)", ["breaker"]
+))
+breaker_transitions = registry.register(Counter(
+    "circuit_breaker_transitions_total", "Circuit breaker state changes", ["breaker", "state"]
+))
+breaker_rejected = registry.register(Counter(
+    "circuit_breaker_rejected_total", "Calls rejected by an open circuit breaker", ["breaker"]
+))
+breaker_timeouts = registry.register(Counter(
+    "circuit_breaker_timeouts_total", "Calls cut off by a circuit breaker timeout", ["breaker"]
+))
+deadline_exceeded = registry.register(Counter(
+    "datastore_deadline_exceeded_total", "Data store calls cut off or skipped by the request deadline", ["breaker"]
+))
+
+class DataStoreUnavailable(HTTPException):
+    """A data store call was rejected by an open breaker or timed out (503)"""
+    
+    def __init__(self, breaker: str, reason: str, retry_after: float = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The database is unavailable, please try again shortly",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        self.breaker = breaker
+        self.reason = reason
+
+class CircuitBreaker:
+    """Breaker for one dependency and class of operations"""
+    
+    registry: List["CircuitBreaker"] = []
+    
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        call_timeout: Optional[float] = None,
+        is_failure: Optional[Callable[[Exception], bool]] = None
+    ):
+        self.name = name
+        # Without a classifier only timeouts count as failures
+        self.is_failure = is_failure or (lambda error: False)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout or None
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        breaker_state.set(STATE_VALUES[CLOSED], breaker=name)
+        CircuitBreaker.registry.append(self)
+    
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        breaker_state.set(STATE_VALUES[state], breaker=self.name)
+        breaker_transitions.inc(breaker=self.name, state=state)
+    
+    def _acquire(self) -> bool:
+        """Check if a call may go through; returns True for the half open trial call"""
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        
+        breaker_rejected.inc(breaker=self.name)
+        raise DataStoreUnavailable(self.name, "open", max(remaining, 1))
+    
+    def _release(self, probe: bool):
+        """Let another trial call through, when one ended without telling anything"""
+        if probe:
+            with self._lock:
+                self._probing = False
+    
+    def _on_success(self, probe: bool):
+        with self._lock:
+            self.failures = 0
+            if probe:
+                self._probing = False
+                self._transition(CLOSED)
+    
+    def _on_failure(self, probe: bool):
+        with self._lock:
+            self.failures += 1
+            if probe:
+                self._probing = False
+            if probe or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+    
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run a data store call through the breaker
+        The call is cut off at the breaker's timeout or the request deadline,
+        whichever comes first; only the breaker's own timeout counts as a failure
+        """
+        remaining = get_remaining()
+        if remaining is not None and remaining <= 0:
+            deadline_exceeded.inc(breaker=self.name)
+            raise DataStoreUnavailable(self.name, "deadline")
+        
+        timeout = self.call_timeout
+        by_deadline = remaining is not None and (timeout is None or remaining < timeout)
+        if by_deadline:
+            timeout = remaining
+        
+        probe = self._acquire()
+        try:
+            if timeout:
+                # A query running in the threadpool finishes on its own, the request doesn't wait for it
+                result = await asyncio.wait_for(func(*args, **kwargs), timeout)
+            else:
+                result = await func(*args, **kwargs)
+        except asyncio.TimeoutError:
+            if by_deadline:
+                deadline_exceeded.inc(breaker=self.name)
+                self._release(probe)
+                raise DataStoreUnavailable(self.name, "deadline")
+            breaker_timeouts.inc(breaker=self.name)
+            self._on_failure(probe)
+            raise DataStoreUnavailable(self.name, "timeout")
+        except HTTPException:
+            # Shed before reaching the data store (bulkhead full): says nothing about its health
+            self._release(probe)
+            raise
+        except Exception as e:
+            if self.is_failure(e):
+                self._on_failure(probe)
+            else:
+                # The data store answered: the error is the request's, not a sign of an outage
+                self._release(probe)
+            raise
+        except BaseException:
+            # Cancelled by the client: neither a success nor a failure
+            self._release(probe)
+            raise
+        self._on_success(probe)
+        return result
+    
+    def stats(self) -> dict:
+        return {
+            'state': self.state,
+            'failures': self.failures
+        }
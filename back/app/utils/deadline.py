@@ -0,0 +1,56 @@
+"""
+Per-request deadlines for data store calls
+RequestDeadlineMiddleware gives every request REQUEST_DEADLINE_SECONDS,
+routes can shorten it with Depends(request_deadline(seconds)). Data store
+calls are cut off when the deadline passes (see app/utils/circuit_breaker.py).
+Streamed response bodies drop it (clear_deadline) once the response has started.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+from app.config import REQUEST_DEADLINE_SECONDS
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+def get_remaining() -> Optional[float]:
+    """Get the seconds left before the current request's deadline (None without deadline)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def set_deadline(seconds: float):
+    """Set the deadline of the current request, never extending an earlier one"""
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is None or deadline < current:
+        _deadline.set(deadline)
+
+def clear_deadline():
+    """Drop the deadline in a background task (tasks copy the context of the request starting them)"""
+    _deadline.set(None)
+
+def request_deadline(seconds: float):
+    """Route dependency giving the request a shorter deadline"""
+    async def dependency():
+        # Async so it runs in the request's context, not in the threadpool
+        set_deadline(seconds)
+    return dependency
+
+class RequestDeadlineMiddleware:
+    """ASGI middleware starting the default deadline of every request"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        token = _deadline.set(time.monotonic() + REQUEST_DEADLINE_SECONDS)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
@@ -0,0 +1,151 @@
+"""
+Hedged reads: a second copy of a slow idempotent read, first success wins
+Latencies of each operation are tracked, and a hedge is sent when a read
+takes longer than HEDGE_PERCENTILE of them. Hedges are paid from a budget
+that grows by HEDGE_BUDGET_PERCENT per read, so they stay a bounded share of
+the traffic even when the data store is slow for everyone.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from app.config import HEDGE_PERCENTILE, HEDGE_MIN_DELAY_MS, HEDGE_BUDGET_PERCENT
+from app.utils.deadline import get_remaining
+from app.utils.metrics import registry, Counter
+
+hedged_reads = registry.register(Counter(
+    "hedged_reads_total", "Hedged reads by outcome (sent, won, skipped_budget)", ["operation", "result"]
+))
+
+class LatencyTracker:
+    """Recent latencies of one operation, with a cached percentile"""
+    
+    # Latencies kept, and new samples between percentile updates
+    WINDOW = 500
+    REFRESH_EVERY = 25
+    
+    # Samples needed before hedging (the percentile means little before)
+    MIN_SAMPLES = 50
+    
+    def __init__(self, percentile: float):
+        self.percentile = percentile
+        self.samples: Deque[float] = deque(maxlen=self.WINDOW)
+        self.threshold: Optional[float] = None
+        self._since_refresh = 0
+    
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self._since_refresh += 1
+        if self._since_refresh >= self.REFRESH_EVERY and len(self.samples) >= self.MIN_SAMPLES:
+            ordered = sorted(self.samples)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            self.threshold = ordered[index]
+            self._since_refresh = 0
+
+class HedgeBudget:
+    """Hedges allowed per read, with a small burst"""
+    
+    MAX_TOKENS = 10.0
+    
+    def __init__(self, percent: float):
+        self.ratio = percent / 100
+        self.tokens = 1.0 if self.ratio > 0 else 0.0
+        self._lock = threading.Lock()
+    
+    def earn(self):
+        with self._lock:
+            self.tokens = min(self.MAX_TOKENS, self.tokens + self.ratio)
+    
+    def spend(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class HedgedReader:
+    """Runs reads with a hedge after the latency percentile of their operation"""
+    
+    def __init__(self, percentile: float, min_delay: float, budget_percent: float):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.budget = HedgeBudget(budget_percent)
+        self.trackers: Dict[str, LatencyTracker] = {}
+        
+        # Reads, hedges sent, hedges that answered first, hedges skipped for lack of budget
+        self.reads = 0
+        self.sent = 0
+        self.won = 0
+        self.skipped = 0
+    
+    def delay(self, operation: str) -> Optional[float]:
+        """Seconds to wait before hedging an operation (None while there's too little data)"""
+        tracker = self.trackers.get(operation)
+        if tracker is None or tracker.threshold is None:
+            return None
+        return max(tracker.threshold, self.min_delay)
+    
+    async def read(self, operation: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run an idempotent read, hedging it if it's slow"""
+        tracker = self.trackers.get(operation)
+        if tracker is None:
+            tracker = self.trackers[operation] = LatencyTracker(self.percentile)
+        self.budget.earn()
+        self.reads += 1
+        
+        delay = self.delay(operation)
+        remaining = get_remaining()
+        start = time.monotonic()
+        primary = asyncio.ensure_future(func(*args, **kwargs))
+        
+        # No hedge without a latency estimate, or if the deadline would pass first
+        if delay is None or (remaining is not None and remaining <= delay):
+            result = await primary
+            tracker.observe(time.monotonic() - start)
+            return result
+        
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                result = primary.result()
+                tracker.observe(time.monotonic() - start)
+                return result
+            
+            if not self.budget.spend():
+                self.skipped += 1
+                hedged_reads.inc(operation=operation, result="skipped_budget")
+                result = await primary
+                tracker.observe(time.monotonic() - start)
+                return result
+            
+            self.sent += 1
+            hedged_reads.inc(operation=operation, result="sent")
+            hedge = asyncio.ensure_future(func(*args, **kwargs))
+            result = await self._first_success(operation, primary, hedge)
+            tracker.observe(time.monotonic() - start)
+            return result
+        finally:
+            if not primary.done():
+                primary.cancel()
+    
+    async def _first_success(self, operation: str, primary: asyncio.Task, hedge: asyncio.Task) -> Any:
+        """Get the result of whichever read succeeds first (the error of the last one if both fail)"""
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.won += 1
+                            hedged_reads.inc(operation=operation, result="won")
+                        return task.result()
+                if not pending:
+                    raise next(iter(done)).exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+hedged_reader = HedgedReader(HEDGE_PERCENTILE, HEDGE_MIN_DELAY_MS / 1000, HEDGE_BUDGET_PERCENT)
@@ -0,0 +1,258 @@
+"""
+Metrics in the Prometheus text format, served on /metrics
+Small in-process counters, gauges and histograms (no client library needed).
+Values are per process: with several uvicorn workers each one reports its own.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Default latency buckets in seconds (the Prometheus client defaults)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Data store calls are usually much faster than whole requests
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    """Render label pairs as {name="value",...}"""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric(ABC):
+    """Base class of a metric family with labels"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+    
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """Get (name suffix, rendered labels, value) of every sample"""
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    """Value that only goes up"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def set(self, value: float, **labels):
+        """Copy the total of a counter kept elsewhere (by collectors); it resets with the process"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+    
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("", format_labels(self.label_names, key), value) for key, value in items]
+
+class Gauge(Metric):
+    """Value that goes up and down"""
+    
+    kind = "gauge"
+    
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+    
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+    
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("", format_labels(self.label_names, key), value) for key, value in items]
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Tuple[float, ...] = REQUEST_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labels -> ([count per bucket], sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+    
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(entry[0]), entry[1], entry[2])) for key, entry in self._values.items())
+        samples = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = format_labels(self.label_names + ("le",), key + (format_value(bound),))
+                samples.append(("_bucket", labels, cumulative))
+            labels = format_labels(self.label_names, key)
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, count))
+        return samples
+
+class MetricsRegistry:
+    """The metrics of the process, plus collectors refreshed when scraped"""
+    
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], None]] = []
+    
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+    
+    def add_collector(self, collector: Callable[[], None]):
+        """Run a function before every scrape (to copy stats kept elsewhere into metrics)"""
+        self.collectors.append(collector)
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being handled", ["method"]
+))
+datastore_queries = registry.register(Counter(
+    "datastore_queries_total", "Data store calls", ["backend", "table", "operation", "outcome"]
+))
+datastore_query_duration = registry.register(Histogram(
+    "datastore_query_duration_seconds", "Data store call latency",
+    ["backend", "table", "operation"], QUERY_BUCKETS
+))
+cache_requests = registry.register(Counter(
+    "cache_requests_total", "Cache lookups", ["cache", "result"]
+))
+cache_hit_ratio = registry.register(Gauge(
+    "cache_hit_ratio", "Share of cache lookups that were hits", ["cache"]
+))
+cache_entries = registry.register(Gauge(
+    "cache_entries", "Entries held by a cache", ["cache"]
+))
+rate_limit_requests = registry.register(Counter(
+    "rate_limit_requests_total", "Requests checked by a rate limiter", ["limiter", "result"]
+))
+concurrency_in_flight = registry.register(Gauge(
+    "concurrency_limit_in_flight", "Requests holding a concurrency limiter slot", ["limiter"]
+))
+
+def record_cache_stats(cache: str, hits: int, misses: int, entries: Optional[int] = None):
+    """Publish the counters of a cache (called by collectors)"""
+    cache_requests.set(hits, cache=cache, result="hit")
+    cache_requests.set(misses, cache=cache, result="miss")
+    cache_hit_ratio.set(hits / (hits + misses) if hits + misses else 0.0, cache=cache)
+    if entries is not None:
+        cache_entries.set(entries, cache=cache)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status codes and in-flight requests
+    Routes are labelled with their template (/pokemon/{pokemon_id}), and
+    requests matching no route with 'unmatched', to keep label values bounded
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        http_requests_in_flight.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec(method=method)
+            
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            http_requests.inc(method=method, route=route_path, status=str(status_code))
+            http_request_duration.observe(elapsed, method=method, route=route_path)
@@ -0,0 +1,187 @@
+"""
+On-demand request profiling
+An admin arms the profiler for the next N requests whose path matches a
+pattern (see app/routers/profiling.py). Those requests run under cProfile and
+their profiles are kept in a bounded ring buffer, downloadable as pstats files.
+While disarmed the middleware only checks a flag before passing requests on.
+
+cProfile follows the event loop thread: other requests interleaving with a
+profiled one show up in its profile, and sync dependencies or endpoints run
+on the threadpool do not. Only one request is profiled at a time per worker.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, List, Optional
+from app.config import PROFILE_BUFFER_SIZE
+
+class CapturedProfile:
+    """Profile of one request"""
+    
+    def __init__(self, profile_id: int, method: str, path: str, route: str,
+                 status_code: int, duration: float, profile: cProfile.Profile):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.route = route
+        self.status_code = status_code
+        self.duration = duration
+        self.created_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.profile = profile
+    
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status_code": self.status_code,
+            "duration_ms": round(self.duration * 1000, 2),
+            "created_at": self.created_at
+        }
+    
+    def to_pstats(self) -> bytes:
+        """The profile in the binary pstats format (python -m pstats, snakeviz, ...)"""
+        return marshal.dumps(self.profile.stats)
+    
+    def to_text(self, sort: str = "cumulative", limit: int = 40) -> str:
+        """The top functions of the profile as printed by pstats"""
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+class RequestProfiler:
+    """Arming state and ring buffer of captured profiles"""
+    
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self.armed = False
+        self.path_pattern: Optional[str] = None
+        self.method: Optional[str] = None
+        self.remaining = 0
+        self._pattern: Optional[re.Pattern] = None
+        self._profiling = False
+        self._next_id = 1
+        self._profiles: Deque[CapturedProfile] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+    
+    def arm(self, path_pattern: str, method: Optional[str], count: int):
+        """Profile the next count requests matching the pattern (replaces any previous arming)"""
+        pattern = re.compile(path_pattern)
+        with self._lock:
+            self._pattern = pattern
+            self.path_pattern = path_pattern
+            self.method = method.upper() if method else None
+            self.remaining = count
+            self.armed = True
+    
+    def disarm(self):
+        with self._lock:
+            self.armed = False
+            self._pattern = None
+            self.path_pattern = None
+            self.method = None
+            self.remaining = 0
+    
+    def claim(self, method: str, path: str) -> bool:
+        """Check if a request should be profiled, and use up one of the remaining requests if so"""
+        with self._lock:
+            if not self.armed or self._profiling:
+                return False
+            if self.method and method != self.method:
+                return False
+            if not self._pattern.search(path):
+                return False
+            self._profiling = True
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.armed = False
+            return True
+    
+    def store(self, method: str, path: str, route: str, status_code: int,
+              duration: float, profile: cProfile.Profile):
+        with self._lock:
+            self._profiling = False
+            captured = CapturedProfile(self._next_id, method, path, route, status_code, duration, profile)
+            self._next_id += 1
+            self._profiles.append(captured)
+    
+    def release(self):
+        """Let another request be profiled (when a profile could not be captured)"""
+        with self._lock:
+            self._profiling = False
+    
+    def profiles(self) -> List[CapturedProfile]:
+        with self._lock:
+            return list(self._profiles)
+    
+    def get(self, profile_id: int) -> Optional[CapturedProfile]:
+        with self._lock:
+            for captured in self._profiles:
+                if captured.id == profile_id:
+                    return captured
+        return None
+    
+    def status(self) -> dict:
+        return {
+            "armed": self.armed,
+            "path_pattern": self.path_pattern,
+            "method": self.method,
+            "remaining": self.remaining,
+            "buffer_size": self.buffer_size,
+            "profiles": [captured.summary() for captured in self.profiles()]
+        }
+
+request_profiler = RequestProfiler(PROFILE_BUFFER_SIZE)
+
+class ProfilingMiddleware:
+    """ASGI middleware running claimed requests under cProfile"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if not request_profiler.armed or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method, path = scope["method"], scope["path"]
+        if not request_profiler.claim(method, path):
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler (a debugger, coverage...) is already active
+            request_profiler.release()
+            print(f"Error starting request profile: {e}")
+            await self.app(scope, receive, send)
+            return
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.disable()
+            duration = time.perf_counter() - start
+            profile.create_stats()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            request_profiler.store(method, path, route, status_code, duration, profile)
@@ -0,0 +1,238 @@
+"""
+Token bucket rate limiting and concurrency limits
+Buckets live in a pluggable backend: in-process memory by default, or Redis
+so that several uvicorn workers share the same limits. Concurrency limits
+count in-flight requests of the current worker.
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, Callable, Dict, List, Tuple
+from fastapi import HTTPException, Request, status
+from app.config import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_REDIS_URL,
+    LOGIN_IDENTITY_BURST,
+    LOGIN_IDENTITY_PER_MINUTE,
+    LOGIN_IP_BURST,
+    LOGIN_IP_PER_MINUTE,
+    CATCH_START_BURST,
+    CATCH_START_PER_MINUTE,
+    CATCH_START_MAX_CONCURRENCY,
+    CATCH_COMPLETE_BURST,
+    CATCH_COMPLETE_PER_MINUTE,
+    CATCH_COMPLETE_MAX_CONCURRENCY
+)
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets"""
+    
+    @abstractmethod
+    async def consume(self, key: str, capacity: float, refill_rate: float) -> Tuple[bool, float]:
+        """
+        Take one token from a bucket, refilling it first
+        Returns: (allowed, seconds until a token is available)
+        """
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets, evicting the least recently used past max_keys"""
+    
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+    
+    async def consume(self, key: str, capacity: float, refill_rate: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+        
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        
+        return allowed, 0.0 if allowed else (1 - tokens) / refill_rate
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets shared between workers, updated atomically by a Lua script"""
+    
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(retry_after)}
+    """
+    
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        # Imported here so Redis is only needed when this backend is used
+        import redis.asyncio as redis
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+    
+    async def consume(self, key: str, capacity: float, refill_rate: float) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(keys=[self.prefix + key], args=[capacity, refill_rate])
+        return bool(allowed), float(retry_after)
+
+def create_backend(name: str = RATE_LIMIT_BACKEND) -> RateLimitBackend:
+    """Create the configured rate limit backend"""
+    if name == "redis":
+        return RedisRateLimitBackend(RATE_LIMIT_REDIS_URL)
+    if name == "memory":
+        return InMemoryRateLimitBackend()
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+class TokenBucketLimiter:
+    """Named token bucket limit applied per key (trainer ID, IP, ...)"""
+    
+    # Every limiter created, for reporting
+    registry: List["TokenBucketLimiter"] = []
+    
+    def __init__(self, name: str, burst: int, per_minute: float, backend: RateLimitBackend):
+        # Both backends divide by the refill rate (Retry-After, Redis key expiry)
+        if per_minute <= 0:
+            raise ValueError(f"Rate limit {name} must refill: per_minute is {per_minute:g}")
+        self.name = name
+        self.capacity = burst
+        self.refill_rate = per_minute / 60
+        self.backend = backend
+        self.allowed = 0
+        self.rejected = 0
+        TokenBucketLimiter.registry.append(self)
+    
+    async def hit(self, key: str) -> float:
+        """Consume a token for key; returns 0 if allowed, otherwise seconds to wait"""
+        allowed, retry_after = await self.backend.consume(
+            f"{self.name}:{key}", self.capacity, self.refill_rate
+        )
+        if allowed:
+            self.allowed += 1
+            return 0.0
+        self.rejected += 1
+        return retry_after
+    
+    async def enforce(self, key: str):
+        """Consume a token for key or raise 429 with a Retry-After header"""
+        retry_after = await self.hit(key)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please try again later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+    
+    def stats(self) -> Dict[str, int]:
+        """Get allowed/rejected counters"""
+        return {"allowed": self.allowed, "rejected": self.rejected}
+
+class ConcurrencyLimiter:
+    """Caps the in-flight requests of an endpoint, shedding the excess with 503"""
+    
+    # Every limiter created, for reporting
+    registry: List["ConcurrencyLimiter"] = []
+    
+    def __init__(self, name: str, max_in_flight: int):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.rejected = 0
+        ConcurrencyLimiter.registry.append(self)
+    
+    def acquire(self):
+        """Take a slot or raise 503 if the endpoint is at capacity"""
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+    
+    def release(self):
+        """Give back a slot taken with acquire()"""
+        self.in_flight -= 1
+    
+    def stats(self) -> Dict[str, int]:
+        """Get in-flight and rejected counters"""
+        return {"in_flight": self.in_flight, "max_in_flight": self.max_in_flight, "rejected": self.rejected}
+
+def get_limiter_stats() -> Dict[str, Dict[str, int]]:
+    """Get counters of every rate and concurrency limiter, keyed by name"""
+    stats = {limiter.name: limiter.stats() for limiter in TokenBucketLimiter.registry}
+    stats.update({limiter.name: limiter.stats() for limiter in ConcurrencyLimiter.registry})
+    return stats
+
+rate_limit_backend = create_backend()
+
+login_ip_limiter = TokenBucketLimiter("login-ip", LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE, rate_limit_backend)
+login_identity_limiter = TokenBucketLimiter(
+    "login-identity", LOGIN_IDENTITY_BURST, LOGIN_IDENTITY_PER_MINUTE, rate_limit_backend
+)
+
+def get_client_ip(request: Request) -> str:
+    """Get the client IP of a request (run uvicorn with --proxy-headers behind a proxy)"""
+    return request.client.host if request.client else "unknown"
+
+async def enforce_login_rate_limit(client_ip: str, trainer_id: str):
+    """
+    Reject login/register attempts over the per-IP or per-trainer limit
+    Runs before any database lookup or bcrypt work
+    """
+    await login_ip_limiter.enforce(client_ip)
+    await login_identity_limiter.enforce(trainer_id.lower())
+
+catch_start_limiter = TokenBucketLimiter(
+    "catch-start", CATCH_START_BURST, CATCH_START_PER_MINUTE, rate_limit_backend
+)
+catch_complete_limiter = TokenBucketLimiter(
+    "catch-complete", CATCH_COMPLETE_BURST, CATCH_COMPLETE_PER_MINUTE, rate_limit_backend
+)
+catch_start_concurrency = ConcurrencyLimiter("catch-start-concurrency", CATCH_START_MAX_CONCURRENCY)
+catch_complete_concurrency = ConcurrencyLimiter("catch-complete-concurrency", CATCH_COMPLETE_MAX_CONCURRENCY)
+
+def trainer_rate_limit(
+    limiter: TokenBucketLimiter,
+    concurrency: ConcurrencyLimiter
+) -> Callable[[str], AsyncContextManager[None]]:
+    """
+    Build a per-trainer quota and endpoint concurrency limit, used by handlers as
+    'async with limit(current_user):' around their work
+    It is taken in the handler rather than as a dependency because dependencies
+    run even when the body fails validation, so a 422 would spend a token.
+    The concurrency slot is held until the block exits.
+    """
+    @asynccontextmanager
+    async def limit(trainer_id: str):
+        await limiter.enforce(trainer_id)
+        concurrency.acquire()
+        try:
+            yield
+        finally:
+            concurrency.release()
+    return limit
+
+limit_catch_start = trainer_rate_limit(catch_start_limiter, catch_start_concurrency)
+limit_catch_complete = trainer_rate_limit(catch_complete_limiter, catch_complete_concurrency)
@@ -0,0 +1,63 @@
+"""
+Request coalescing for identical concurrent reads
+The first caller for a key starts the work, callers arriving while it runs
+await the same result (or exception) instead of sending the same query again.
+Results are shared between callers, so they must not be mutated.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from app.utils.metrics import registry, Counter
+
+singleflight_requests = registry.register(Counter(
+    "singleflight_requests_total", "Coalesced reads by whether they ran the work or shared it",
+    ["group", "result"]
+))
+
+class _Call:
+    """Work in flight for one key"""
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Group of calls coalesced by key"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+    
+    def in_flight(self) -> int:
+        return len(self._calls)
+    
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+    
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) unless a call with the same key is running, then share its result
+        The work runs in its own task: a cancelled caller doesn't cancel it for
+        the others, it's only cancelled once every caller has gone away
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func(*args, **kwargs)))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            singleflight_requests.inc(group=self.name, result="leader")
+        else:
+            singleflight_requests.inc(group=self.name, result="shared")
+        
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._forget(key, call)
+                call.task.cancel()
+
+# Catalog reads (lists, details and facets) of the services
+catalog_reads = SingleFlight("catalog")
@@ -0,0 +1,112 @@
+"""
+Stale-while-revalidate cache for slow-changing reads
+After the first fill, requests are answered from memory. An entry past its
+(jittered) TTL is still served while a single background task refreshes it;
+only entries older than the max staleness make a request wait for the data
+store. The last value loaded stays available as a fallback when it errors.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from app.config import FACET_CACHE_TTL, FACET_CACHE_MAX_STALENESS, FACET_CACHE_JITTER
+from app.utils.deadline import clear_deadline
+from app.utils.singleflight import SingleFlight
+
+class _Entry:
+    """Cached value of one key"""
+    
+    def __init__(self, value: Any, ttl: float, jitter: float):
+        self.value = value
+        self.ttl = ttl
+        self.loaded_at = time.monotonic()
+        self.expires_at = self.loaded_at + ttl * random.uniform(1 - jitter, 1 + jitter)
+        self.refresh: Optional[asyncio.Task] = None
+
+class SWRCache:
+    """Keyed values refreshed in the background"""
+    
+    # Seconds before retrying a background refresh that failed
+    ERROR_RETRY_INTERVAL = 10
+    
+    def __init__(self, name: str, ttl: float, max_staleness: float, jitter: float = 0.1, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_staleness = max(max_staleness, ttl)
+        self.jitter = jitter
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._fills = SingleFlight(name)
+        
+        # Requests served from memory (fresh or stale) / that waited for the data store
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refresh_errors = 0
+    
+    async def get(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Get the value of a key, loading it with loader() if needed
+        ttl overrides the cache's TTL for this key
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        
+        if entry is not None and now - entry.loaded_at <= self.max_staleness:
+            self.hits += 1
+            if now >= entry.expires_at:
+                self.stale_hits += 1
+                if entry.refresh is None:
+                    entry.refresh = asyncio.ensure_future(self._refresh(key, entry, loader))
+            return entry.value
+        
+        # Nothing usable cached: wait for the data store (concurrent misses share one load)
+        self.misses += 1
+        return await self._fills.do(key, self._fill, key, loader, ttl or self.ttl)
+    
+    async def _fill(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        value = await loader()
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            # Drop the oldest key (keys can come from user input)
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = _Entry(value, ttl, self.jitter)
+        return value
+    
+    async def _refresh(self, key: Hashable, entry: _Entry, loader: Callable[[], Awaitable[Any]]):
+        # Not bound by the deadline of the request that noticed the entry was stale
+        clear_deadline()
+        try:
+            await self._fill(key, loader, entry.ttl)
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"Error refreshing {self.name} cache entry {key}: {e}")
+            # Keep serving the stale value, try again a bit later
+            entry.expires_at = time.monotonic() + self.ERROR_RETRY_INTERVAL
+        finally:
+            entry.refresh = None
+    
+    def last_known(self, key: Hashable) -> Optional[Any]:
+        """Get the last value loaded for a key, however old (None if never loaded)"""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_hits': self.stale_hits,
+            'refresh_errors': self.refresh_errors
+        }
+
+# Facet lists of both routers (types, regions, habitats, difficulties)
+facet_cache = SWRCache("facets", FACET_CACHE_TTL, FACET_CACHE_MAX_STALENESS, FACET_CACHE_JITTER)
@@ -0,0 +1,153 @@
+"""
+Cache of verified JWT access tokens
+Lets get_current_user skip decoding and signature checks for tokens it has
+already verified. Entries are keyed by a SHA-256 digest of the token and
+expire at the token's own 'exp' claim.
+
+Revoked tokens (logout) are kept in a revocation store until they expire:
+per process by default, or in Redis so every worker rejects them.
+"""
+
+import hashlib
+import heapq
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from app.config import TOKEN_CACHE_SIZE, TOKEN_REVOCATION_BACKEND, RATE_LIMIT_REDIS_URL
+
+# Revocation hooks receive (token_digest, trainer_id) and return True if revoked
+RevocationCheck = Callable[[str, str], bool]
+
+class RevocationStore(ABC):
+    """Storage of revoked token digests, each kept until its token expires"""
+    
+    @abstractmethod
+    async def revoke(self, token_digest: str, expires_at: float):
+        """Record a revoked token (expires_at in epoch seconds)"""
+    
+    @abstractmethod
+    async def is_revoked(self, token_digest: str) -> bool:
+        """Check if a token was revoked"""
+
+class InMemoryRevocationStore(RevocationStore):
+    """Revocations of this process only"""
+    
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        # (expires_at, digest) so expired revocations are dropped oldest first
+        self._expiries: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+    
+    async def revoke(self, token_digest: str, expires_at: float):
+        with self._lock:
+            self._revoked[token_digest] = expires_at
+            heapq.heappush(self._expiries, (expires_at, token_digest))
+            
+            # Forget revocations of tokens that have expired by now
+            now = time.time()
+            while self._expiries and self._expiries[0][0] <= now:
+                expired_at, expired = heapq.heappop(self._expiries)
+                if self._revoked.get(expired) == expired_at:
+                    del self._revoked[expired]
+    
+    async def is_revoked(self, token_digest: str) -> bool:
+        return token_digest in self._revoked
+
+class RedisRevocationStore(RevocationStore):
+    """Revocations shared between workers, as keys expiring with their tokens"""
+    
+    def __init__(self, url: str, prefix: str = "revoked:"):
+        # Imported here so Redis is only needed when this backend is used
+        import redis.asyncio as redis
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+    
+    async def revoke(self, token_digest: str, expires_at: float):
+        ttl = math.ceil(expires_at - time.time())
+        if ttl > 0:
+            await self._client.set(self.prefix + token_digest, 1, ex=ttl)
+    
+    async def is_revoked(self, token_digest: str) -> bool:
+        return bool(await self._client.exists(self.prefix + token_digest))
+
+def create_revocation_store(name: str = TOKEN_REVOCATION_BACKEND) -> RevocationStore:
+    """Create the configured revocation store"""
+    if name == "redis":
+        return RedisRevocationStore(RATE_LIMIT_REDIS_URL)
+    if name == "memory":
+        return InMemoryRevocationStore()
+    raise ValueError(f"Unknown token revocation backend: {name}")
+
+class VerifiedTokenCache:
+    """Bounded LRU cache mapping token digests to trainer IDs"""
+    
+    def __init__(self, max_size: int, revocations: RevocationStore):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.revocations = revocations
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._revocation_checks: List[RevocationCheck] = []
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def digest(token: str) -> str:
+        """Get the cache key for a token"""
+        return hashlib.sha256(token.encode()).hexdigest()
+    
+    def get(self, token_digest: str) -> Optional[str]:
+        """Get the trainer ID for a verified, unexpired token (None on miss)"""
+        with self._lock:
+            entry = self._entries.get(token_digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            trainer_id, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token_digest]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(token_digest)
+            self.hits += 1
+            return trainer_id
+    
+    def put(self, token_digest: str, trainer_id: str, expires_at: float):
+        """Store a verified token until its expiry time (epoch seconds)"""
+        with self._lock:
+            self._entries[token_digest] = (trainer_id, expires_at)
+            self._entries.move_to_end(token_digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def add_revocation_check(self, check: RevocationCheck):
+        """Register a hook consulted for every token before it is accepted"""
+        self._revocation_checks.append(check)
+    
+    async def revoke(self, token_digest: str, expires_at: float):
+        """Reject a token from now on (until it would have expired anyway)"""
+        with self._lock:
+            self._entries.pop(token_digest, None)
+        await self.revocations.revoke(token_digest, expires_at)
+    
+    async def is_revoked(self, token_digest: str, trainer_id: str) -> bool:
+        """Check a token against the revocation store and hooks"""
+        if await self.revocations.is_revoked(token_digest):
+            return True
+        return any(check(token_digest, trainer_id) for check in self._revocation_checks)
+    
+    def stats(self) -> Dict[str, float]:
+        """Get cache size and hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+token_cache = VerifiedTokenCache(TOKEN_CACHE_SIZE, create_revocation_store())
@@ -0,0 +1,118 @@
+"""
+Request-scoped accounting of data store round trips
+Every repository call made while handling a request is recorded with its
+duration and the requests it sent to the data store (see
+app/repositories/instrumented.py): a paged scan counts one round trip per
+page. The totals are sent back in
+a Server-Timing header, published on /metrics, and a warning is logged when a
+request makes more round trips than ROUND_TRIP_WARNING_THRESHOLD.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from app.config import SERVER_TIMING_ENABLED, ROUND_TRIP_WARNING_THRESHOLD
+from app.utils.metrics import registry, Histogram
+
+# Round trips kept per request for the warning message
+MAX_RECORDED_CALLS = 50
+
+request_round_trips = registry.register(Histogram(
+    "http_request_datastore_round_trips", "Data store round trips made by a request",
+    ["method", "route"], (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50)
+))
+
+class RequestTrace:
+    """Data store calls made while handling one request"""
+    
+    def __init__(self):
+        self.round_trips = 0
+        self.datastore_time = 0.0
+        # (table, operation, seconds) of the first MAX_RECORDED_CALLS calls
+        self.calls: List[Tuple[str, str, float]] = []
+    
+    def record(self, table: str, operation: str, elapsed: float, round_trips: int = 1):
+        self.round_trips += round_trips
+        self.datastore_time += elapsed
+        if len(self.calls) < MAX_RECORDED_CALLS:
+            self.calls.append((table, operation, elapsed))
+    
+    def server_timing(self, total: float) -> str:
+        """Format the trace as a Server-Timing header value"""
+        plural = "" if self.round_trips == 1 else "s"
+        return (
+            f'db;dur={self.datastore_time * 1000:.2f};desc="{self.round_trips} round trip{plural}", '
+            f'app;dur={total * 1000:.2f}'
+        )
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+def get_current_trace() -> Optional[RequestTrace]:
+    """Get the trace of the request being handled (None outside requests)"""
+    return _current_trace.get()
+
+def record_round_trip(table: str, operation: str, elapsed: float, round_trips: int = 1):
+    """Count a data store call and the round trips it made in the current request's trace"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(table, operation, elapsed, round_trips)
+
+class CallRequests:
+    """Counts the requests sent to the data store while a repository call runs"""
+    
+    def __init__(self):
+        self.count = 0
+    
+    def __enter__(self) -> "CallRequests":
+        self._token = _current_call.set(self)
+        return self
+    
+    def __exit__(self, *exc_info):
+        _current_call.reset(self._token)
+
+_current_call: ContextVar[Optional[CallRequests]] = ContextVar("datastore_call", default=None)
+
+def count_request():
+    """Count one request to the data store (called by backends for each query they send)"""
+    call = _current_call.get()
+    if call is not None:
+        call.count += 1
+
+class RoundTripMiddleware:
+    """ASGI middleware tracing data store round trips per request"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        
+        async def send_wrapper(message):
+            # Streamed bodies may still query after this, the header covers the work done so far
+            if message["type"] == "http.response.start" and SERVER_TIMING_ENABLED:
+                headers = list(message.get("headers", []))
+                value = trace.server_timing(time.perf_counter() - start)
+                headers.append((b"server-timing", value.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            request_round_trips.observe(trace.round_trips, method=scope["method"], route=route)
+            
+            if trace.round_trips > ROUND_TRIP_WARNING_THRESHOLD:
+                calls = ", ".join(f"{table}.{operation}" for table, operation, _ in trace.calls)
+                print(
+                    f"Warning: {scope['method']} {route} made {trace.round_trips} data store round trips "
+                    f"({trace.datastore_time * 1000:.1f} ms): {calls}"
+                )
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory of the in-memory catalog across worker processes
+Starts several worker processes at once, each holding the 1025 Pokemon
+catalog the way CatalogService does:
+
+- copy: rows decoded into dicts in every process (no CATALOG_SNAPSHOT_PATH)
+- snapshot: the memory-mapped snapshot file (see app/repositories/snapshot.py)
+
+Once all of them have loaded the catalog and read every row, each reports the
+private memory it gained and its proportional share (PSS) of the snapshot
+mapping. A shared catalog keeps the memory per worker flat as workers are
+added; copies grow with every worker. Lookup time per row is also reported.
+
+Reads /proc/<pid>/smaps, so it only runs on Linux.
+
+Usage (from the 'back' directory):
+    python -m benchmarks.bench_catalog_memory
+    python -m benchmarks.bench_catalog_memory --workers 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = ["copy", "snapshot"]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Catalog memory per worker process")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes alive at once")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def private_kb():
+    """Private memory of this process in kB"""
+    total = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1])
+    return total
+
+def mapping_pss_kb(path):
+    """Proportional set size of the mappings of a file in kB"""
+    total = 0
+    in_mapping = False
+    with open("/proc/self/smaps") as f:
+        for line in f:
+            fields = line.split()
+            if "-" in fields[0] and len(fields) >= 5:
+                in_mapping = fields[-1] == path
+            elif in_mapping and fields[0] == "Pss:":
+                total += int(fields[1])
+    return total
+
+def run_child(mode, data_dir):
+    """Load the catalog, read every row, then report memory when asked on stdin"""
+    from app.repositories.snapshot import CatalogSnapshot
+    
+    snapshot_path = os.path.join(data_dir, "catalog.snap")
+    before = private_kb()
+    if mode == "copy":
+        with open(os.path.join(data_dir, "catalog.json")) as f:
+            catalog = {row["id"]: row for row in json.load(f)}
+    else:
+        catalog = CatalogSnapshot(snapshot_path)
+    
+    # The first pass faults the pages in, the second one is timed
+    for _ in range(2):
+        start = time.perf_counter()
+        for pokemon_id in range(1, len(catalog) + 1):
+            catalog.get(pokemon_id)
+        lookup_us = (time.perf_counter() - start) / len(catalog) * 1e6
+    
+    print("ready", flush=True)
+    sys.stdin.readline()
+    print(json.dumps({
+        "private_kb": private_kb() - before,
+        "snapshot_pss_kb": mapping_pss_kb(os.path.realpath(snapshot_path)),
+        "lookup_us": lookup_us,
+    }), flush=True)
+
+def write_data(data_dir):
+    """Write the synthetic catalog as fetched rows (JSON) and as a snapshot"""
+    from app.repositories.base import CATALOG_COLUMNS
+    from app.repositories.memory_repository import pick
+    from app.repositories.seed import generate_catalog
+    from app.repositories.snapshot import write_snapshot
+    
+    rows = [pick(row, CATALOG_COLUMNS) for row in generate_catalog()]
+    with open(os.path.join(data_dir, "catalog.json"), "w") as f:
+        json.dump(rows, f)
+    return write_snapshot(os.path.join(data_dir, "catalog.snap"), rows)
+
+def measure(mode, workers, data_dir):
+    """Run workers at once in a mode; returns their reports"""
+    command = [sys.executable, "-m", "benchmarks.bench_catalog_memory", "--child", mode, "--data", data_dir]
+    back_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    processes = [
+        subprocess.Popen(command, cwd=back_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    try:
+        for process in processes:
+            if process.stdout.readline().strip() != "ready":
+                sys.exit(f"A {mode} worker failed to load the catalog")
+        # Everyone has the catalog mapped now, so shared pages are split between them
+        for process in processes:
+            process.stdin.write("measure\n")
+            process.stdin.flush()
+        return [json.loads(process.stdout.readline()) for process in processes]
+    finally:
+        for process in processes:
+            process.stdin.close()
+            process.wait()
+
+def main():
+    args = parse_args()
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    if args.child:
+        run_child(args.child, args.data)
+        return
+    
+    data_dir = tempfile.mkdtemp(prefix="catalog-memory-")
+    snapshot_size = write_data(data_dir)
+    
+    print("=" * 70)
+    print(f"Catalog memory: {args.workers} workers, snapshot file {snapshot_size / 1024:.0f} kB")
+    print("=" * 70)
+    print(f"{'mode':<10}{'private kB/worker':>19}{'snapshot PSS kB':>17}{'total kB':>11}{'lookup us':>11}")
+    for mode in MODES:
+        reports = measure(mode, args.workers, data_dir)
+        private = sum(report["private_kb"] for report in reports) / len(reports)
+        pss = sum(report["snapshot_pss_kb"] for report in reports) / len(reports)
+        lookup = sum(report["lookup_us"] for report in reports) / len(reports)
+        print(f"{mode:<10}{private:>19.0f}{pss:>17.0f}{(private + pss) * args.workers:>11.0f}{lookup:>11.2f}")
+    print("(total: catalog memory of all workers together)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Benchmark: API endpoint latency with stored baselines
+Drives the FastAPI app in-process (no network, no server) against a local
+data backend seeded with the deterministic 1025 Pokemon catalog, and reports
+p50/p95/p99 latency and requests per second for each route.
+
+Results can be saved as a JSON baseline and later runs compared against it:
+a route whose latency grows past the threshold makes the script exit with 1.
+
+Data store round trips are read from the Server-Timing header of every
+response. A route making more round trips than its budget in
+round_trip_budgets.json also fails the run.
+
+Usage (from the 'back' directory):
+    python -m benchmarks.bench_endpoints --save
+    python -m benchmarks.bench_endpoints --compare --threshold 0.25
+    python -m benchmarks.bench_endpoints --routes pokemon_list,pokemon_detail --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "round_trip_budgets.json")
+
+# Round trip count in the Server-Timing header (see app/utils/tracing.py)
+ROUND_TRIPS_PATTERN = re.compile(r'db;dur=[\d.]+;desc="(\d+) round trip')
+
+# Filter, sort and page mixes sent to /pokemon/ (one per request, in rotation)
+POKEMON_LIST_QUERIES = [
+    "/pokemon/",
+    "/pokemon/?page=3&page_size=20",
+    "/pokemon/?page=40&page_size=20",
+    "/pokemon/?page_size=50&sort_by=stats_total&sort_order=desc",
+    "/pokemon/?types=fire",
+    "/pokemon/?types=water,flying&sort_by=name",
+    "/pokemon/?region=kanto&habitat=forest",
+    "/pokemon/?region=paldea&difficulty=hard&page=2",
+    "/pokemon/?difficulty=legendary&sort_by=weight&sort_order=desc",
+    "/pokemon/?captured_only=true",
+]
+
+FACET_PATHS = [
+    "/pokemon/types",
+    "/pokemon/regions",
+    "/pokemon/habitats",
+    "/catch/habitats?region=johto",
+    "/catch/difficulties?region=hoenn",
+]
+
+CATCH_REGIONS = ["kanto", "johto", "hoenn"]
+CATCH_DIFFICULTIES = ["easy", "medium", "hard"]
+
+ROUTES = [
+    "pokemon_list", "pokemon_detail", "facets",
+    "catch_start", "catch_complete", "auth_login", "auth_stats",
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="API endpoint latency benchmark")
+    parser.add_argument("--backend", default="memory", choices=["memory", "sqlite"], help="Data backend")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="Comma-separated routes to run")
+    parser.add_argument("--requests", type=int, default=300, help="Measured requests per route")
+    parser.add_argument("--warmup", type=int, default=30, help="Unmeasured requests per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--trainers", type=int, default=20, help="Trainers registered for the run")
+    parser.add_argument("--captured", type=int, default=150, help="Pokemon captured by each trainer")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost used for the run")
+    parser.add_argument("--seed", type=int, default=1025, help="Random seed for request mixes")
+    parser.add_argument("--baseline", help="Baseline file (default: baselines/endpoints-<backend>.json)")
+    parser.add_argument("--save", action="store_true", help="Save the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare with the baseline")
+    parser.add_argument("--metric", default="p95", choices=["p50", "p95", "p99"], help="Latency compared")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="Ignore slowdowns smaller than this many milliseconds")
+    parser.add_argument("--budgets", default=BUDGETS_PATH, help="Round trip budgets per route")
+    parser.add_argument("--no-budgets", action="store_true", help="Don't enforce round trip budgets")
+    return parser.parse_args()
+
+def configure_environment(args):
+    """Set up the app configuration before it is imported"""
+    os.environ["DATA_BACKEND"] = args.backend
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("SQLITE_PATH", ":memory:")
+    os.environ["SERVER_TIMING_ENABLED"] = "true"
+    # Budgets are checked here, no need for the server's warnings
+    os.environ.setdefault("ROUND_TRIP_WARNING_THRESHOLD", "1000")
+    # Limiters would reject the benchmark's own traffic
+    for name in [
+        "LOGIN_IP_BURST", "LOGIN_IDENTITY_BURST", "CATCH_START_BURST", "CATCH_COMPLETE_BURST",
+        "CATCH_START_MAX_CONCURRENCY", "CATCH_COMPLETE_MAX_CONCURRENCY", "PASSWORD_HASH_MAX_PENDING",
+    ]:
+        os.environ[name] = "1000000"
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class Session:
+    """Trainers and tokens shared by the benchmarked routes"""
+    
+    def __init__(self, client, rng):
+        self.client = client
+        self.rng = rng
+        self.trainers = []
+        self.headers = []
+    
+    async def setup(self, trainers, captured):
+        for n in range(trainers):
+            trainer_id = f"bench-{n:03d}"
+            password = f"password-{n:03d}"
+            response = await self.client.post("/auth/register", json={"trainer_id": trainer_id, "password": password})
+            response.raise_for_status()
+            response = await self.client.post("/auth/login", json={"trainer_id": trainer_id, "password": password})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            
+            # Give every trainer a realistic collection
+            pokemon_ids = self.rng.sample(range(1, 1026), captured)
+            for start in range(0, len(pokemon_ids), 100):
+                response = await self.client.post(
+                    "/pokemon/collection/capture",
+                    json={"pokemon_ids": pokemon_ids[start:start + 100]},
+                    headers=headers
+                )
+                response.raise_for_status()
+            
+            self.trainers.append((trainer_id, password))
+            self.headers.append(headers)
+    
+    def any_headers(self):
+        return self.rng.choice(self.headers)
+    
+    def request_for(self, route, n):
+        """Build the (method, path, json, headers) of the n-th request to a route"""
+        if route == "pokemon_list":
+            return "GET", POKEMON_LIST_QUERIES[n % len(POKEMON_LIST_QUERIES)], None, self.any_headers()
+        if route == "pokemon_detail":
+            return "GET", f"/pokemon/{self.rng.randint(1, 1025)}", None, self.any_headers()
+        if route == "facets":
+            return "GET", FACET_PATHS[n % len(FACET_PATHS)], None, None
+        if route == "catch_start":
+            body = {
+                "region": self.rng.choice(CATCH_REGIONS),
+                "habitat": "any",
+                "difficulty": self.rng.choice(CATCH_DIFFICULTIES)
+            }
+            return "POST", "/catch/start", body, self.any_headers()
+        if route == "catch_complete":
+            total = self.rng.randint(3, 8)
+            correct = self.rng.randint(0, total)
+            body = {
+                "pokemon_id": self.rng.randint(1, 1025),
+                "success": correct == total,
+                "buttons_correct": correct,
+                "total_buttons": total,
+                "time_taken": round(self.rng.uniform(1.0, 6.0), 2)
+            }
+            return "POST", "/catch/complete", body, self.any_headers()
+        if route == "auth_login":
+            trainer_id, password = self.rng.choice(self.trainers)
+            return "POST", "/auth/login", {"trainer_id": trainer_id, "password": password}, None
+        if route == "auth_stats":
+            return "GET", "/auth/stats", None, self.any_headers()
+        raise ValueError(f"Unknown route: {route}")
+
+async def send_requests(session, route, first, count, concurrency):
+    """Send requests first..first+count-1 to a route; returns (latencies, errors, max round trips)"""
+    latencies = []
+    errors = 0
+    max_round_trips = 0
+    counter = iter(range(first, first + count))
+    
+    async def worker():
+        nonlocal errors, max_round_trips
+        for n in counter:
+            method, path, body, headers = session.request_for(route, n)
+            start = time.perf_counter()
+            response = await session.client.request(method, path, json=body, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            match = ROUND_TRIPS_PATTERN.search(response.headers.get("server-timing", ""))
+            if match:
+                max_round_trips = max(max_round_trips, int(match.group(1)))
+    
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors, max_round_trips
+
+async def run_route(session, route, requests, warmup, concurrency):
+    """Warm a route up, then measure its latency percentiles and throughput"""
+    await send_requests(session, route, 0, warmup, concurrency)
+    
+    start = time.perf_counter()
+    latencies, errors, max_round_trips = await send_requests(session, route, warmup, requests, concurrency)
+    duration = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99": round(percentile(latencies, 0.99) * 1000, 3),
+        "rps": round(len(latencies) / duration, 1),
+        "round_trips": max_round_trips
+    }
+
+async def run(args, routes):
+    import httpx
+    import main
+    from app.repositories.factory import init_repositories
+    
+    rng = random.Random(args.seed)
+    # ASGITransport doesn't run the lifespan, so create the repositories it would
+    await asyncio.to_thread(init_repositories)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        session = Session(client, rng)
+        await session.setup(args.trainers, args.captured)
+        
+        results = {}
+        for route in routes:
+            results[route] = await run_route(session, route, args.requests, args.warmup, args.concurrency)
+            result = results[route]
+            print(
+                f"{route:<18}{result['p50']:>10.2f}{result['p95']:>10.2f}{result['p99']:>10.2f}"
+                f"{result['rps']:>10.1f}{result['errors']:>8}{result['round_trips']:>8}"
+            )
+        return results
+
+def compare(results, baseline, metric, threshold, min_delta_ms):
+    """Print the change of every route against the baseline; returns the regressed routes"""
+    regressions = []
+    print()
+    print(f"Compared with baseline from {baseline['meta']['created_at']} ({metric}, threshold {threshold:.0%})")
+    for route, result in results.items():
+        previous = baseline["routes"].get(route)
+        if previous is None:
+            print(f"{route:<18}{'no baseline':>32}")
+            continue
+        before, after = previous[metric], result[metric]
+        change = (after - before) / before if before else 0.0
+        regressed = change > threshold and after - before > min_delta_ms
+        if regressed:
+            regressions.append(route)
+        print(f"{route:<18}{before:>10.2f} ->{after:>10.2f} ms{change:>+9.1%}  {'REGRESSION' if regressed else 'ok'}")
+    return regressions
+
+def check_budgets(results, budgets):
+    """Get the routes whose most expensive request made more round trips than budgeted"""
+    return [
+        f"{route} ({result['round_trips']} > {budgets[route]})"
+        for route, result in results.items()
+        if route in budgets and result["round_trips"] > budgets[route]
+    ]
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    
+    routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    unknown = [route for route in routes if route not in ROUTES]
+    if unknown:
+        sys.exit(f"Unknown routes: {', '.join(unknown)} (choose from {', '.join(ROUTES)})")
+    
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"endpoints-{args.backend}.json")
+    
+    print("=" * 70)
+    print(f"Endpoints: {args.backend} backend, {args.requests} requests per route, "
+          f"concurrency {args.concurrency}, bcrypt cost {args.rounds}")
+    print("=" * 70)
+    print(f"{'route':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'errors':>8}{'trips':>8}")
+    
+    results = asyncio.run(run(args, routes))
+    
+    failed = any(result["errors"] for result in results.values())
+    if failed:
+        print("\nSome requests failed (see the errors column)")
+    
+    if not args.no_budgets:
+        with open(args.budgets) as f:
+            budgets = json.load(f)
+        over_budget = check_budgets(results, budgets)
+        if over_budget:
+            print(f"\nOver round trip budget: {', '.join(over_budget)}")
+            failed = True
+    
+    if args.compare:
+        if not os.path.exists(baseline_path):
+            sys.exit(f"No baseline at {baseline_path} (run with --save first)")
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.metric, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\nRegressed routes: {', '.join(regressions)}")
+            failed = True
+    
+    if args.save:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "backend": args.backend,
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "bcrypt_rounds": args.rounds,
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                },
+                "routes": results
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline saved to {baseline_path}")
+    
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
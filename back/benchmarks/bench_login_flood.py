@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: login throughput during a wrong-password flood
+Runs the login guard (rate limiter) and bcrypt verification the same way
+/auth/login does, without a database. Attackers hammer one trainer ID from a
+handful of IPs while legitimate trainers log in from their own IPs, first with
+the limiter disabled and then enabled.
+
+Usage (from the 'back' directory):
+    python -m benchmarks.bench_login_flood --duration 10 --attackers 50 --users 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Login flood benchmark")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--attackers", type=int, default=50, help="Concurrent attacker loops")
+    parser.add_argument("--attacker-ips", type=int, default=5, help="Distinct attacker IPs")
+    parser.add_argument("--users", type=int, default=5, help="Concurrent legitimate trainers")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost used for the run")
+    return parser.parse_args()
+
+async def run(duration, attackers, attacker_ips, users, limited):
+    from fastapi import HTTPException
+    from app.utils.auth import get_password_hash, verify_password
+    from app.utils import rate_limit
+    
+    # Fresh buckets for every run
+    backend = rate_limit.InMemoryRateLimitBackend()
+    rate_limit.login_ip_limiter.backend = backend
+    rate_limit.login_identity_limiter.backend = backend
+    
+    stored_hash = await get_password_hash("correct-password")
+    counts = {"attack_verified": 0, "attack_rejected": 0, "login_ok": 0, "login_rejected": 0}
+    latencies = []
+    deadline = time.perf_counter() + duration
+    
+    async def attempt(ip, trainer_id, password):
+        if limited:
+            await rate_limit.enforce_login_rate_limit(ip, trainer_id)
+        return await verify_password(password, stored_hash)
+    
+    async def attacker(n):
+        ip = f"10.0.0.{n % attacker_ips}"
+        while time.perf_counter() < deadline:
+            try:
+                await attempt(ip, "victim", "wrong-password")
+                counts["attack_verified"] += 1
+            except HTTPException:
+                counts["attack_rejected"] += 1
+                await asyncio.sleep(0)
+    
+    async def user(n):
+        ip = f"192.168.1.{n}"
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                await attempt(ip, f"trainer-{n}", "correct-password")
+                counts["login_ok"] += 1
+                latencies.append(time.perf_counter() - start)
+            except HTTPException:
+                counts["login_rejected"] += 1
+            # A real trainer logs in far less often than an attacker
+            await asyncio.sleep(0.5)
+    
+    await asyncio.gather(
+        *[attacker(n) for n in range(attackers)],
+        *[user(n) for n in range(users)]
+    )
+    
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else float("nan")
+    return counts, p50, p95
+
+def main():
+    args = parse_args()
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    # Large enough that the hashing queue limit doesn't hide the effect of the limiter
+    os.environ.setdefault("PASSWORD_HASH_MAX_PENDING", str(args.attackers + args.users + 1))
+    
+    print("=" * 70)
+    print(f"Login flood: {args.attackers} attackers on {args.attacker_ips} IPs, "
+          f"{args.users} trainers, {args.duration:.0f}s per run, bcrypt cost {args.rounds}")
+    print("=" * 70)
+    print(f"{'limiter':<10}{'bcrypt/s (attack)':>20}{'rejected/s':>12}{'logins/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    
+    for limited in (False, True):
+        counts, p50, p95 = asyncio.run(
+            run(args.duration, args.attackers, args.attacker_ips, args.users, limited)
+        )
+        print(
+            f"{'on' if limited else 'off':<10}"
+            f"{counts['attack_verified'] / args.duration:>20.1f}"
+            f"{counts['attack_rejected'] / args.duration:>12.1f}"
+            f"{counts['login_ok'] / args.duration:>10.1f}"
+            f"{p50:>10.1f}{p95:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark: API process startup
+Two measurements of how fast a new process can take traffic:
+
+- Import time: 'import main' under python -X importtime, with the total and
+  the packages spending the most time importing (self time summed per
+  top level package, so a slow dependency stands out from its submodules)
+- Boot time: uvicorn started on a local data backend, timed until /health
+  answers (the process serves requests) and until /ready answers 200 (the
+  catalog and facet caches are warm, see app/services/warmup_service.py)
+
+Each measurement is repeated in fresh processes and the median is reported.
+With --max-import-ms or --max-ready-ms, a slower median fails the run.
+
+Usage (from the 'back' directory):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --backend sqlite --runs 5 --top 15
+    python -m benchmarks.bench_startup --max-import-ms 1500 --max-ready-ms 4000
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="API process startup benchmark")
+    parser.add_argument("--backend", default="memory", choices=["memory", "sqlite"], help="Data backend")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per measurement")
+    parser.add_argument("--top", type=int, default=10, help="Packages listed in the import report")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for /ready")
+    parser.add_argument("--skip-boot", action="store_true", help="Only report import time")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median import time is higher")
+    parser.add_argument("--max-ready-ms", type=float, help="Fail if the median time to /ready is higher")
+    return parser.parse_args()
+
+def base_env(backend):
+    env = dict(os.environ)
+    env["DATA_BACKEND"] = backend
+    env.setdefault("SECRET_KEY", "bench-startup")
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+def measure_imports(env):
+    """Import main in a fresh interpreter; returns {module: (self us, cumulative us)}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACK_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"'import main' failed:\n{result.stderr}")
+    
+    modules = {}
+    for line in result.stderr.splitlines():
+        # import time:  self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+def import_report(env, runs, top):
+    """Print the import time of main and its heaviest packages; returns the median total in ms"""
+    totals = []
+    packages = defaultdict(list)
+    for _ in range(runs):
+        modules = measure_imports(env)
+        totals.append(modules["main"][1] / 1000)
+        per_package = defaultdict(int)
+        for name, (self_us, _) in modules.items():
+            per_package[name.split(".")[0]] += self_us
+        for package, self_us in per_package.items():
+            packages[package].append(self_us / 1000)
+    
+    median_total = statistics.median(totals)
+    print(f"import main: {median_total:.0f}ms median over {runs} runs "
+          f"(min {min(totals):.0f}ms, max {max(totals):.0f}ms)")
+    print(f"{'package':<30}{'self ms':>10}{'share':>9}")
+    ranked = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for package, times in ranked[:top]:
+        median = statistics.median(times)
+        print(f"{package:<30}{median:>10.1f}{median / median_total:>9.1%}")
+    return median_total
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def get_status(url):
+    """Status code of a GET, or None if the server doesn't answer yet"""
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None
+
+def measure_boot(env, timeout):
+    """Start uvicorn and time it until /health then /ready answer; returns (health ms, ready ms)"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+    ]
+    start = time.perf_counter()
+    server = subprocess.Popen(command, cwd=BACK_DIR, env=env, stdout=subprocess.DEVNULL)
+    health_ms = None
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                sys.exit(f"Server exited with code {server.returncode}")
+            if health_ms is None:
+                if get_status(base_url + "/health") == 200:
+                    health_ms = (time.perf_counter() - start) * 1000
+                else:
+                    time.sleep(0.005)
+                    continue
+            if get_status(base_url + "/ready") == 200:
+                return health_ms, (time.perf_counter() - start) * 1000
+            time.sleep(0.005)
+        sys.exit(f"Server was not ready after {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def boot_report(env, runs, timeout):
+    """Print the time to /health and /ready; returns the median time to /ready in ms"""
+    health, ready = [], []
+    for _ in range(runs):
+        if env["DATA_BACKEND"] == "sqlite":
+            # A new file each run, so seeding the database is part of the boot
+            env["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-startup-"), "pokemon.db")
+        health_ms, ready_ms = measure_boot(env, timeout)
+        health.append(health_ms)
+        ready.append(ready_ms)
+    
+    print(f"{'probe':<12}{'median ms':>11}{'min ms':>10}{'max ms':>10}")
+    for name, times in [("/health", health), ("/ready", ready)]:
+        print(f"{name:<12}{statistics.median(times):>11.0f}{min(times):>10.0f}{max(times):>10.0f}")
+    print("(from process start, including interpreter startup and imports)")
+    return statistics.median(ready)
+
+def main():
+    args = parse_args()
+    env = base_env(args.backend)
+    
+    print("=" * 70)
+    print(f"Startup: {args.backend} backend, {args.runs} runs, Python {sys.version.split()[0]}")
+    print("=" * 70)
+    failures = []
+    
+    import_ms = import_report(env, args.runs, args.top)
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        failures.append(f"import time {import_ms:.0f}ms > {args.max_import_ms:.0f}ms")
+    
+    if not args.skip_boot:
+        print()
+        ready_ms = boot_report(env, args.runs, args.timeout)
+        if args.max_ready_ms is not None and ready_ms > args.max_ready_ms:
+            failures.append(f"time to ready {ready_ms:.0f}ms > {args.max_ready_ms:.0f}ms")
+    
+    if failures:
+        print(f"\nOver budget: {', '.join(failures)}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Fake data backend with injected latency and errors
+Wraps the repositories of a real backend (usually memory) and delays every
+call by a random latency: a base time with some jitter, and now and then a
+slow tail like the occasional slow PostgREST response. Used by the hedging
+harness and usable by any benchmark that needs a misbehaving data store.
+"""
+
+import asyncio
+import functools
+import random
+from typing import Any, Dict, Optional
+
+class LatencyProfile:
+    """Latency distribution of the fake data store, in milliseconds"""
+    
+    def __init__(
+        self,
+        base_ms: float = 2.0,
+        jitter_ms: float = 1.0,
+        tail_probability: float = 0.0,
+        tail_ms: float = 100.0,
+        error_probability: float = 0.0
+    ):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+        self.tail_probability = tail_probability
+        self.tail_ms = tail_ms
+        self.error_probability = error_probability
+    
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyProfile":
+        """Build a profile from 'base=2,jitter=1,tail=0.02,tail_ms=150,errors=0'"""
+        names = {'base': 'base_ms', 'jitter': 'jitter_ms', 'tail': 'tail_probability',
+                 'tail_ms': 'tail_ms', 'errors': 'error_probability'}
+        values = {}
+        for item in filter(None, spec.split(',')):
+            name, _, value = item.partition('=')
+            if name.strip() not in names:
+                raise ValueError(f"Unknown latency setting: {name}")
+            values[names[name.strip()]] = float(value)
+        return cls(**values)
+    
+    def sample(self, rng: random.Random) -> float:
+        """Draw the delay of one call, in seconds"""
+        delay = self.base_ms + rng.uniform(0, self.jitter_ms)
+        if rng.random() < self.tail_probability:
+            delay += self.tail_ms * rng.uniform(0.5, 1.5)
+        return delay / 1000
+    
+    def describe(self) -> str:
+        return (
+            f"{self.base_ms:g}+{self.jitter_ms:g} ms, {self.tail_probability:.1%} tail of ~{self.tail_ms:g} ms"
+            f", {self.error_probability:.1%} errors"
+        )
+
+class FakeDataStoreError(Exception):
+    """Error injected by the fake backend"""
+
+class SlowRepository:
+    """Proxy delaying every async method of a repository"""
+    
+    def __init__(self, repository: Any, profile: LatencyProfile, rng: random.Random):
+        self.repository = repository
+        self.profile = profile
+        self.rng = rng
+        self.calls = 0
+        self._methods: Dict[str, Any] = {}
+    
+    def __getattr__(self, name: str):
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+        
+        attribute = getattr(self.repository, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        
+        @functools.wraps(attribute)
+        async def slow(*args, **kwargs):
+            self.calls += 1
+            await asyncio.sleep(self.profile.sample(self.rng))
+            if self.rng.random() < self.profile.error_probability:
+                raise FakeDataStoreError(f"injected error in {name}")
+            return await attribute(*args, **kwargs)
+        
+        self._methods[name] = slow
+        return slow
+
+def create_fake_repositories(profile: LatencyProfile, seed: Optional[int] = None, backend: str = "memory"):
+    """Create backend repositories (not instrumented or guarded) with injected latency"""
+    from app.repositories.base import Repositories
+    from app.repositories.factory import create_backend_repositories
+    
+    rng = random.Random(seed)
+    repositories = create_backend_repositories(backend)
+    return Repositories(
+        pokemon=SlowRepository(repositories.pokemon, profile, rng),
+        trainers=SlowRepository(repositories.trainers, profile, rng),
+        captures=SlowRepository(repositories.captures, profile, rng)
+    )
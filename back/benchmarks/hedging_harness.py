@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Harness for hedged and deadline-aware reads, against a fake slow data store
+Runs the same mix of point reads (Pokemon detail with captured status, and
+trainer lookups) through the guarded repositories of a fake backend with
+injected latency (see benchmarks/fake_backend.py):
+
+- without hedging, then with hedging: tail latency of both runs
+- with hedging and a short per-request deadline: no read outlives it
+
+and checks that hedging lowers p99, that hedges stay within their budget,
+and that deadlines hold. Exits with 1 if a check fails.
+
+Usage (from the 'back' directory):
+    python -m benchmarks.hedging_harness
+    python -m benchmarks.hedging_harness --latency base=3,jitter=2,tail=0.05,tail_ms=200 --budget 10
+    python -m benchmarks.hedging_harness --reads 5000 --concurrency 32 --deadline-ms 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hedged read harness with a fake slow data store")
+    parser.add_argument("--reads", type=int, default=3000, help="Point reads per run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Reads in flight at once")
+    parser.add_argument("--latency", default="base=2,jitter=1,tail=0.03,tail_ms=150",
+                        help="Fake store latency: base, jitter, tail (probability), tail_ms, errors")
+    parser.add_argument("--percentile", type=float, default=95, help="Hedge after this latency percentile")
+    parser.add_argument("--min-delay-ms", type=float, default=2, help="Shortest hedge delay")
+    parser.add_argument("--budget", type=float, default=5, help="Hedges allowed, in percent of reads")
+    parser.add_argument("--deadline-ms", type=float, default=60, help="Request deadline of the deadline run")
+    parser.add_argument("--seed", type=int, default=1025, help="Random seed")
+    return parser.parse_args()
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+async def run_reads(repos, args, deadline=None):
+    """Run the read mix; returns (latencies in ms, errors by type)"""
+    from app.services.pokemon_service import PokemonService
+    from app.utils.deadline import set_deadline
+    
+    rng = random.Random(args.seed)
+    latencies = []
+    errors = {}
+    next_read = 0
+    
+    async def one_read(index):
+        # Runs as its own task, so the deadline only applies to this read
+        if deadline is not None:
+            set_deadline(deadline)
+        if index % 3 == 2:
+            await repos.trainers.get_trainer(f"trainer-{rng.randint(1, 500)}")
+        else:
+            # fetch_pokemon_detail returns None on unexpected errors, so they show as misses
+            pokemon = await PokemonService.fetch_pokemon_detail(repos, rng.randint(1, 1025), "trainer-1")
+            if pokemon is None:
+                raise LookupError("detail not found")
+    
+    async def worker():
+        nonlocal next_read
+        while next_read < args.reads:
+            index = next_read
+            next_read += 1
+            start = time.perf_counter()
+            try:
+                await asyncio.ensure_future(one_read(index))
+            except Exception as e:
+                name = type(e).__name__
+                errors[name] = errors.get(name, 0) + 1
+            latencies.append((time.perf_counter() - start) * 1000)
+    
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    return latencies, errors
+
+def build_repositories(profile, seed, reader):
+    """Fake backend wrapped like the real ones (instrumented and guarded)"""
+    from benchmarks.fake_backend import FakeDataStoreError, create_fake_repositories
+    from app.repositories.guarded import guard_repositories
+    from app.repositories.instrumented import instrument_repositories
+    
+    fake = create_fake_repositories(profile, seed)
+    return fake, guard_repositories(
+        instrument_repositories(fake, "fake"), "fake", reader,
+        is_failure=lambda error: isinstance(error, FakeDataStoreError)
+    )
+
+def store_calls(fake):
+    return fake.pokemon.calls + fake.trainers.calls + fake.captures.calls
+
+def report(name, latencies, errors, calls, reader=None):
+    line = (
+        f"{name:<12}{statistics.median(latencies):>9.1f}{percentile(latencies, 95):>9.1f}"
+        f"{percentile(latencies, 99):>9.1f}{max(latencies):>9.1f}{calls:>9}"
+    )
+    if reader is not None:
+        line += f"{reader.sent:>8}{reader.won:>6}{reader.skipped:>9}"
+    print(line)
+    if errors:
+        print(f"{'':<12}errors: {', '.join(f'{k}={v}' for k, v in sorted(errors.items()))}")
+
+async def run(args):
+    from benchmarks.fake_backend import LatencyProfile
+    from app.utils.hedging import HedgedReader, HedgeBudget
+    
+    profile = LatencyProfile.parse(args.latency)
+    
+    print("=" * 78)
+    print(f"Hedged reads: {args.reads} reads, concurrency {args.concurrency}, store {profile.describe()}")
+    print(f"Hedge after p{args.percentile:g} (min {args.min_delay_ms:g} ms), budget {args.budget:g}% of reads")
+    print("=" * 78)
+    print(f"{'run':<12}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'calls':>9}{'hedges':>8}{'won':>6}{'skipped':>9}")
+    
+    fake, repos = build_repositories(profile, args.seed, None)
+    plain, plain_errors = await run_reads(repos, args)
+    report("unhedged", plain, plain_errors, store_calls(fake))
+    
+    reader = HedgedReader(args.percentile, args.min_delay_ms / 1000, args.budget)
+    fake, repos = build_repositories(profile, args.seed, reader)
+    hedged, hedged_errors = await run_reads(repos, args)
+    report("hedged", hedged, hedged_errors, store_calls(fake), reader)
+    
+    deadline_reader = HedgedReader(args.percentile, args.min_delay_ms / 1000, args.budget)
+    fake, repos = build_repositories(profile, args.seed, deadline_reader)
+    bounded, bounded_errors = await run_reads(repos, args, args.deadline_ms / 1000)
+    report(f"deadline {args.deadline_ms:g}", bounded, bounded_errors, store_calls(fake), deadline_reader)
+    
+    # Hedges can exceed the percentage by the budget's burst
+    allowed = reader.reads * args.budget / 100 + HedgeBudget.MAX_TOKENS
+    # Event loop scheduling makes a read end a little after its deadline
+    deadline_slack_ms = 15
+    
+    checks = [
+        ("hedging lowers p99", profile.tail_probability == 0 or percentile(hedged, 99) < percentile(plain, 99)),
+        (f"hedges within budget ({reader.sent} <= {allowed:.0f})", reader.sent <= allowed),
+        ("hedging adds no errors", sum(hedged_errors.values()) <= sum(plain_errors.values())),
+        (f"reads end by the deadline (+{deadline_slack_ms} ms)", max(bounded) <= args.deadline_ms + deadline_slack_ms),
+    ]
+    print()
+    for name, passed in checks:
+        print(f"{'ok' if passed else 'FAILED':<8}{name}")
+    return all(passed for _, passed in checks)
+
+def main():
+    args = parse_args()
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["DATA_BACKEND"] = "memory"
+    # The harness sets its own deadlines and doesn't want the breakers to open on slow reads
+    os.environ.setdefault("DATASTORE_READ_TIMEOUT", "0")
+    os.environ.setdefault("BREAKER_FAILURE_THRESHOLD", "1000000")
+    
+    passed = asyncio.run(run(args))
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
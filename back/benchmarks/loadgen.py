@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Load generator: concurrent trainers playing the catch loop
+Every simulated trainer registers, logs in, then repeats play sessions until
+the run ends: browse the Pokedex, play several catch rounds (/catch/start then
+/catch/complete) and check /auth/stats. Think times between steps and the mix
+of trainer behaviours (scenarios) are configurable.
+
+Reports per step: requests, errors, rate limited (429) and busy (503)
+responses, p50/p95/p99 latency, and the sustained throughput once every
+trainer has ramped up.
+
+Runs against a server started separately, or starts one itself with --serve.
+The memory backend keeps data per process, so use --workers 1 with it or
+use sqlite to share data between workers.
+
+Usage (from the 'back' directory):
+    python -m benchmarks.loadgen --serve memory --trainers 50 --duration 60
+    python -m benchmarks.loadgen --serve sqlite --workers 4 --trainers 200 --mix casual=60,grinder=30,collector=10
+    python -m benchmarks.loadgen --url http://localhost:8000 --trainers 20 --think 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Steps of a play session per scenario: (Pokedex pages, details, catch rounds, collection syncs)
+SCENARIOS = {
+    # Browses a lot, plays a few rounds
+    "casual": {"pages": 3, "details": 3, "rounds": 3, "syncs": 0},
+    # Barely browses, plays catch rounds back to back
+    "grinder": {"pages": 1, "details": 0, "rounds": 15, "syncs": 0},
+    # Filters the Pokedex, checks details and syncs the collection
+    "collector": {"pages": 6, "details": 5, "rounds": 4, "syncs": 2},
+}
+
+LIST_FILTERS = [
+    "", "&sort_by=name", "&sort_by=stats_total&sort_order=desc", "&types=fire",
+    "&types=water", "&region=kanto", "&region=johto&habitat=forest",
+    "&difficulty=hard", "&captured_only=true",
+]
+
+CATCH_REGIONS = ["kanto", "johto", "hoenn"]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Catch loop load generator")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server to load")
+    parser.add_argument("--serve", choices=["memory", "sqlite"],
+                        help="Start a local uvicorn server with this data backend")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for --serve")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve")
+    parser.add_argument("--keep-limits", action="store_true",
+                        help="Keep the server's rate limits with --serve (they are raised by default)")
+    parser.add_argument("--rounds-cost", type=int, default=10, help="bcrypt cost for --serve")
+    parser.add_argument("--trainers", type=int, default=50, help="Concurrent simulated trainers")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run after ramp-up starts")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Seconds over which trainers start")
+    parser.add_argument("--think", type=float, default=1.0, help="Mean think time between steps in seconds")
+    parser.add_argument("--mix", default="casual=60,grinder=30,collector=10",
+                        help="Scenario weights, e.g. casual=60,grinder=30,collector=10")
+    parser.add_argument("--skill", type=float, default=0.9, help="Chance of pressing each QTE button right")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    return parser.parse_args()
+
+def parse_mix(mix):
+    """Parse 'name=weight,...' into scenario names and weights"""
+    names, weights = [], []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            sys.exit(f"Unknown scenario: {name} (choose from {', '.join(SCENARIOS)})")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class Recorder:
+    """Collects the outcome of every request, grouped by step"""
+    
+    def __init__(self):
+        # step -> list of (finished_at, latency, status)
+        self.samples = defaultdict(list)
+    
+    def record(self, step, started, status):
+        finished = time.perf_counter()
+        self.samples[step].append((finished, finished - started, status))
+    
+    def report(self, window_start, window_end):
+        """Summarize every step; throughput only counts requests finished inside the window"""
+        window = max(window_end - window_start, 1e-9)
+        steps = {}
+        for step, samples in sorted(self.samples.items()):
+            latencies = sorted(latency for _, latency, _ in samples)
+            statuses = [status for _, _, status in samples]
+            sustained = sum(1 for finished, _, _ in samples if window_start <= finished <= window_end)
+            steps[step] = {
+                "requests": len(samples),
+                "errors": sum(1 for s in statuses if s is None or (s >= 400 and s not in (429, 503))),
+                "rate_limited": statuses.count(429),
+                "busy": statuses.count(503),
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+                "rps": round(sustained / window, 2),
+            }
+        return steps
+
+class Trainer:
+    """One simulated player"""
+    
+    def __init__(self, client, recorder, rng, scenario, args, deadline):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.scenario = scenario
+        self.args = args
+        self.deadline = deadline
+        self.trainer_id = f"load-{uuid.uuid4().hex[:12]}"
+        self.password = uuid.uuid4().hex
+        self.headers = None
+        self.version = 0
+        # region -> difficulties offered there (fetched once, like the frontend)
+        self.difficulties = {}
+    
+    async def think(self):
+        if self.args.think > 0:
+            await asyncio.sleep(min(self.rng.expovariate(1 / self.args.think), self.args.think * 5))
+    
+    async def call(self, step, method, path, **kwargs):
+        """Send a request and record it; returns the response or None on a transport error"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers=self.headers, **kwargs)
+        except Exception:
+            self.recorder.record(step, started, None)
+            return None
+        self.recorder.record(step, started, response.status_code)
+        return response
+    
+    async def sign_in(self):
+        credentials = {"trainer_id": self.trainer_id, "password": self.password}
+        response = await self.call("register", "POST", "/auth/register", json=credentials)
+        if response is None or response.status_code != 201:
+            return False
+        await self.think()
+        response = await self.call("login", "POST", "/auth/login", json=credentials)
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+    
+    async def catch_round(self):
+        region = self.rng.choice(CATCH_REGIONS)
+        if region not in self.difficulties:
+            response = await self.call("difficulties", "GET", f"/catch/difficulties?region={region}")
+            if response is None or response.status_code != 200:
+                return
+            self.difficulties[region] = response.json()
+        if not self.difficulties[region]:
+            return
+        
+        body = {
+            "region": region,
+            "habitat": "any",
+            "difficulty": self.rng.choice(self.difficulties[region])
+        }
+        response = await self.call("catch_start", "POST", "/catch/start", json=body)
+        if response is None or response.status_code != 200:
+            return
+        challenge = response.json()
+        sequence = challenge["sequence"]
+        
+        # Play the QTE: the trainer really takes this long before submitting
+        correct = sum(1 for _ in range(sequence["total_buttons"]) if self.rng.random() < self.args.skill)
+        time_taken = sequence["total_buttons"] * sequence["time_per_button"] * self.rng.uniform(0.5, 1.0)
+        await asyncio.sleep(time_taken if self.args.think > 0 else 0)
+        
+        await self.call("catch_complete", "POST", "/catch/complete", json={
+            "pokemon_id": challenge["pokemon_id"],
+            "success": correct == sequence["total_buttons"],
+            "buttons_correct": correct,
+            "total_buttons": sequence["total_buttons"],
+            "time_taken": round(time_taken, 2),
+            "perfect": correct == sequence["total_buttons"] and self.rng.random() < 0.2
+        })
+    
+    async def play_session(self):
+        steps = SCENARIOS[self.scenario]
+        
+        for _ in range(steps["pages"]):
+            page = self.rng.randint(1, 10)
+            await self.call("browse", "GET", f"/pokemon/?page={page}{self.rng.choice(LIST_FILTERS)}")
+            await self.think()
+        
+        for _ in range(steps["details"]):
+            await self.call("detail", "GET", f"/pokemon/{self.rng.randint(1, 1025)}")
+            await self.think()
+        
+        for _ in range(steps["rounds"]):
+            if time.perf_counter() >= self.deadline:
+                return
+            await self.catch_round()
+            await self.think()
+        
+        for _ in range(steps["syncs"]):
+            response = await self.call("sync", "GET", f"/pokemon/collection/sync?since={self.version}")
+            if response is not None and response.status_code == 200:
+                self.version = response.json()["version"]
+            await self.think()
+        
+        await self.call("stats", "GET", "/auth/stats")
+        await self.think()
+    
+    async def run(self, start_delay):
+        await asyncio.sleep(start_delay)
+        if not await self.sign_in():
+            return
+        while time.perf_counter() < self.deadline:
+            await self.play_session()
+
+def start_server(args):
+    """Start uvicorn with a local data backend; returns the process"""
+    env = dict(os.environ)
+    env["DATA_BACKEND"] = args.serve
+    env["BCRYPT_ROUNDS"] = str(args.rounds_cost)
+    env.setdefault("SECRET_KEY", "loadgen")
+    if args.serve == "sqlite":
+        env.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(prefix="loadgen-"), "pokemon.db"))
+    if not args.keep_limits:
+        for name in [
+            "LOGIN_IP_BURST", "LOGIN_IP_PER_MINUTE", "LOGIN_IDENTITY_BURST",
+            "CATCH_START_BURST", "CATCH_START_PER_MINUTE",
+            "CATCH_COMPLETE_BURST", "CATCH_COMPLETE_PER_MINUTE",
+        ]:
+            env[name] = "1000000"
+    if args.serve == "memory" and args.workers > 1:
+        print("warning: memory backend data is per worker, trainers will see 404s; use sqlite")
+    
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, cwd=BACK_DIR, env=env)
+
+async def wait_for_server(client, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.get("/")
+            if response.status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+async def run(args, url):
+    import httpx
+    
+    rng = random.Random(args.seed)
+    names, weights = parse_mix(args.mix)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.trainers, max_keepalive_connections=args.trainers)
+    
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        await wait_for_server(client)
+        
+        start = time.perf_counter()
+        deadline = start + args.duration
+        trainers = [
+            Trainer(client, recorder, random.Random(rng.random()), rng.choices(names, weights)[0], args, deadline)
+            for _ in range(args.trainers)
+        ]
+        await asyncio.gather(*[
+            trainer.run(args.ramp_up * n / max(1, args.trainers))
+            for n, trainer in enumerate(trainers)
+        ])
+        end = time.perf_counter()
+    
+    scenarios = {name: sum(1 for t in trainers if t.scenario == name) for name in names}
+    window_start = min(start + args.ramp_up, deadline)
+    return recorder.report(window_start, deadline), scenarios, end - start
+
+def print_report(steps, scenarios, elapsed, args):
+    print()
+    print(f"Trainers: {args.trainers} ({', '.join(f'{n} {name}' for name, n in scenarios.items())}), "
+          f"ran {elapsed:.1f}s, think {args.think}s")
+    print(f"{'step':<16}{'requests':>9}{'errors':>8}{'429':>6}{'503':>6}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for step, result in steps.items():
+        print(
+            f"{step:<16}{result['requests']:>9}{result['errors']:>8}{result['rate_limited']:>6}{result['busy']:>6}"
+            f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['rps']:>9.1f}"
+        )
+    
+    requests = sum(result["requests"] for result in steps.values())
+    failed = sum(result["errors"] + result["rate_limited"] + result["busy"] for result in steps.values())
+    print(f"{'total':<16}{requests:>9}  sustained {sum(r['rps'] for r in steps.values()):.1f} req/s, "
+          f"{failed / max(1, requests):.2%} not successful")
+
+def main():
+    args = parse_args()
+    url = args.url
+    server = None
+    if args.serve:
+        server = start_server(args)
+        url = f"http://127.0.0.1:{args.port}"
+    
+    try:
+        print("=" * 70)
+        print(f"Load: {args.trainers} trainers against {url}, {args.duration:.0f}s, "
+              f"ramp-up {args.ramp_up:.0f}s, mix {args.mix}")
+        print("=" * 70)
+        steps, scenarios, elapsed = asyncio.run(run(args, url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    
+    print_report(steps, scenarios, elapsed, args)
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "scenarios": scenarios, "steps": steps}, f, indent=2)
+            f.write("\n")
+        print(f"\nReport written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks: pure per-request functions of the services layer
+Times the code that runs on every request without touching the database,
+on inputs shaped like production data (the synthetic 1025 Pokemon catalog):
+
+- CatchService.calculate_qte_difficulty over every catalog stats total
+- ExperienceService.calculate_level_from_xp for new, veteran and capped trainers
+- PokemonService.to_basic on a full list page, and the page response
+- PokemonService.to_detail on detail rows (compact sprites), and on rows with
+  the full sprites blob as served with ?sprites=full
+- JSON serialization of the responses, as FastAPI does with response_model
+
+Each case is repeated and the best and median time per item is reported.
+Results can be saved and compared like bench_endpoints.
+
+Usage (from the 'back' directory):
+    python -m benchmarks.microbench
+    python -m benchmarks.microbench --filter level --repeat 10
+    python -m benchmarks.microbench --save
+    python -m benchmarks.microbench --compare --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import timeit
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "microbench.json")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Services layer microbenchmarks")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7, help="Timing repeats per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per repeat")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--save", action="store_true", help="Save the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare with the baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Allowed relative slowdown of the best time before failing")
+    return parser.parse_args()
+
+def xp_for_level(level):
+    """Total XP a trainer has when reaching a level"""
+    from app.services.experience_service import ExperienceService
+    return sum(ExperienceService.calculate_xp_for_level(n) for n in range(1, level))
+
+def build_cases():
+    """Create the cases as (name, items per call, function)"""
+    from app.repositories.seed import generate_catalog
+    from app.services.catch_service import CatchService
+    from app.services.experience_service import ExperienceService
+    from app.services.pokemon_service import PokemonService
+    from app.models.catch import DifficultyLevel
+    from app.models.pokemon import PokemonListResponse
+    from app.repositories.base import DETAIL_COLUMNS
+    from app.repositories.memory_repository import LIST_COLUMNS, pick
+    
+    rng = random.Random(1025)
+    catalog = generate_catalog()
+    
+    stats_totals = [row["stats_total"] for row in catalog]
+    
+    def qte_difficulty():
+        for stats_total in stats_totals:
+            CatchService.calculate_qte_difficulty(stats_total, DifficultyLevel.MEDIUM)
+    
+    # New trainers, a spread of veterans and the level 1000 safety cap
+    low_xp = [rng.randint(0, 2000) for _ in range(100)]
+    high_xp = [xp_for_level(rng.randint(200, 900)) + rng.randint(0, 100) for _ in range(100)]
+    capped_xp = [10 ** 9] * 100
+    
+    def level_from_xp(values):
+        def run():
+            for xp in values:
+                ExperienceService.calculate_level_from_xp(xp)
+        return run
+    
+    # A full list page, as rows come from the repositories
+    page_rows = []
+    for row in rng.sample(catalog, 50):
+        list_row = pick(row, LIST_COLUMNS)
+        list_row["is_captured"] = rng.random() < 0.3
+        page_rows.append(list_row)
+    
+    def basic_page():
+        return [PokemonService.to_basic(row) for row in page_rows]
+    
+    def list_response():
+        return PokemonListResponse(
+            pokemon=[PokemonService.to_basic(row) for row in page_rows],
+            total=1025, page=3, page_size=50, has_more=True, total_pages=21
+        )
+    
+    page = list_response()
+    
+    def list_response_json():
+        return list_response().model_dump_json()
+    
+    # Detail rows with the JSON columns still encoded, as PostgREST returns them
+    full_rows = rng.sample(catalog, 20)
+    detail_rows = [pick(row, DETAIL_COLUMNS) for row in full_rows]
+    
+    def detail(rows):
+        def run():
+            for row in rows:
+                PokemonService.to_detail(row, True, "Sparky")
+        return run
+    
+    def detail_json(rows):
+        details = [PokemonService.to_detail(row) for row in rows]
+        def run():
+            for pokemon in details:
+                pokemon.model_dump_json()
+        return run
+    
+    return [
+        ("qte_difficulty", len(stats_totals), qte_difficulty),
+        ("level_from_xp_new", len(low_xp), level_from_xp(low_xp)),
+        ("level_from_xp_veteran", len(high_xp), level_from_xp(high_xp)),
+        ("level_from_xp_capped", len(capped_xp), level_from_xp(capped_xp)),
+        ("pokemon_basic_page", 1, basic_page),
+        ("pokemon_list_response", 1, list_response),
+        ("pokemon_list_json", 1, lambda: page.model_dump_json()),
+        ("pokemon_list_build_and_json", 1, list_response_json),
+        ("pokemon_detail", len(detail_rows), detail(detail_rows)),
+        ("pokemon_detail_json", len(detail_rows), detail_json(detail_rows)),
+        ("pokemon_detail_full", len(full_rows), detail(full_rows)),
+        ("pokemon_detail_full_json", len(full_rows), detail_json(full_rows)),
+    ]
+
+def measure(func, items, repeat, min_time):
+    """Time a function; returns best and median microseconds per item"""
+    timer = timeit.Timer(func)
+    loops, elapsed = timer.autorange()
+    if elapsed < min_time:
+        loops = max(1, int(loops * min_time / max(elapsed, 1e-9)))
+    timings = [t / loops / items * 1e6 for t in timer.repeat(repeat=repeat, number=loops)]
+    return {
+        "best_us": round(min(timings), 4),
+        "median_us": round(statistics.median(timings), 4),
+        "spread": round((max(timings) - min(timings)) / min(timings), 3),
+        "loops": loops,
+    }
+
+def compare(results, baseline, threshold):
+    """Print the change of every case against the baseline; returns the regressed cases"""
+    regressions = []
+    print()
+    print(f"Compared with baseline from {baseline['meta']['created_at']} (best time, threshold {threshold:.0%})")
+    for name, result in results.items():
+        previous = baseline["cases"].get(name)
+        if previous is None:
+            print(f"{name:<30}{'no baseline':>28}")
+            continue
+        before, after = previous["best_us"], result["best_us"]
+        change = (after - before) / before if before else 0.0
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<30}{before:>10.3f} ->{after:>10.3f} us{change:>+9.1%}  {'REGRESSION' if regressed else 'ok'}")
+    return regressions
+
+def main():
+    args = parse_args()
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    
+    cases = [case for case in build_cases() if args.filter in case[0]]
+    
+    print("=" * 70)
+    print(f"Microbenchmarks: {len(cases)} cases, {args.repeat} repeats, Python {platform.python_version()}")
+    print("=" * 70)
+    print(f"{'case':<30}{'items':>7}{'best us':>11}{'median us':>11}{'spread':>9}")
+    
+    results = {}
+    for name, items, func in cases:
+        result = measure(func, items, args.repeat, args.min_time)
+        results[name] = result
+        print(f"{name:<30}{items:>7}{result['best_us']:>11.3f}{result['median_us']:>11.3f}{result['spread']:>9.1%}")
+    print("(times are per item: one call, one page or one Pokemon)")
+    
+    failed = False
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"No baseline at {args.baseline} (run with --save first)")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressed cases: {', '.join(regressions)}")
+            failed = True
+    
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                },
+                "cases": results
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline saved to {args.baseline}")
+    
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,32 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, pokemon, catch
+from starlette.concurrency import run_in_threadpool
+from app.repositories.factory import close_repositories, init_repositories
+from app.routers import auth, pokemon, catch, metrics, profiling, health
+from app.services.warmup_service import WarmupService
+from app.utils.metrics import MetricsMiddleware
+from app.utils.tracing import RoundTripMiddleware
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.deadline import RequestDeadlineMiddleware
 
-app = FastAPI(title="Pokemon Trainer API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the repositories and warm the caches in the background
+    The process accepts requests right away, /ready tells when it's warm
+    """
+    # Local backends seed their data and Supabase builds its client on creation, which blocks
+    repos = await run_in_threadpool(init_repositories)
+    warmup = asyncio.create_task(WarmupService.warm_until_ready(repos))
+    try:
+        yield
+    finally:
+        warmup.cancel()
+        close_repositories()
+
+app = FastAPI(title="Pokemon Trainer API", version="1.0.0", lifespan=lifespan)
 
 # CORS Configuration
 app.add_middleware(
@@ -13,10 +37,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency, status codes and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Data store round trips per request (Server-Timing header and N+1 warnings)
+app.add_middleware(RoundTripMiddleware)
+
+# Profiles of the next requests matching a pattern, armed on /admin/profiling
+app.add_middleware(ProfilingMiddleware)
+
+# Deadline for the data store calls of every request
+app.add_middleware(RequestDeadlineMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(pokemon.router)
 app.include_router(catch.router)
+app.include_router(metrics.router)
+app.include_router(profiling.router)
+app.include_router(health.router)
 
 @app.get("/")
 def root():
@@ -26,6 +65,9 @@ def root():
         "endpoints": {
             "auth": "/auth",
             "pokemon": "/pokemon",
+            "metrics": "/metrics",
+            "health": "/health",
+            "ready": "/ready",
             "docs": "/docs"
         }
     }
@@ -3,39 +3,113 @@
 Script to populate Supabase database with Pokemon data from PokeAPI
 This only needs to be run once to populate the database
 UPDATED: Now includes Pokemon descriptions from species endpoint
+
+Pokemon flow through a pipeline of stages connected by bounded queues:
+list -> detail -> species -> transform -> write. The detail and species
+stages run many workers at once, every PokeAPI request goes through one
+concurrency limit, and 429/5xx responses are retried with backoff (a 429
+pauses every worker for its Retry-After). Writes run in a thread while the
+next Pokemon are fetched.
+
+Usage (from the 'back' directory):
+    python populate_pokemon.py
+    python populate_pokemon.py --yes --concurrency 20
+    python populate_pokemon.py --yes --limit 151 --dry-run
 """
 
+import argparse
 import asyncio
+import random
+import sys
+import time
 import httpx
 import json
 from typing import List, Dict, Any, Optional
-from app.database import supabase
+from app.database import get_supabase
 
 POKEAPI_BASE_URL = "https://pokeapi.co/api/v2"
-BATCH_SIZE = 50  # Process 50 Pokemon at a time
+BATCH_SIZE = 50  # Rows written to Supabase per upsert
 MAX_POKEMON = 1025  # Current total Pokemon in PokeAPI (as of Gen 9)
+LIST_PAGE_SIZE = 100  # Pokemon per list request
+CONCURRENCY = 10  # PokeAPI requests in flight at once
+MAX_RETRIES = 5  # Retries of a failed PokeAPI request
+RETRY_BASE_DELAY = 0.5  # Seconds before the first retry, doubled on each one
+RETRY_MAX_DELAY = 30.0
+PROGRESS_INTERVAL = 2.0  # Seconds between progress lines
+
+# Status codes worth retrying (rate limited or upstream trouble)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class PokeAPIClient:
+    """HTTP client for PokeAPI with a concurrency limit and retries with backoff"""
+    
+    def __init__(self, client: httpx.AsyncClient, concurrency: int, max_retries: int):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_retries = max_retries
+        # Monotonic time before which no request is sent (set by a 429)
+        self.paused_until = 0.0
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+    
+    def retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Seconds to wait before a retry: Retry-After if given, else exponential backoff with jitter"""
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), RETRY_MAX_DELAY)
+        delay = min(RETRY_BASE_DELAY * 2 ** attempt, RETRY_MAX_DELAY)
+        return delay * random.uniform(0.5, 1.0)
+    
+    async def get_json(self, url: str) -> Any:
+        """GET a PokeAPI URL and decode the JSON body, retrying 429/5xx and connection errors"""
+        attempt = 0
+        while True:
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            
+            response = None
+            async with self.semaphore:
+                self.requests += 1
+                try:
+                    response = await self.client.get(url)
+                    if response.status_code not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        return response.json()
+                    error = httpx.HTTPStatusError(
+                        f"{response.status_code} for {url}", request=response.request, response=response
+                    )
+                except httpx.TransportError as e:
+                    error = e
+            
+            if attempt >= self.max_retries:
+                raise error
+            delay = self.retry_delay(attempt, response)
+            if response is not None and response.status_code == 429:
+                # Rate limited: everyone waits, not only this request
+                self.rate_limited += 1
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self.retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
 
-async def fetch_pokemon_list(client: httpx.AsyncClient, limit: int, offset: int) -> List[Dict]:
+async def fetch_pokemon_list(api: PokeAPIClient, limit: int, offset: int) -> List[Dict]:
     """Fetch a list of Pokemon from PokeAPI"""
     url = f"{POKEAPI_BASE_URL}/pokemon?limit={limit}&offset={offset}"
-    response = await client.get(url)
-    response.raise_for_status()
-    data = response.json()
+    data = await api.get_json(url)
     return data['results']
 
-async def fetch_pokemon_detail(client: httpx.AsyncClient, url: str) -> Dict[str, Any]:
+async def fetch_pokemon_detail(api: PokeAPIClient, url: str) -> Dict[str, Any]:
     """Fetch detailed Pokemon data from PokeAPI"""
-    response = await client.get(url)
-    response.raise_for_status()
-    return response.json()
+    return await api.get_json(url)
 
-async def fetch_pokemon_species(client: httpx.AsyncClient, pokemon_id: int) -> Optional[str]:
+async def fetch_pokemon_species(api: PokeAPIClient, pokemon_id: int) -> Optional[str]:
     """Fetch Pokemon species data to get the Pokedex description"""
     try:
         url = f"{POKEAPI_BASE_URL}/pokemon-species/{pokemon_id}/"
-        response = await client.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = await api.get_json(url)
         
         # Get English flavor text entries
         flavor_texts = data.get('flavor_text_entries', [])
@@ -100,38 +174,13 @@ def extract_pokemon_data(pokemon_data: Dict[str, Any], description: Optional[str
         'description': description,  # NEW: Add description
     }
 
-async def process_batch(client: httpx.AsyncClient, pokemon_list: List[Dict]) -> List[Dict[str, Any]]:
-    """Process a batch of Pokemon concurrently"""
-    tasks = []
-    for pokemon in pokemon_list:
-        tasks.append(fetch_pokemon_detail(client, pokemon['url']))
-    
-    pokemon_details = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    processed = []
-    for i, pokemon_data in enumerate(pokemon_details):
-        if isinstance(pokemon_data, Exception):
-            print(f"  ⚠️  Error fetching Pokemon: {pokemon_data}")
-            continue
-        try:
-            # Fetch the description from species endpoint
-            pokemon_id = pokemon_data['id']
-            description = await fetch_pokemon_species(client, pokemon_id)
-            
-            # Extract and add to processed list
-            processed.append(extract_pokemon_data(pokemon_data, description))
-        except Exception as e:
-            print(f"  ⚠️  Error processing Pokemon {pokemon_data.get('name', 'unknown')}: {e}")
-    
-    return processed
-
 def insert_pokemon_batch(pokemon_batch: List[Dict[str, Any]]) -> int:
     """Insert a batch of Pokemon into Supabase"""
     if not pokemon_batch:
         return 0
     
     try:
-        response = supabase.table("pokemon").upsert(pokemon_batch).execute()
+        get_supabase().table("pokemon").upsert(pokemon_batch).execute()
         return len(pokemon_batch)
     except Exception as e:
         print(f"  ⚠️  Error inserting batch: {e}")
@@ -139,67 +188,171 @@ def insert_pokemon_batch(pokemon_batch: List[Dict[str, Any]]) -> int:
         success_count = 0
         for pokemon in pokemon_batch:
             try:
-                supabase.table("pokemon").upsert(pokemon).execute()
+                get_supabase().table("pokemon").upsert(pokemon).execute()
                 success_count += 1
             except Exception as e2:
                 print(f"    ⚠️  Error inserting {pokemon['name']}: {e2}")
         return success_count
 
-async def populate_database():
-    """Main function to populate the database"""
-    print(f"Starting to fetch and populate {MAX_POKEMON} Pokemon...")
-    print(f"This may take several minutes...\n")
+class Progress:
+    """Counters of the pipeline stages, printed while it runs"""
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        total_inserted = 0
-        offset = 0
-        
-        while offset < MAX_POKEMON:
-            # Fetch Pokemon list (PokeAPI returns max 100 at a time)
-            limit = min(100, MAX_POKEMON - offset)
-            print(f"Fetching Pokemon {offset + 1} to {offset + limit}...")
-            
+    def __init__(self, total: int):
+        self.total = total
+        self.listed = 0
+        self.fetched = 0
+        self.described = 0
+        self.transformed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+    
+    def line(self, api: PokeAPIClient) -> str:
+        elapsed = time.monotonic() - self.started_at
+        rate = self.inserted / elapsed if elapsed > 0 else 0.0
+        return (
+            f"  [{elapsed:6.1f}s] listed {self.listed}, details {self.fetched}, "
+            f"species {self.described}, inserted {self.inserted}/{self.total} ({rate:.1f}/s), "
+            f"failed {self.failed}, requests {api.requests}, retries {api.retries}"
+        )
+
+async def report_progress(progress: Progress, api: PokeAPIClient):
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL)
+        print(progress.line(api))
+
+async def run_workers(count: int, worker, outbox: Optional[asyncio.Queue], next_workers: int):
+    """Run a stage's workers, then tell each worker of the next stage there is no more input"""
+    await asyncio.gather(*[worker() for _ in range(count)])
+    if outbox is not None:
+        for _ in range(next_workers):
+            await outbox.put(None)
+
+async def run_pipeline(api: PokeAPIClient, limit: int, workers: int, batch_size: int, dry_run: bool) -> Progress:
+    """Fetch, transform and write limit Pokemon; returns the final counters"""
+    progress = Progress(limit)
+    # Bounded queues, so a slow stage holds back the ones before it
+    details: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    species: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    transform: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    rows: asyncio.Queue = asyncio.Queue(maxsize=batch_size * 2)
+    
+    async def list_stage():
+        for offset in range(0, limit, LIST_PAGE_SIZE):
+            page = await fetch_pokemon_list(api, min(LIST_PAGE_SIZE, limit - offset), offset)
+            progress.listed += len(page)
+            for pokemon in page:
+                await details.put(pokemon)
+    
+    async def detail_worker():
+        while (pokemon := await details.get()) is not None:
             try:
-                pokemon_list = await fetch_pokemon_list(client, limit, offset)
+                data = await fetch_pokemon_detail(api, pokemon['url'])
             except Exception as e:
-                print(f"  ❌ Error fetching Pokemon list: {e}")
-                break
-            
-            # Process in smaller batches
-            for i in range(0, len(pokemon_list), BATCH_SIZE):
-                batch = pokemon_list[i:i + BATCH_SIZE]
-                batch_num = (offset + i) // BATCH_SIZE + 1
-                
-                print(f"  Processing batch {batch_num} ({len(batch)} Pokemon)...")
-                
-                # Fetch and process Pokemon details
-                processed = await process_batch(client, batch)
-                
-                # Insert into database
-                inserted = insert_pokemon_batch(processed)
-                total_inserted += inserted
-                
-                print(f"  ✓ Inserted {inserted}/{len(batch)} Pokemon (Total: {total_inserted})")
-                
-                # Small delay to be nice to PokeAPI
-                await asyncio.sleep(0.5)
-            
-            offset += limit
+                progress.failed += 1
+                print(f"  ⚠️  Error fetching Pokemon {pokemon['name']}: {e}")
+                continue
+            progress.fetched += 1
+            await species.put(data)
+    
+    async def species_worker():
+        while (data := await species.get()) is not None:
+            # A missing description doesn't stop the Pokemon from being stored
+            description = await fetch_pokemon_species(api, data['id'])
+            progress.described += 1
+            await transform.put((data, description))
+    
+    async def transform_worker():
+        while (item := await transform.get()) is not None:
+            data, description = item
+            try:
+                row = extract_pokemon_data(data, description)
+            except Exception as e:
+                progress.failed += 1
+                print(f"  ⚠️  Error processing Pokemon {data.get('name', 'unknown')}: {e}")
+                continue
+            progress.transformed += 1
+            await rows.put(row)
     
+    async def write_worker():
+        batch = []
+        done = False
+        while not done:
+            row = await rows.get()
+            if row is None:
+                done = True
+            else:
+                batch.append(row)
+            if batch and (done or len(batch) >= batch_size):
+                # The client is synchronous, fetching goes on while the batch is written
+                inserted = len(batch) if dry_run else await asyncio.to_thread(insert_pokemon_batch, batch)
+                progress.inserted += inserted
+                progress.failed += len(batch) - inserted
+                batch = []
+    
+    reporter = asyncio.create_task(report_progress(progress, api))
+    try:
+        await asyncio.gather(
+            run_workers(1, list_stage, details, workers),
+            run_workers(workers, detail_worker, species, workers),
+            run_workers(workers, species_worker, transform, 1),
+            run_workers(1, transform_worker, rows, 1),
+            run_workers(1, write_worker, None, 0),
+        )
+    finally:
+        reporter.cancel()
+    return progress
+
+async def populate_database(
+    limit: int = MAX_POKEMON,
+    concurrency: int = CONCURRENCY,
+    max_retries: int = MAX_RETRIES,
+    batch_size: int = BATCH_SIZE,
+    dry_run: bool = False,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+):
+    """Main function to populate the database"""
+    print(f"Starting to fetch and populate {limit} Pokemon...")
+    print(f"Up to {concurrency} PokeAPI requests at once, {max_retries} retries per request\n")
+    
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=30.0, limits=limits, transport=transport) as client:
+        api = PokeAPIClient(client, concurrency, max_retries)
+        progress = await run_pipeline(api, limit, concurrency, batch_size, dry_run)
+    
+    elapsed = time.monotonic() - progress.started_at
     print(f"\n{'='*60}")
-    print(f"✓ Database population complete!")
-    print(f"  Total Pokemon inserted: {total_inserted}")
+    print("✓ Database population complete!" + (" (dry run, nothing written)" if dry_run else ""))
+    print(f"  Total Pokemon inserted: {progress.inserted}/{limit} in {elapsed:.1f}s")
+    print(f"  Failed: {progress.failed}")
+    print(f"  PokeAPI requests: {api.requests} ({api.retries} retries, {api.rate_limited} rate limited)")
     print(f"{'='*60}")
     
+    if dry_run:
+        return progress
+    
     # Verify the count
     try:
-        count_response = supabase.table("pokemon").select("id", count="exact").execute()
+        count_response = get_supabase().table("pokemon").select("id", count="exact").execute()
         db_count = count_response.count
         print(f"\n✓ Verification: {db_count} Pokemon in database")
     except Exception as e:
         print(f"\n⚠️  Couldn't verify count: {e}")
+    return progress
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Populate the pokemon table from PokeAPI")
+    parser.add_argument("-y", "--yes", action="store_true", help="Don't ask for confirmation")
+    parser.add_argument("--limit", type=int, default=MAX_POKEMON, help="Number of Pokemon to fetch")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="PokeAPI requests in flight at once")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES, help="Retries of a failed PokeAPI request")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per Supabase upsert")
+    parser.add_argument("--dry-run", action="store_true", help="Fetch and transform without writing")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
+    
     print("="*60)
     print("Pokemon Database Population Script")
     print("="*60)
@@ -213,11 +366,20 @@ if __name__ == "__main__":
     print("- Set up your .env file with Supabase credentials")
     print("="*60)
     
-    input("\nPress Enter to continue or Ctrl+C to cancel...")
+    # Without a terminal (CI, cron) there is nobody to answer, so --yes is implied
+    if not args.yes and sys.stdin.isatty():
+        input("\nPress Enter to continue or Ctrl+C to cancel...")
     
     try:
-        asyncio.run(populate_database())
+        asyncio.run(populate_database(
+            limit=args.limit,
+            concurrency=args.concurrency,
+            max_retries=args.retries,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run
+        ))
     except KeyboardInterrupt:
         print("\n\n✗ Script cancelled by user")
     except Exception as e:
-        print(f"\n\n✗ Error: {e}")
\ No newline at end of file
+        print(f"\n\n✗ Error: {e}")
+        sys.exit(1)
\ No newline at end of file
@@ -12,7 +12,7 @@ import os
 
 # Add parent directory to path to import app modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.database import supabase
+from app.database import get_supabase
 
 POKEAPI_BASE_URL = "https://pokeapi.co/api/v2"
 BATCH_SIZE = 20  # Process 20 Pokemon at a time
@@ -83,7 +83,7 @@ def update_pokemon_batch(pokemon_batch: list) -> int:
     success_count = 0
     for pokemon in pokemon_batch:
         try:
-            supabase.table("pokemon").update({
+            get_supabase().table("pokemon").update({
                 'region': pokemon['region'],
                 'habitat': pokemon['habitat']
             }).eq('id', pokemon['id']).execute()
@@ -126,7 +126,7 @@ async def populate_region_habitat():
     
     # Verify the data
     try:
-        response = supabase.table("pokemon").select("region, habitat", count="exact").not_.is_("region", "null").execute()
+        response = get_supabase().table("pokemon").select("region, habitat", count="exact").not_.is_("region", "null").execute()
         print(f"\n✓ Verification: {response.count} Pokemon have region data")
     except Exception as e:
         print(f"\n⚠️  Couldn't verify count: {e}")
@@ -0,0 +1,13 @@
+-- A trainer can own each Pokemon at most once.
+-- Captures are written with "insert ... on conflict do nothing", which relies
+-- on this constraint instead of checking for an existing row first.
+
+-- Drop duplicate captures left over from the old check-then-insert flow
+delete from captured_pokemon a
+using captured_pokemon b
+where a.trainer_id = b.trainer_id
+  and a.pokemon_id = b.pokemon_id
+  and a.id > b.id;
+
+alter table captured_pokemon
+  add constraint captured_pokemon_trainer_pokemon_key unique (trainer_id, pokemon_id);
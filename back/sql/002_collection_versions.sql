@@ -0,0 +1,75 @@
+-- Per-trainer collection version and change log used by /pokemon/collection/sync.
+-- Every insert or delete on captured_pokemon bumps the trainer's version and
+-- records the change, so clients can fetch only what changed since the
+-- version they last saw. Versions are dense (1, 2, 3, ...) per trainer.
+
+alter table trainers
+  add column if not exists collection_version bigint not null default 0;
+
+create table if not exists collection_events (
+  trainer_id text not null references trainers(trainer_id) on delete cascade,
+  version bigint not null,
+  pokemon_id integer not null,
+  action text not null check (action in ('add', 'remove')),
+  created_at timestamptz not null default now(),
+  primary key (trainer_id, version)
+);
+
+create or replace function record_collection_event() returns trigger as $$
+declare
+  event_trainer text;
+  event_pokemon integer;
+  event_action text;
+  next_version bigint;
+begin
+  if tg_op = 'INSERT' then
+    event_trainer := new.trainer_id;
+    event_pokemon := new.pokemon_id;
+    event_action := 'add';
+  else
+    event_trainer := old.trainer_id;
+    event_pokemon := old.pokemon_id;
+    event_action := 'remove';
+  end if;
+
+  -- The row lock on the trainer serialises concurrent changes to one collection
+  update trainers
+    set collection_version = collection_version + 1
+    where trainer_id = event_trainer
+    returning collection_version into next_version;
+
+  if next_version is not null then
+    insert into collection_events (trainer_id, version, pokemon_id, action)
+      values (event_trainer, next_version, event_pokemon, event_action);
+  end if;
+
+  return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists captured_pokemon_collection_events on captured_pokemon;
+create trigger captured_pokemon_collection_events
+  after insert or delete on captured_pokemon
+  for each row execute function record_collection_event();
+
+-- Backfill: existing captures become the first versions of each collection
+insert into collection_events (trainer_id, version, pokemon_id, action)
+select trainer_id,
+       row_number() over (partition by trainer_id order by id),
+       pokemon_id,
+       'add'
+from captured_pokemon
+on conflict do nothing;
+
+update trainers t
+set collection_version = e.max_version
+from (
+  select trainer_id, max(version) as max_version
+  from collection_events
+  group by trainer_id
+) e
+where t.trainer_id = e.trainer_id;
+
+-- Old events can be pruned at any time; clients behind the oldest retained
+-- event simply receive a full snapshot:
+--   delete from collection_events where created_at < now() - interval '30 days';
@@ -0,0 +1,18 @@
+-- Refresh tokens for /auth/refresh.
+-- Only a SHA-256 hash of each token is stored. Tokens are single use: each
+-- refresh revokes the presented token and issues a new one in the same
+-- family. Presenting an already revoked token revokes the whole family.
+
+create table if not exists refresh_tokens (
+  token_hash text primary key,
+  trainer_id text not null references trainers(trainer_id) on delete cascade,
+  family_id uuid not null,
+  expires_at timestamptz not null,
+  revoked_at timestamptz,
+  created_at timestamptz not null default now()
+);
+
+create index if not exists refresh_tokens_family_id_idx on refresh_tokens (family_id);
+
+-- Expired tokens can be pruned at any time:
+--   delete from refresh_tokens where expires_at < now();
@@ -26,6 +26,9 @@ export const login = createAsyncThunk(
     try {
       const response = await authService.login(credentials);
       localStorage.setItem('token', response.access_token);
+      if (response.refresh_token) {
+        localStorage.setItem('refresh_token', response.refresh_token);
+      }
       
       // Get user data after login
       const user = await authService.getCurrentUser();
@@ -47,6 +50,9 @@ export const register = createAsyncThunk(
       // Automatically login after registration
       const loginResponse = await authService.login(credentials);
       localStorage.setItem('token', loginResponse.access_token);
+      if (loginResponse.refresh_token) {
+        localStorage.setItem('refresh_token', loginResponse.refresh_token);
+      }
       
       return { token: loginResponse.access_token, user };
     } catch (error: any) {
@@ -71,7 +77,7 @@ export const checkAuth = createAsyncThunk(
 );
 
 export const logout = createAsyncThunk('auth/logout', async () => {
-  authService.logout();
+  await authService.logout();
 });
 
 const authSlice = createSlice({
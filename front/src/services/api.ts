@@ -23,13 +23,53 @@ api.interceptors.request.use(
   }
 );
 
+// Shared refresh request so concurrent 401s only trigger one refresh
+let refreshPromise: Promise<string> | null = null;
+
+const refreshAccessToken = async (failedToken: string | null): Promise<string> => {
+  const refresh = async (): Promise<string> => {
+    // Another tab may have refreshed while this one waited for the lock
+    const storedToken = localStorage.getItem('token');
+    if (storedToken && storedToken !== failedToken) {
+      return storedToken;
+    }
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (!refreshToken) {
+      throw new Error('No refresh token');
+    }
+    // Plain axios so this request doesn't go through the interceptors
+    const response = await axios.post(`${API_BASE_URL}/auth/refresh`, {
+      refresh_token: refreshToken,
+    });
+    localStorage.setItem('token', response.data.access_token);
+    localStorage.setItem('refresh_token', response.data.refresh_token);
+    return response.data.access_token;
+  };
+  // Every tab shares the stored refresh token, so refreshes are serialised across tabs
+  return navigator.locks ? navigator.locks.request('auth-refresh', refresh) : refresh();
+};
+
 // Response interceptor to handle auth errors
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
-    if (error.response?.status === 401) {
-      localStorage.removeItem('token');
-      window.location.href = '/login';
+  async (error) => {
+    const originalRequest = error.config;
+    const isLogin = originalRequest?.url?.startsWith('/auth/login');
+    if (error.response?.status === 401 && originalRequest && !originalRequest._retry && !isLogin) {
+      originalRequest._retry = true;
+      const failedToken = String(originalRequest.headers?.Authorization ?? '').replace(/^Bearer /, '') || null;
+      try {
+        refreshPromise = refreshPromise || refreshAccessToken(failedToken);
+        const token = await refreshPromise;
+        originalRequest.headers.Authorization = `Bearer ${token}`;
+        return api(originalRequest);
+      } catch {
+        localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
+        window.location.href = '/login';
+      } finally {
+        refreshPromise = null;
+      }
     }
     return Promise.reject(error);
   }
@@ -13,6 +13,7 @@ export type RegisterCredentials = {
 export type AuthResponse = {
   access_token: string;
   token_type: string;
+  refresh_token?: string;
 }
 
 export type User = {
@@ -54,7 +55,16 @@ export const authService = {
     return response.data;
   },
 
-  logout: () => {
+  logout: async () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      try {
+        await api.post('/auth/logout', { refresh_token: refreshToken });
+      } catch {
+        // Still log out locally if the server can't be reached
+      }
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
   },
 };
\ No newline at end of file